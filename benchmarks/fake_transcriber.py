@@ -0,0 +1,60 @@
+"""Stand-in for the transcribe-anything command line, for benchmarks.
+
+Accepts the same arguments the engine passes, sleeps for --latency seconds
+while printing tqdm-style progress lines, and writes all five output formats
+(out.txt, out.srt, out.vtt, out.json, out.tsv) with --segments synthetic
+segments, so everything around the ASR itself runs for real.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from subtitles import OUTPUT_FORMATS, render_format
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake transcribe-anything")
+    parser.add_argument("source")
+    parser.add_argument("--output_dir", required=True)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--model", default="default")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds spent 'transcribing'")
+    parser.add_argument("--cpu-slowdown", type=float, default=1.0,
+                        help="latency factor with --device cpu (to stand in for a slower device in a device pool)")
+    parser.add_argument("--progress-lines", type=int, default=20)
+    parser.add_argument("--segments", type=int, default=50)
+    parser.add_argument("--words", type=int, default=12, help="words per segment")
+    parser.add_argument("--fail", action="store_true", help="exit with an error instead")
+    parser.add_argument("--fail-message", default="Simulated transcription failure",
+                        help="error printed by --fail (e.g. 'CUDA out of memory' to test retries)")
+    parser.add_argument("--fail-device", help="only fail when running on this device")
+    parser.add_argument("--fail-name", help="only fail for sources whose file name contains this")
+    args = parser.parse_args()
+
+    latency = args.latency * (args.cpu_slowdown if args.device == "cpu" else 1.0)
+    steps = max(1, args.progress_lines)
+    for step in range(1, steps + 1):
+        time.sleep(latency / steps)
+        done = step * 100 // steps
+        sys.stderr.write(f"{done:3d}%|{'#' * (done // 10):<10}| {step}/{steps} [00:01<00:01, 1.00it/s]\n")
+        sys.stderr.flush()
+    if (args.fail and args.fail_device in (None, args.device)
+            and (args.fail_name is None or args.fail_name in Path(args.source).name)):
+        sys.exit(args.fail_message)
+
+    name = Path(args.source).name
+    text = " ".join(["word"] * args.words)
+    segments = [{"id": i, "start": i * 2.0, "end": i * 2.0 + 1.5, "text": f" {name} {i}: {text}"}
+                for i in range(args.segments)]
+    result = {"text": "".join(s["text"] for s in segments), "segments": segments, "language": "en"}
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for output_format in OUTPUT_FORMATS:
+        (output_dir / f"out.{output_format}").write_text(render_format(result, output_format), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
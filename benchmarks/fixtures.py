@@ -0,0 +1,73 @@
+"""Synthetic inputs for benchmarks: media folders and a stubbed YoutubeDL."""
+import re
+import time
+from pathlib import Path
+
+CORPUS_EXTENSIONS = (".mp3", ".mp4", ".wav", ".m4a", ".mkv")
+
+
+def make_corpus(root, count, size_bytes=64 * 1024, subfolders=0):
+    """Create count fake media files under root (spread over subfolders) and return their paths.
+
+    Every file starts with a unique header so content hashes differ.
+    """
+    root = Path(root)
+    paths = []
+    for i in range(count):
+        folder = root / f"folder_{i % subfolders:03d}" if subfolders else root
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"recording_{i:05d}{CORPUS_EXTENSIONS[i % len(CORPUS_EXTENSIONS)]}"
+        header = f"synthetic media file {i}\n".encode()
+        path.write_bytes(header + bytes(max(0, size_bytes - len(header))))
+        paths.append(path)
+    return paths
+
+
+def make_stub_youtube_dl(videos=20, download_bytes=256 * 1024, latency=0.0, page_size=100):
+    """Return a YoutubeDL stand-in serving a playlist of `videos` synthetic videos.
+
+    Every extract_info call, and every further page of page_size playlist
+    entries, sleeps for latency seconds (network round trip); with
+    process=False the entries are produced lazily like yt-dlp's. Downloads
+    write download_bytes to the requested output template.
+    """
+
+    class StubYoutubeDL:
+        calls = []  # (url, download) of every extraction, for inspection
+        listed = 0  # Playlist entries produced so far
+
+        def __init__(self, options=None):
+            self.options = options or {}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+        def extract_info(self, url, download=False, process=True):
+            time.sleep(latency)
+            StubYoutubeDL.calls.append((url, download))
+            if "list=" in url:
+                entries = self.playlist_pages()
+                return {"_type": "playlist", "entries": entries if not process else list(entries)}
+            match = re.search(r"v=([^&]+)", url)
+            video_id = match.group(1) if match else "video"
+            info = {"id": video_id, "title": f"Synthetic video {video_id}", "ext": "webm", "duration": 60}
+            if download:
+                Path(self.prepare_filename(info)).write_bytes(bytes(download_bytes))
+            return info
+
+        def playlist_pages(self):
+            for i in range(videos):
+                if i and i % page_size == 0:
+                    time.sleep(latency)
+                StubYoutubeDL.listed += 1
+                yield {"_type": "url", "ie_key": "Youtube", "id": f"video{i:05d}",
+                       "url": f"https://www.youtube.com/watch?v=video{i:05d}",
+                       "title": f"Synthetic video {i}", "duration": 60}
+
+        def prepare_filename(self, info):
+            return self.options.get("outtmpl", "%(id)s.%(ext)s") % info
+
+    return StubYoutubeDL
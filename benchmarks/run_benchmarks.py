@@ -0,0 +1,264 @@
+"""Measure the wrapper's own overhead with a fake transcriber.
+
+Runs the engine in batch, single and playlist mode against a synthetic
+corpus, with fake_transcriber.py in place of transcribe-anything and a stub
+YoutubeDL in place of yt-dlp, then reports per scenario:
+
+- files/sec and per-file overhead (wall time beyond the fake's latency)
+- UI latency: how long engine events wait before a UI loop polling every
+  100 ms (like the GUI's) picks them up, and how many were posted
+- peak memory (process RSS where available, Python heap with --trace-memory)
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --files 200 --workers 4 --save-baseline
+    python benchmarks/run_benchmarks.py --compare
+    python benchmarks/run_benchmarks.py --devices cuda:0,cuda:1,cpu*2 --cpu-slowdown 4
+
+--compare exits with 1 when a scenario is slower than the baseline by more
+than --tolerance. Every scenario runs --repeat times and the run with the
+median wall time is reported. Baselines are machine specific, so they are
+kept out of version control: the first run on a platform records
+baseline-<platform>.json next to this script, and later runs compare with
+it. baseline.example.json shows the format.
+"""
+import argparse
+import json
+import platform
+import queue
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent))
+
+from fixtures import make_corpus, make_stub_youtube_dl
+from transcribe_engine import EngineSettings, TranscribeEngine
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCENARIOS = ["batch", "single", "playlist"]
+DEFAULT_BASELINE = BENCHMARK_DIR / f"baseline-{sys.platform}-{platform.machine().lower() or 'unknown'}.json"
+# Mirrors the GUI's event drain (UI_POLL_MS, MAX_UI_EVENTS_PER_TICK) without needing a display
+UI_POLL_SECONDS = 0.1
+MAX_UI_EVENTS_PER_TICK = 2000
+
+
+class UiLatencyProbe:
+    """Engine callbacks that queue timestamped events for a simulated UI loop"""
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self.delays = []
+        self.running = False
+        self.thread = None
+
+    def post(self, *args):
+        self.events.put(time.perf_counter())
+
+    def callbacks(self):
+        return {"on_log": self.post, "on_progress": self.post, "on_status": self.post,
+                "on_worker_status": self.post}
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.loop, daemon=True)
+        self.thread.start()
+
+    def loop(self):
+        while self.running or not self.events.empty():
+            time.sleep(UI_POLL_SECONDS)
+            now = time.perf_counter()
+            try:
+                for _ in range(MAX_UI_EVENTS_PER_TICK):
+                    self.delays.append(now - self.events.get_nowait())
+            except queue.Empty:
+                pass
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+    def summary(self):
+        delays = sorted(self.delays)
+        if not delays:
+            return {"ui_events": 0, "ui_p95_ms": 0.0, "ui_max_ms": 0.0}
+        return {"ui_events": len(delays),
+                "ui_p95_ms": round(delays[int(len(delays) * 0.95) - 1 if len(delays) > 1 else 0] * 1000, 1),
+                "ui_max_ms": round(delays[-1] * 1000, 1)}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def make_engine(args, work_dir, probe):
+    fake = (BENCHMARK_DIR / "fake_transcriber.py").as_posix()
+    command = (f'"{Path(sys.executable).as_posix()}" "{fake}" {{source}} --output_dir {{output_dir}} '
+               f'--latency {args.latency} --segments {args.segments} --device {{device}} '
+               f'--cpu-slowdown {args.cpu_slowdown}')
+    settings = EngineSettings(
+        device="cpu",
+        workers=args.workers,
+        devices=args.devices,
+        same_folder=False,
+        output_folder=str(work_dir / "output"),
+        use_cache=False,
+        resume=False,
+        prefetch_depth=args.prefetch,
+        scratch_dir=str(work_dir / "scratch"),
+        transcriber_command=command,
+        warm_worker=args.warm,
+        worker_command=f'"{Path(sys.executable).as_posix()}" {{script}} --fake --fake-delay {args.latency}',
+        data_dir=str(work_dir / "data"),
+        export_metrics=False,
+    )
+    engine = TranscribeEngine(settings, **probe.callbacks())
+    engine.YoutubeDL = make_stub_youtube_dl(args.videos, args.download_kb * 1024, args.network_latency)
+    return engine
+
+
+def run_scenario(name, args):
+    """Run one scenario in a fresh work folder and return its metrics"""
+    with tempfile.TemporaryDirectory(prefix=f"transcribe_bench_{name}_") as temp_dir:
+        work_dir = Path(temp_dir)
+        probe = UiLatencyProbe()
+        engine = make_engine(args, work_dir, probe)
+        if name == "batch":
+            make_corpus(work_dir / "media", args.files, args.file_kb * 1024, args.subfolders)
+            engine.settings.recursive = bool(args.subfolders)
+        elif name == "single":
+            paths = make_corpus(work_dir / "media", args.singles, args.file_kb * 1024)
+
+        probe.start()
+        start = time.perf_counter()
+        if name == "batch":
+            results = [engine.run_batch(work_dir / "media")]
+            parallel = args.workers
+        elif name == "single":
+            # Each file is its own run, like transcribing files one by one in single mode
+            results = [engine.run_file(path) for path in paths]
+            parallel = 1
+        else:
+            results = [engine.run_playlist("https://www.youtube.com/playlist?list=PLbenchmark")]
+            parallel = min(args.workers, args.videos)
+        wall = time.perf_counter() - start
+        probe.stop()
+
+    successful = sum(r[0] for r in results if r)
+    failed = sum(r[1] for r in results if r) + sum(1 for r in results if r is None)
+    items = successful + failed
+    metrics = {
+        "items": items,
+        "failed": failed,
+        "wall_s": round(wall, 3),
+        "files_per_s": round(items / wall, 2) if wall else 0.0,
+        # Time each worker spent per item on top of the simulated transcription
+        "overhead_ms": round((wall * parallel / items - args.latency) * 1000, 1) if items else 0.0,
+    }
+    metrics.update(probe.summary())
+    return metrics
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions of results against baseline"""
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        if metrics["files_per_s"] < base["files_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: {metrics['files_per_s']} files/s vs baseline {base['files_per_s']}")
+        # Absolute slack keeps near-zero overheads from flagging on noise
+        if metrics["overhead_ms"] > base["overhead_ms"] * (1 + tolerance) + 10:
+            regressions.append(f"{name}: {metrics['overhead_ms']} ms overhead/file vs baseline {base['overhead_ms']}")
+        if metrics["ui_p95_ms"] > base["ui_p95_ms"] * (1 + tolerance) + 20:
+            regressions.append(f"{name}: UI latency p95 {metrics['ui_p95_ms']} ms vs baseline {base['ui_p95_ms']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the transcription wrapper with a fake transcriber")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--files", type=int, default=40, help="files in the batch corpus")
+    parser.add_argument("--file-kb", type=int, default=256, help="size of each synthetic media file")
+    parser.add_argument("--subfolders", type=int, default=0, help="spread the batch corpus over subfolders")
+    parser.add_argument("--singles", type=int, default=5, help="single-file runs")
+    parser.add_argument("--videos", type=int, default=20, help="videos in the fake playlist")
+    parser.add_argument("--download-kb", type=int, default=256, help="size of each fake download")
+    parser.add_argument("--network-latency", type=float, default=0.0, help="seconds per stub yt-dlp call")
+    parser.add_argument("--prefetch", type=int, default=2, help="playlist prefetch depth")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--devices", default="", help="device pool instead of --workers, e.g. cuda:0,cuda:1,cpu*2")
+    parser.add_argument("--cpu-slowdown", type=float, default=1.0,
+                        help="how much slower the fake transcriber is on the cpu than on other devices")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the fake transcriber takes per file")
+    parser.add_argument("--warm", action="store_true",
+                        help="run the jobs on warm workers (transcribe_worker.py --fake) instead of a process per file")
+    parser.add_argument("--segments", type=int, default=50, help="segments in each fake transcript")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario; the median run is reported")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also report the Python heap peak (slows the run down)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", nargs="?", const=str(DEFAULT_BASELINE),
+                        help=f"baseline JSON to compare with (default: {DEFAULT_BASELINE.name})")
+    parser.add_argument("--save-baseline", nargs="?", const=str(DEFAULT_BASELINE),
+                        help=f"store the results as the new baseline (default: {DEFAULT_BASELINE.name})")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    results = {}
+    for name in args.scenarios:
+        runs = sorted((run_scenario(name, args) for _ in range(max(1, args.repeat))), key=lambda m: m["wall_s"])
+        metrics = runs[len(runs) // 2]
+        if args.trace_memory:
+            metrics["heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+            tracemalloc.reset_peak()
+        metrics["rss_peak_mb"] = peak_rss_mb()
+        results[name] = metrics
+
+    print(f"{'scenario':<10}{'items':>7}{'failed':>7}{'wall s':>9}{'files/s':>9}{'ovh ms':>9}"
+          f"{'ui p95':>9}{'ui max':>9}{'rss MB':>9}")
+    for name, m in results.items():
+        print(f"{name:<10}{m['items']:>7}{m['failed']:>7}{m['wall_s']:>9}{m['files_per_s']:>9}{m['overhead_ms']:>9}"
+              f"{m['ui_p95_ms']:>9}{m['ui_max_ms']:>9}{m['rss_peak_mb'] or '-':>9}")
+
+    report = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "parameters": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "save_baseline", "tolerance")},
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if not args.save_baseline and not DEFAULT_BASELINE.exists() and args.compare in (None, str(DEFAULT_BASELINE)):
+        args.save_baseline, args.compare = str(DEFAULT_BASELINE), None  # First run on this platform
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Saved baseline to {args.save_baseline}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if baseline.get("parameters") != report["parameters"]:
+            print("Warning: the baseline was recorded with different parameters")
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
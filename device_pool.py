@@ -0,0 +1,138 @@
+"""Several devices (GPUs and the CPU) transcribing side by side.
+
+A device spec such as "cuda:0,cuda:1,cpu*2" describes worker slots: one
+worker per GPU and two on the CPU. Each slot runs its jobs with its own
+device; a numbered GPU is selected through CUDA_VISIBLE_DEVICES, so the
+transcriber itself only ever sees one GPU.
+
+DeviceScheduler hands the queued jobs to whichever slot frees up first. The
+fastest slots take the longest job waiting; slower slots take short jobs and
+leave a job to the fast devices when those would still finish it sooner.
+It is plain logic over (duration, speed) pairs, so it can be exercised with
+stub workers that only sleep.
+"""
+import os
+import re
+import threading
+
+SPEC_PATTERN = re.compile(r"^(?P<device>[a-z]+)(?::(?P<index>\d+))?(?:\*(?P<count>\d+))?$")
+
+
+class DeviceSlot:
+    """One worker slot: the device it runs jobs on and how fast that device is.
+
+    rtf is the device's realtime factor (processing seconds per media second).
+    """
+
+    def __init__(self, device, index=None, rtf=1.0, threads=None):
+        self.device = device
+        self.index = index
+        self.rtf = rtf
+        self.threads = threads  # CPU threads of a CPU slot, when several share the processor
+
+    @property
+    def name(self):
+        return self.device if self.index is None else f"{self.device}:{self.index}"
+
+    def env(self):
+        """Environment for a transcriber process running on this slot, or None to inherit ours"""
+        changes = {}
+        if self.index is not None:
+            changes["CUDA_VISIBLE_DEVICES"] = str(self.index)
+        if self.threads:
+            changes["OMP_NUM_THREADS"] = str(self.threads)
+        return dict(os.environ, **changes) if changes else None
+
+    def __repr__(self):
+        return f"DeviceSlot({self.name!r}, rtf={self.rtf})"
+
+
+def parse_device_spec(spec, devices):
+    """Parse "cuda:0,cuda:1,cpu*2" into DeviceSlots; devices lists the valid device names.
+
+    Raises ValueError for an unknown device or malformed entry.
+    """
+    slots = []
+    for part in re.split(r"[\s,]+", spec.strip().lower()):
+        if not part:
+            continue
+        match = SPEC_PATTERN.match(part)
+        if not match or match["device"] not in devices:
+            raise ValueError(f"Invalid device '{part}' (use e.g. cuda:0,cuda:1,cpu*2 with {', '.join(devices)})")
+        index = int(match["index"]) if match["index"] is not None else None
+        slots += [DeviceSlot(match["device"], index) for _ in range(int(match["count"] or 1))]
+    cpu_slots = [slot for slot in slots if slot.device == "cpu"]
+    if len(cpu_slots) > 1:
+        # Split the cores instead of letting every CPU worker start a thread per core
+        for slot in cpu_slots:
+            slot.threads = max(1, (os.cpu_count() or 1) // len(cpu_slots))
+    return slots
+
+
+class DeviceScheduler:
+    """Thread-safe dispatch of jobs from items to device slots.
+
+    duration_of(item) gives an item's media duration (None when unknown).
+    backlog(), if given, returns the media seconds still waiting to be
+    started in the whole run; otherwise only the items looked at so far count.
+    At most lookahead items are taken from items ahead of time.
+    """
+
+    def __init__(self, items, slots, duration_of, lookahead=50, backlog=None):
+        self.source = iter(items)
+        self.slots = slots
+        self.duration_of = duration_of
+        self.lookahead = max(1, lookahead)
+        self.backlog = backlog
+        self.waiting = []  # (item, duration) taken from source but not handed out yet
+        self.exhausted = False
+        self.lock = threading.Lock()
+        best = min(slot.rtf for slot in slots)
+        self.fast_slots = [slot for slot in slots if slot.rtf <= best]
+        # Media seconds the fast slots get through per second, together
+        self.fast_capacity = sum(1 / slot.rtf for slot in self.fast_slots)
+
+    def _pull(self):
+        """Take the next item from the source into waiting; False when there is none"""
+        if self.exhausted:
+            return False
+        item = next(self.source, None)
+        if item is None:
+            self.exhausted = True
+            return False
+        self.waiting.append((item, self.duration_of(item)))
+        return True
+
+    def next_for(self, slot):
+        """Return the next item for slot, or None.
+
+        None means the queue is empty or, for a slower slot, that what is
+        waiting is better left to the faster devices (see done()).
+        """
+        with self.lock:
+            if slot in self.fast_slots:
+                if not self.waiting and not self._pull():
+                    return None
+                # Longest first; unknown durations count as zero
+                best = max(range(len(self.waiting)), key=lambda i: self.waiting[i][1] or 0)
+                return self.waiting.pop(best)[0]
+
+            while True:
+                candidates = sorted(range(len(self.waiting)), key=lambda i: self.waiting[i][1] or 0)
+                for i in candidates:
+                    if self._worth_taking(slot, self.waiting[i][1]):
+                        return self.waiting.pop(i)[0]
+                if len(self.waiting) >= self.lookahead or not self._pull():
+                    return None
+
+    def _worth_taking(self, slot, duration):
+        """True when slot finishes the job no later than the fast slots would finish the queue with it"""
+        if not duration:
+            return True
+        queued = self.backlog() if self.backlog else sum(d or 0 for _, d in self.waiting)
+        return duration * slot.rtf <= max(queued, duration) / self.fast_capacity
+
+    def done(self):
+        """True once every item has been handed out"""
+        with self.lock:
+            return self.exhausted and not self.waiting
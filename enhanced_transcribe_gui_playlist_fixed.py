@@ -1,18 +1,36 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import subprocess
 import os
-import tempfile
-import shutil
 import threading
-import re
+import time
+import webbrowser
+import queue
+import datetime
+import logging
+import logging.handlers
 from pathlib import Path
 
+from device_pool import parse_device_spec
+from job_coordinator import JobCoordinator, parse_address
+from job_queue import FILE, FOLDER, PLAYLIST, QUEUED, URL
+from media_index import MediaIndex
+from media_tools import AUDIO_FORMATS
+from subtitles import OUTPUT_FORMATS
+from transcribe_engine import (APP_DATA_DIR, DEVICES, REUSE_MODES, SUPPORTED_FORMATS, WHISPER_MODELS, EngineSettings,
+                               TranscribeEngine, split_urls, validate_youtube_url)
+
+# UI event bus: how often the Tk loop drains worker events and how many per tick
+UI_POLL_MS = 100
+MAX_UI_EVENTS_PER_TICK = 2000
+# Lines kept in the log widget before the oldest are dropped
+MAX_LOG_LINES = 5000
+
+
 class EnhancedTranscribeGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Enhanced Transcribe Anything - Single/Batch/Playlist Processing")
-        self.root.geometry("700x750")  # Increased height for new elements
+        self.root.geometry("700x1010")  # Increased height for new elements
 
         # Variables
         self.folder_path = tk.StringVar()
@@ -21,20 +39,52 @@ class EnhancedTranscribeGUI:
         self.same_folder_var = tk.BooleanVar(value=True)
         self.progress_var = tk.DoubleVar()
         self.status_var = tk.StringVar(value="Ready")
-        self.is_processing = False
         self.mode_var = tk.StringVar(value="batch")  # Mode selection (batch, single, or playlist)
         self.file_path = tk.StringVar()  # Single file path
         self.youtube_url = tk.StringVar()  # YouTube URL
-        self.playlist_url = tk.StringVar()  # NEW: YouTube Playlist URL
-
-        # Supported file extensions
-        self.supported_formats = {
-            '.mp4', '.avi', '.mov', '.wmv', '.mkv', '.flv', '.webm', '.mpg', '.mpeg', '.m4v',
-            '.3gp', '.ogv', '.ts', '.vob', '.asf', '.rm', '.rmvb', '.divx', '.xvid', '.f4v',
-            '.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a', '.opus', '.aiff', '.au'
-        }
+        self.playlist_url = tk.StringVar()  # NEW: YouTube Playlist URL (several playlists/channels separated by spaces)
+        self.worker_count_var = tk.IntVar(value=1)  # Parallel transcription workers
+        self.longest_first_var = tk.BooleanVar(value=True)  # With several workers, start the longest media first
+        self.devices_var = tk.StringVar()  # Device pool such as "cuda:0,cuda:1,cpu*2"; overrides device and workers
+        self.serve_var = tk.StringVar()  # [host:]port to hand transcriptions to worker agents on; empty runs them here
+        self.worker_rows = []  # (status StringVar, progress DoubleVar) per worker
+        self.model_var = tk.StringVar(value="default")
+        self.warm_worker_var = tk.BooleanVar(value=False)  # Keep the model loaded across files
+        self.max_retries_var = tk.IntVar(value=2)  # Extra attempts for transient failures
+        self.cpu_fallback_var = tk.BooleanVar(value=False)  # Redo a job on the CPU when the GPU runs out of memory
+        self.use_cache_var = tk.BooleanVar(value=True)  # Restore outputs of already transcribed media
+        self.cache_limit_mb_var = tk.IntVar(value=2048)
+        self.log_to_file_var = tk.BooleanVar(value=False)
+        self.ui_events = queue.Queue()  # Worker threads -> Tk thread (log lines and UI updates)
+        self.file_logger = logging.getLogger("transcribe_gui")
+        self.file_logger.setLevel(logging.INFO)
+        self.file_logger.propagate = False
+        self.resume_var = tk.BooleanVar(value=True)  # Skip items the journal records as done
+        self.prefetch_depth_var = tk.IntVar(value=2)  # Playlist videos downloaded ahead of transcription
+        self.prefetch_budget_mb_var = tk.IntVar(value=4096)
+        self.reuse_videos_var = tk.StringVar(value="copy")  # Videos transcribed before: copy, link, skip or off
+        self.recursive_var = tk.BooleanVar(value=False)  # Include subfolders in batch mode
+        self.media_index = None  # Shared by the folder preview and the batch run
+        self.watch_existing_var = tk.BooleanVar(value=False)  # Watch mode: also queue files already present
+        self.settle_seconds_var = tk.IntVar(value=10)
+        self.extract_audio_var = tk.BooleanVar(value=False)  # Demux video to 16 kHz mono before transcribing
+        self.audio_format_var = tk.StringVar(value="opus")
+        self.long_file_var = tk.BooleanVar(value=False)  # Split long recordings and transcribe chunks in parallel
+        self.chunk_minutes_var = tk.IntVar(value=10)
+        self.format_vars = {output_format: tk.BooleanVar(value=output_format in ("txt", "srt"))
+                            for output_format in OUTPUT_FORMATS}  # Formats written to the output folder
+        self.scratch_dir_var = tk.StringVar()  # Work folder for transcriber output (empty: system temp)
+        self.run_thread = None  # Thread of the engine run in progress
+        self.stopped_by_user = False  # Do not pick the queue up again after Stop
+
+        # The engine does the work; the GUI only collects settings and shows its events
+        self.engine = TranscribeEngine(on_log=self.log_message, on_progress=self.set_progress,
+                                       on_status=self.set_status, on_worker_status=self.set_worker_status,
+                                       on_run_finished=lambda metrics: self.post_ui(lambda: self.show_run_summary(metrics)))
+        self.supported_formats = SUPPORTED_FORMATS
 
         self.setup_ui()
+        self.process_ui_events()
 
     def setup_ui(self):
         # Main frame
@@ -61,6 +111,9 @@ class EnhancedTranscribeGUI:
         ttk.Radiobutton(mode_frame, text="YouTube Playlist",
             variable=self.mode_var, value="playlist",
             command=self.toggle_mode).grid(row=0, column=2, padx=10, sticky=tk.W)
+        ttk.Radiobutton(mode_frame, text="Watch Folder",
+            variable=self.mode_var, value="watch",
+            command=self.toggle_mode).grid(row=0, column=3, padx=10, sticky=tk.W)
 
         # BATCH MODE FRAME
         self.batch_frame = ttk.LabelFrame(main_frame, text="Batch Processing")
@@ -68,6 +121,17 @@ class EnhancedTranscribeGUI:
         ttk.Label(self.batch_frame, text="Input Folder:").grid(row=0, column=0, sticky=tk.W, pady=5)
         ttk.Entry(self.batch_frame, textvariable=self.folder_path, width=50).grid(row=0, column=1, sticky=(tk.W, tk.E), padx=5)
         ttk.Button(self.batch_frame, text="Browse", command=self.select_folder).grid(row=0, column=2, padx=5)
+        scan_frame = ttk.Frame(self.batch_frame)
+        scan_frame.grid(row=1, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+        ttk.Checkbutton(scan_frame, text="Include subfolders (outputs mirror the folder structure)",
+            variable=self.recursive_var, command=self.scan_files).grid(row=0, column=0, sticky=tk.W)
+        ttk.Button(scan_frame, text="Rescan", command=self.scan_files).grid(row=0, column=1, padx=10)
+        extract_frame = ttk.Frame(self.batch_frame)
+        extract_frame.grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=5)
+        ttk.Checkbutton(extract_frame, text="Pre-extract 16 kHz mono audio from videos (ffmpeg)",
+            variable=self.extract_audio_var).grid(row=0, column=0, sticky=tk.W)
+        ttk.Combobox(extract_frame, textvariable=self.audio_format_var, values=sorted(AUDIO_FORMATS),
+            width=6, state="readonly").grid(row=0, column=1, padx=5, sticky=tk.W)
 
         # SINGLE MODE FRAME
         self.single_frame = ttk.LabelFrame(main_frame, text="Single File/URL Processing")
@@ -79,15 +143,44 @@ class EnhancedTranscribeGUI:
         ttk.Entry(self.single_frame, textvariable=self.youtube_url, width=50).grid(row=1, column=1, sticky=(tk.W, tk.E), padx=5)
 
         # PLAYLIST MODE FRAME (NEW)
-        self.playlist_frame = ttk.LabelFrame(main_frame, text="YouTube Playlist Processing")
+        self.playlist_frame = ttk.LabelFrame(main_frame, text="YouTube Playlist / Channel Processing")
         self.playlist_frame.grid(row=4, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10)
-        ttk.Label(self.playlist_frame, text="Playlist URL:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        ttk.Label(self.playlist_frame, text="Playlist URL(s):").grid(row=0, column=0, sticky=tk.W, pady=5)
         ttk.Entry(self.playlist_frame, textvariable=self.playlist_url, width=50).grid(row=0, column=1, sticky=(tk.W, tk.E), padx=5)
+        prefetch_frame = ttk.Frame(self.playlist_frame)
+        prefetch_frame.grid(row=1, column=0, columnspan=3, sticky=tk.W, pady=5)
+        ttk.Label(prefetch_frame, text="Prefetch downloads:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Spinbox(prefetch_frame, from_=0, to=20, width=5,
+            textvariable=self.prefetch_depth_var).grid(row=0, column=1, padx=5, sticky=tk.W)
+        ttk.Label(prefetch_frame, text="Disk budget (MB):").grid(row=0, column=2, padx=(15, 5), sticky=tk.W)
+        ttk.Spinbox(prefetch_frame, from_=0, to=1024 * 1024, increment=512, width=8,
+            textvariable=self.prefetch_budget_mb_var).grid(row=0, column=3, sticky=tk.W)
+        ttk.Label(prefetch_frame, text="Already transcribed videos:").grid(row=1, column=0, pady=(5, 0), sticky=tk.W)
+        ttk.Combobox(prefetch_frame, textvariable=self.reuse_videos_var, values=REUSE_MODES,
+            width=6, state="readonly").grid(row=1, column=1, padx=5, pady=(5, 0), sticky=tk.W)
+        ttk.Label(prefetch_frame, text="(copy/link earlier outputs, skip, or off to transcribe again)").grid(
+            row=1, column=2, columnspan=2, padx=(15, 5), pady=(5, 0), sticky=tk.W)
+
+        # WATCH MODE FRAME
+        self.watch_frame = ttk.LabelFrame(main_frame, text="Watch Folder")
+        self.watch_frame.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10)
+        ttk.Label(self.watch_frame, text="Watched Folder:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(self.watch_frame, textvariable=self.folder_path, width=50).grid(row=0, column=1, sticky=(tk.W, tk.E), padx=5)
+        ttk.Button(self.watch_frame, text="Browse", command=self.select_folder).grid(row=0, column=2, padx=5)
+        watch_options = ttk.Frame(self.watch_frame)
+        watch_options.grid(row=1, column=0, columnspan=3, sticky=tk.W, pady=5)
+        ttk.Checkbutton(watch_options, text="Include subfolders",
+            variable=self.recursive_var).grid(row=0, column=0, sticky=tk.W)
+        ttk.Checkbutton(watch_options, text="Also process files already in the folder",
+            variable=self.watch_existing_var).grid(row=0, column=1, padx=10, sticky=tk.W)
+        ttk.Label(watch_options, text="Settle time (s):").grid(row=0, column=2, padx=(10, 5), sticky=tk.W)
+        ttk.Spinbox(watch_options, from_=1, to=600, width=5,
+            textvariable=self.settle_seconds_var).grid(row=0, column=3, sticky=tk.W)
 
         # Output options
-        ttk.Label(main_frame, text="Output Options:", font=("Arial", 10, "bold")).grid(row=5, column=0, sticky=tk.W, pady=(15, 5))
+        ttk.Label(main_frame, text="Output Options:", font=("Arial", 10, "bold")).grid(row=6, column=0, sticky=tk.W, pady=(15, 5))
         output_frame = ttk.Frame(main_frame)
-        output_frame.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        output_frame.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
 
         ttk.Radiobutton(output_frame, text="Same folder as input files",
             variable=self.same_folder_var, value=True,
@@ -98,7 +191,7 @@ class EnhancedTranscribeGUI:
 
         # Custom output folder selection
         self.output_frame = ttk.Frame(main_frame)
-        self.output_frame.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        self.output_frame.grid(row=8, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
         ttk.Label(self.output_frame, text="Output Folder:").grid(row=0, column=0, sticky=tk.W)
         self.output_entry = ttk.Entry(self.output_frame, textvariable=self.output_folder_path, width=50)
         self.output_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=5)
@@ -106,28 +199,110 @@ class EnhancedTranscribeGUI:
         self.output_button.grid(row=0, column=2, padx=5)
         self.output_frame.columnconfigure(1, weight=1)
 
+        # Transcript cache
+        cache_frame = ttk.Frame(self.output_frame)
+        cache_frame.grid(row=1, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+        ttk.Checkbutton(cache_frame, text="Reuse cached transcripts of unchanged files",
+            variable=self.use_cache_var).grid(row=0, column=0, sticky=tk.W)
+        ttk.Label(cache_frame, text="Cache limit (MB):").grid(row=0, column=1, padx=(15, 5), sticky=tk.W)
+        ttk.Spinbox(cache_frame, from_=0, to=1024 * 1024, increment=256, width=8,
+            textvariable=self.cache_limit_mb_var).grid(row=0, column=2, sticky=tk.W)
+
+        # Output formats and scratch location
+        formats_frame = ttk.Frame(self.output_frame)
+        formats_frame.grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+        ttk.Label(formats_frame, text="Formats:").grid(row=0, column=0, sticky=tk.W)
+        for i, (output_format, var) in enumerate(self.format_vars.items()):
+            ttk.Checkbutton(formats_frame, text=f".{output_format}", variable=var).grid(row=0, column=i + 1, padx=5, sticky=tk.W)
+        ttk.Label(self.output_frame, text="Scratch Folder:").grid(row=3, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Entry(self.output_frame, textvariable=self.scratch_dir_var, width=50).grid(row=3, column=1, sticky=(tk.W, tk.E), padx=5, pady=(5, 0))
+        ttk.Button(self.output_frame, text="Browse", command=self.select_scratch_folder).grid(row=3, column=2, padx=5, pady=(5, 0))
+
         # Device selection
-        ttk.Label(main_frame, text="Device:", font=("Arial", 10, "bold")).grid(row=8, column=0, sticky=tk.W, pady=(15, 5))
+        ttk.Label(main_frame, text="Device:", font=("Arial", 10, "bold")).grid(row=9, column=0, sticky=tk.W, pady=(15, 5))
         device_frame = ttk.Frame(main_frame)
-        device_frame.grid(row=9, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        device_frame.grid(row=10, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
 
         devices = [("CPU", "cpu"), ("CUDA (GPU)", "cuda"), ("Insane Mode", "insane"), ("MPS (Mac)", "mps")]
         for i, (text, value) in enumerate(devices):
             ttk.Radiobutton(device_frame, text=text, variable=self.device_var, value=value).grid(row=0, column=i, padx=10, sticky=tk.W)
 
+        # Batch concurrency
+        ttk.Label(device_frame, text="Parallel workers:").grid(row=1, column=0, padx=10, pady=(5, 0), sticky=tk.W)
+        ttk.Spinbox(device_frame, from_=1, to=os.cpu_count() or 1, width=5,
+            textvariable=self.worker_count_var).grid(row=1, column=1, padx=10, pady=(5, 0), sticky=tk.W)
+        ttk.Checkbutton(device_frame, text="Longest files first",
+            variable=self.longest_first_var).grid(row=1, column=2, columnspan=2, padx=10, pady=(5, 0), sticky=tk.W)
+
+        # Model selection and warm worker
+        ttk.Label(device_frame, text="Model:").grid(row=2, column=0, padx=10, pady=(5, 0), sticky=tk.W)
+        ttk.Combobox(device_frame, textvariable=self.model_var, values=WHISPER_MODELS, width=10,
+            state="readonly").grid(row=2, column=1, padx=10, pady=(5, 0), sticky=tk.W)
+        ttk.Checkbutton(device_frame, text="Keep model loaded between files",
+            variable=self.warm_worker_var).grid(row=2, column=2, columnspan=2, padx=10, pady=(5, 0), sticky=tk.W)
+
+        # Long-file mode
+        chunk_frame = ttk.Frame(device_frame)
+        chunk_frame.grid(row=3, column=0, columnspan=4, padx=10, pady=(5, 0), sticky=tk.W)
+        ttk.Checkbutton(chunk_frame, text="Split long recordings at silences into chunks of",
+            variable=self.long_file_var).grid(row=0, column=0, sticky=tk.W)
+        ttk.Spinbox(chunk_frame, from_=1, to=120, width=5,
+            textvariable=self.chunk_minutes_var).grid(row=0, column=1, padx=5, sticky=tk.W)
+        ttk.Label(chunk_frame, text="min").grid(row=0, column=2, sticky=tk.W)
+
+        # Retries of transient failures
+        retry_frame = ttk.Frame(device_frame)
+        retry_frame.grid(row=4, column=0, columnspan=4, padx=10, pady=(5, 0), sticky=tk.W)
+        ttk.Label(retry_frame, text="Retries on network/GPU errors:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Spinbox(retry_frame, from_=0, to=10, width=5,
+            textvariable=self.max_retries_var).grid(row=0, column=1, padx=5, sticky=tk.W)
+        ttk.Checkbutton(retry_frame, text="Fall back to CPU when the GPU runs out of memory",
+            variable=self.cpu_fallback_var).grid(row=0, column=2, padx=10, sticky=tk.W)
+
+        # Several devices at once
+        pool_frame = ttk.Frame(device_frame)
+        pool_frame.grid(row=5, column=0, columnspan=4, padx=10, pady=(5, 0), sticky=tk.W)
+        ttk.Label(pool_frame, text="Device pool:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Entry(pool_frame, textvariable=self.devices_var, width=25).grid(row=0, column=1, padx=5, sticky=tk.W)
+        ttk.Label(pool_frame, text="e.g. cuda:0,cuda:1,cpu*2 (empty: device and workers above)").grid(
+            row=0, column=2, sticky=tk.W)
+        ttk.Label(pool_frame, text="Serve to agents on:").grid(row=1, column=0, pady=(5, 0), sticky=tk.W)
+        ttk.Entry(pool_frame, textvariable=self.serve_var, width=25).grid(row=1, column=1, padx=5, pady=(5, 0), sticky=tk.W)
+        ttk.Label(pool_frame, text="[host:]port for transcribe_cli.py agent (empty: transcribe here)").grid(
+            row=1, column=2, pady=(5, 0), sticky=tk.W)
+
         # Progress section
-        ttk.Label(main_frame, text="Progress:", font=("Arial", 10, "bold")).grid(row=10, column=0, sticky=tk.W, pady=(15, 5))
+        ttk.Label(main_frame, text="Progress:", font=("Arial", 10, "bold")).grid(row=11, column=0, sticky=tk.W, pady=(15, 5))
         self.progress_bar = ttk.Progressbar(main_frame, variable=self.progress_var, maximum=100)
-        self.progress_bar.grid(row=11, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        self.progress_bar.grid(row=12, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+
+        # Per-worker progress rows (filled in when a run starts)
+        self.workers_frame = ttk.Frame(main_frame)
+        self.workers_frame.grid(row=13, column=0, columnspan=3, sticky=(tk.W, tk.E))
+        self.workers_frame.columnconfigure(2, weight=1)
 
         # Status label
         self.status_label = ttk.Label(main_frame, textvariable=self.status_var)
-        self.status_label.grid(row=12, column=0, columnspan=3, sticky=tk.W, pady=5)
+        self.status_label.grid(row=14, column=0, columnspan=3, sticky=tk.W, pady=5)
+
+        # Time per stage of the last run
+        summary_frame = ttk.LabelFrame(main_frame, text="Run Summary")
+        summary_frame.grid(row=15, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        summary_frame.columnconfigure(0, weight=1)
+        columns = ("jobs", "seconds", "mean_s", "mb", "rtf")
+        self.summary_tree = ttk.Treeview(summary_frame, columns=columns, height=4)
+        self.summary_tree.heading("#0", text="Stage")
+        self.summary_tree.column("#0", width=110)
+        for column, heading in zip(columns, ("Jobs", "Total (s)", "Mean (s)", "MB", "Realtime factor")):
+            self.summary_tree.heading(column, text=heading)
+            self.summary_tree.column(column, width=90, anchor=tk.E)
+        self.summary_tree.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        ttk.Button(summary_frame, text="Export...", command=self.export_run_metrics).grid(row=0, column=1, padx=5, sticky=tk.N)
 
         # Log text area
-        ttk.Label(main_frame, text="Log:", font=("Arial", 10, "bold")).grid(row=13, column=0, sticky=tk.W, pady=(15, 5))
+        ttk.Label(main_frame, text="Log:", font=("Arial", 10, "bold")).grid(row=16, column=0, sticky=tk.W, pady=(15, 5))
         log_frame = ttk.Frame(main_frame)
-        log_frame.grid(row=14, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
+        log_frame.grid(row=17, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
 
@@ -139,7 +314,7 @@ class EnhancedTranscribeGUI:
 
         # Control buttons
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=15, column=0, columnspan=3, pady=20)
+        button_frame.grid(row=18, column=0, columnspan=3, pady=20)
 
         self.start_button = ttk.Button(button_frame, text="Start Transcription",
             command=self.start_transcription, style="Accent.TButton")
@@ -148,79 +323,43 @@ class EnhancedTranscribeGUI:
         self.stop_button = ttk.Button(button_frame, text="Stop", command=self.stop_transcription, state="disabled")
         self.stop_button.pack(side=tk.LEFT, padx=5)
 
+        ttk.Button(button_frame, text="Retry Failed Only",
+            command=lambda: self.start_transcription(retry_failed_only=True)).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(button_frame, text="Resume (skip completed)",
+            variable=self.resume_var).pack(side=tk.LEFT, padx=5)
+
+        ttk.Button(button_frame, text="Search Transcripts", command=self.open_search_window).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Clear Log", command=self.clear_log).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(button_frame, text="Write log file", variable=self.log_to_file_var,
+            command=self.toggle_log_file).pack(side=tk.LEFT, padx=5)
+
+        # The job queue takes new work while a run is going
+        queue_frame = ttk.Frame(main_frame)
+        queue_frame.grid(row=19, column=0, columnspan=3, pady=(0, 10))
+        ttk.Button(queue_frame, text="Add to Queue", command=self.add_to_queue).pack(side=tk.LEFT, padx=5)
+        ttk.Button(queue_frame, text="Queue...", command=self.open_queue_window).pack(side=tk.LEFT, padx=5)
 
         # Configure grid weights for main frame
-        main_frame.rowconfigure(14, weight=1)
+        main_frame.rowconfigure(17, weight=1)
 
         # Initialize UI state
         self.toggle_output_options()
         self.toggle_mode()
 
-    def get_youtube_title(self, url):
-        """Fetch the YouTube video title, sanitized for filesystem use."""
-        try:
-            # Try to import yt-dlp first
-            try:
-                from yt_dlp import YoutubeDL
-                ydl_opts = {'quiet': True, 'no_warnings': True}
-                with YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-                    title = info.get('title')
-                    if title:
-                        # Remove characters not allowed in filenames
-                        title = re.sub(r'[\\/*?:"<>|]', "_", title)
-                        # Limit length to avoid filesystem issues
-                        if len(title) > 200:
-                            title = title[:200]
-                        return title
-            except ImportError:
-                self.log_message("yt-dlp not found, trying youtube-dl...")
-                # Fallback to youtube-dl if yt-dlp is not available
-                import youtube_dl
-                ydl_opts = {'quiet': True, 'no_warnings': True}
-                with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-                    title = info.get('title')
-                    if title:
-                        title = re.sub(r'[\\/*?:"<>|]', "_", title)
-                        if len(title) > 200:
-                            title = title[:200]
-                        return title
-        except Exception as e:
-            self.log_message(f"Could not fetch YouTube title: {e}")
-        return None
-
-    def canonicalize_playlist_url(self, url):
-        """Convert any YouTube playlist URL to canonical format"""
-        try:
-            # Extract playlist ID from various URL formats
-            import re
-            match = re.search(r'list=([a-zA-Z0-9_-]+)', url)
-            if match:
-                playlist_id = match.group(1)
-                return f"https://www.youtube.com/playlist?list={playlist_id}"
-            else:
-                return url  # Return original if no playlist ID found
-        except Exception as e:
-            self.log_message(f"Error canonicalizing playlist URL: {e}")
-            return url
-
     def toggle_mode(self):
         """Show/hide frames based on selected mode"""
         mode = self.mode_var.get()
-        if mode == "batch":
-            self.batch_frame.grid()
-            self.single_frame.grid_remove()
-            self.playlist_frame.grid_remove()
-        elif mode == "single":
-            self.batch_frame.grid_remove()
-            self.single_frame.grid()
-            self.playlist_frame.grid_remove()
-        elif mode == "playlist":
-            self.batch_frame.grid_remove()
-            self.single_frame.grid_remove()
-            self.playlist_frame.grid()
+        frames = {
+            "batch": self.batch_frame,
+            "single": self.single_frame,
+            "playlist": self.playlist_frame,
+            "watch": self.watch_frame,
+        }
+        for frame_mode, frame in frames.items():
+            if frame_mode == mode:
+                frame.grid()
+            else:
+                frame.grid_remove()
 
     def toggle_output_options(self):
         """Enable/disable output folder selection based on radio button"""
@@ -251,6 +390,12 @@ class EnhancedTranscribeGUI:
             self.output_folder_path.set(folder)
             self.log_message(f"Output folder selected: {folder}")
 
+    def select_scratch_folder(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            self.scratch_dir_var.set(folder)
+            self.log_message(f"Scratch folder selected: {folder} (same volume as the outputs avoids copying)")
+
     def scan_files(self):
         """Scan the selected folder for supported media files"""
         if not self.folder_path.get():
@@ -261,522 +406,475 @@ class EnhancedTranscribeGUI:
             self.log_message("ERROR: Selected folder does not exist!")
             return
 
-        files = []
-        for file_path in folder.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in self.supported_formats:
-                files.append(file_path)
-
-        if files:
-            self.log_message(f"Found {len(files)} supported media files:")
-            for file_path in files[:10]:  # Show first 10 files
-                self.log_message(f" - {file_path.name}")
-            if len(files) > 10:
-                self.log_message(f" ... and {len(files) - 10} more files")
+        # Build a fresh index; the run reuses it instead of walking the folder again
+        self.media_index = MediaIndex(folder, self.supported_formats, self.recursive_var.get())
+        threading.Thread(target=self.preview_media_index, args=(self.media_index,), daemon=True).start()
+
+    def preview_media_index(self, index):
+        """Complete the index in the background and log a summary of what was found"""
+        found = 0
+        for entry in index:
+            if found < 10:  # Show first 10 files
+                self.log_message(f" - {Path(entry.relative_dir, entry.path.name)}")
+            found += 1
+
+        if found:
+            self.log_message(f"Found {found} supported media files")
         else:
             self.log_message("No supported media files found in the selected folder.")
             self.log_message(f"Supported formats: {', '.join(sorted(self.supported_formats))}")
 
     def log_message(self, message):
-        """Add message to log with timestamp"""
-        import datetime
+        """Add message to log with timestamp (safe to call from any thread)"""
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
+        self.ui_events.put(("log", f"[{timestamp}] {message}\n"))
+        if self.file_logger.handlers:
+            self.file_logger.info(message)
+
+    def post_ui(self, callback):
+        """Run callback on the Tk thread at the next event drain"""
+        self.ui_events.put(("call", callback))
+
+    def set_progress(self, value):
+        self.post_ui(lambda: self.progress_var.set(value))
+
+    def set_status(self, text):
+        self.post_ui(lambda: self.status_var.set(text))
+
+    def process_ui_events(self):
+        """Drain worker events in one batch and reschedule; runs on the Tk thread"""
+        lines = []
+        try:
+            for _ in range(MAX_UI_EVENTS_PER_TICK):
+                kind, payload = self.ui_events.get_nowait()
+                if kind == "log":
+                    lines.append(payload)
+                    continue
+                if lines:
+                    self.append_log_lines(lines)
+                    lines = []
+                payload()
+        except queue.Empty:
+            pass
+        finally:
+            if lines:
+                self.append_log_lines(lines)
+            self.root.after(UI_POLL_MS, self.process_ui_events)
+
+    def append_log_lines(self, lines):
+        """Insert a batch of log lines, dropping the oldest beyond MAX_LOG_LINES"""
+        self.log_text.insert(tk.END, "".join(lines))
+        line_count = int(self.log_text.index("end-1c").split(".")[0])
+        if line_count > MAX_LOG_LINES:
+            self.log_text.delete("1.0", f"{line_count - MAX_LOG_LINES + 1}.0")
         self.log_text.see(tk.END)
-        self.root.update_idletasks()
+
+    def toggle_log_file(self):
+        """Start or stop mirroring the log to a rotating file in the app data folder"""
+        for handler in list(self.file_logger.handlers):
+            self.file_logger.removeHandler(handler)
+            handler.close()
+        if self.log_to_file_var.get():
+            log_dir = APP_DATA_DIR / "logs"
+            log_dir.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                log_dir / "transcribe_gui.log", maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.file_logger.addHandler(handler)
+            self.log_message(f"Writing log file to {log_dir}")
+
+    def finish_processing(self):
+        """Common end of every run: once its thread has exited, re-enable the controls or go on with the queue"""
+        def reset_buttons():
+            if self.run_thread is not None and self.run_thread.is_alive():
+                self.root.after(UI_POLL_MS, reset_buttons)  # run_engine is still returning
+                return
+            self.start_button.config(state="normal")
+            self.stop_button.config(state="disabled")
+            if not self.stopped_by_user and self.has_queued_items():
+                self.launch_run("queue", self.engine.run_queue, (None, True))
+
+        self.post_ui(reset_buttons)
+
+    def has_queued_items(self):
+        """True when the job queue was used in this session and still has items waiting"""
+        job_queue = self.engine.job_queue  # Not opened when the queue was never used
+        return job_queue is not None and any(item.state == QUEUED for item in job_queue.items())
+
+    def show_run_summary(self, metrics):
+        """Fill the summary panel with the stage timings of a finished run"""
+        self.summary_tree.delete(*self.summary_tree.get_children())
+        for row in metrics.summary():
+            values = (row["jobs"] or "", f"{row['seconds']:.2f}",
+                      "" if row["mean_s"] is None else f"{row['mean_s']:.2f}",
+                      f"{row['bytes'] / 1e6:.1f}" if row["bytes"] else "",
+                      "" if row["rtf"] is None else f"{row['rtf']:.3f}")
+            self.summary_tree.insert("", tk.END, text=row["stage"], values=values)
+
+    def open_search_window(self):
+        """Open the panel searching the transcript index while the query is typed"""
+        window = tk.Toplevel(self.root)
+        window.title("Search Transcripts")
+        window.geometry("800x450")
+        window.columnconfigure(0, weight=1)
+        window.rowconfigure(1, weight=1)
+
+        query_var = tk.StringVar()
+        result_var = tk.StringVar(value='Words must appear in one cue; "quoted words" for a phrase, word* for a prefix')
+        entry = ttk.Entry(window, textvariable=query_var)
+        entry.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=10, pady=10)
+        entry.focus_set()
+
+        tree = ttk.Treeview(window, columns=("time", "snippet"), show="tree headings")
+        tree.heading("#0", text="Transcript")
+        tree.heading("time", text="Time")
+        tree.heading("snippet", text="Text")
+        tree.column("#0", width=220)
+        tree.column("time", width=70, stretch=False)
+        tree.column("snippet", width=480)
+        tree.grid(row=1, column=0, sticky=(tk.N, tk.S, tk.W, tk.E), padx=10)
+        scrollbar = ttk.Scrollbar(window, orient=tk.VERTICAL, command=tree.yview)
+        scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        tree.configure(yscrollcommand=scrollbar.set)
+        ttk.Label(window, textvariable=result_var).grid(row=2, column=0, sticky=tk.W, padx=10, pady=5)
+
+        hits = {}
+        pending = [None]
+
+        def search():
+            pending[0] = None
+            started = time.perf_counter()
+            try:
+                found = self.engine.get_transcript_index().search(query_var.get())
+            except Exception as e:
+                result_var.set(f"Search failed: {e}")
+                return
+            tree.delete(*tree.get_children())
+            hits.clear()
+            for hit in found:
+                hits[tree.insert("", tk.END, text=hit.path.name, values=(hit.timestamp, hit.snippet))] = hit
+            if query_var.get().strip():
+                result_var.set(f"{len(found)} hit(s) in {(time.perf_counter() - started) * 1000:.0f} ms"
+                               " - double-click opens the transcript (videos at the cue)")
+
+        def schedule_search(*_):
+            # Search once typing pauses instead of on every key
+            if pending[0] is not None:
+                window.after_cancel(pending[0])
+            pending[0] = window.after(200, search)
+
+        def open_hit(event):
+            hit = hits.get(tree.focus())
+            if hit is None:
+                return
+            link = hit.link()
+            if link.startswith("http"):
+                webbrowser.open(link)
+            elif hasattr(os, "startfile"):
+                os.startfile(link)
+            else:
+                webbrowser.open(Path(link).as_uri())
+
+        query_var.trace_add("write", schedule_search)
+        tree.bind("<Double-1>", open_hit)
+
+    def add_to_queue(self):
+        """Queue the folder, file, URL or playlists of the current mode.
+
+        The queue is started when idle; a batch, watch or playlist run in
+        progress takes the items up on its workers, other runs leave them for
+        the queue run that follows.
+        """
+        mode = self.mode_var.get()
+        if mode == "batch":
+            if not self.folder_path.get() or not Path(self.folder_path.get()).is_dir():
+                messagebox.showerror("Error", "Please select an existing input folder first!")
+                return
+            items = [(FOLDER, str(Path(self.folder_path.get()).resolve()))]
+        elif mode == "single":
+            if self.youtube_url.get():
+                if not validate_youtube_url(self.youtube_url.get()):
+                    messagebox.showerror("Error", "Invalid YouTube URL! Please provide a valid YouTube URL.")
+                    return
+                items = [(URL, self.youtube_url.get())]
+            elif self.file_path.get() and Path(self.file_path.get()).is_file():
+                items = [(FILE, str(Path(self.file_path.get()).resolve()))]
+            else:
+                messagebox.showerror("Error", "Please provide either a file or a YouTube URL!")
+                return
+        elif mode == "playlist":
+            playlist_urls = split_urls(self.playlist_url.get())
+            invalid = [url for url in playlist_urls if not validate_youtube_url(url)]
+            if not playlist_urls or invalid:
+                messagebox.showerror("Error", "Please provide valid YouTube playlist or channel URLs, separated by spaces.")
+                return
+            items = [(PLAYLIST, url) for url in playlist_urls]
+        else:
+            messagebox.showerror("Error", "A watched folder cannot be queued; queue it in batch mode instead.")
+            return
+
+        job_queue = self.engine.get_job_queue()
+        for kind, target in items:
+            self.log_message(f"Queued item {job_queue.add(kind, target)}: {kind} {target}")
+        if self.run_thread is None or not self.run_thread.is_alive():
+            self.launch_run("queue", self.engine.run_queue, (None, True))
+        elif not self.engine.take_queue_items() and self.engine.run_kind != "queue":
+            self.log_message("The queue will be run once the current run finishes")
+
+    def open_queue_window(self):
+        """Open the panel showing the job queue, with controls to reorder, pause and cancel items"""
+        window = tk.Toplevel(self.root)
+        window.title("Job Queue")
+        window.geometry("760x360")
+        window.columnconfigure(0, weight=1)
+        window.rowconfigure(0, weight=1)
+        job_queue = self.engine.get_job_queue()
+        show_finished = tk.BooleanVar(value=False)
+
+        tree = ttk.Treeview(window, columns=("state", "priority", "kind", "summary"), show="tree headings")
+        tree.heading("#0", text="Folder, file or URL")
+        tree.column("#0", width=360)
+        for column, heading, width in [("state", "State", 80), ("priority", "Priority", 60), ("kind", "Kind", 70),
+                                       ("summary", "Result", 150)]:
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, stretch=column == "summary")
+        tree.grid(row=0, column=0, sticky=(tk.N, tk.S, tk.W, tk.E), padx=10, pady=(10, 5))
+        scrollbar = ttk.Scrollbar(window, orient=tk.VERTICAL, command=tree.yview)
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S), pady=(10, 5))
+        tree.configure(yscrollcommand=scrollbar.set)
+
+        def refresh():
+            if not window.winfo_exists():
+                return
+            selected = tree.selection()
+            tree.delete(*tree.get_children())
+            for item in job_queue.items(finished=show_finished.get()):
+                tree.insert("", tk.END, iid=str(item.id), text=item.target,
+                            values=(item.state, item.priority, item.kind, item.summary or ""))
+            tree.selection_set([iid for iid in selected if tree.exists(iid)])
+            window.after(1000, refresh)  # The run changes states as it goes
+
+        def on_selected(action):
+            def apply():
+                for iid in tree.selection():
+                    action(int(iid))
+            return apply
+
+        button_frame = ttk.Frame(window)
+        button_frame.grid(row=1, column=0, columnspan=2, sticky=tk.W, padx=10, pady=(0, 10))
+        for text, command in [("Up", on_selected(lambda item_id: job_queue.move(item_id, -1))),
+                              ("Down", on_selected(lambda item_id: job_queue.move(item_id, 1))),
+                              ("Pause", on_selected(job_queue.pause)),
+                              ("Resume", on_selected(job_queue.resume)),
+                              ("Cancel", on_selected(job_queue.cancel)),
+                              ("Clear Finished", job_queue.clear_finished)]:
+            ttk.Button(button_frame, text=text, command=command).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Checkbutton(button_frame, text="Show finished", variable=show_finished).pack(side=tk.LEFT, padx=5)
+        refresh()
+
+    def export_run_metrics(self):
+        """Save the last run's per-job stage timings as CSV or JSON"""
+        metrics = self.engine.metrics
+        if not metrics.jobs and not metrics.run_stages:
+            messagebox.showinfo("Export", "No run metrics to export yet.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            if path.lower().endswith(".json"):
+                metrics.export_json(path)
+            else:
+                metrics.export_csv(path)
+            self.log_message(f"Run metrics exported to {path}")
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not export run metrics: {e}")
 
     def clear_log(self):
         self.log_text.delete(1.0, tk.END)
 
-    def validate_youtube_url(self, url):
-        """Validate if the given URL is a YouTube URL (video or playlist)"""
-        youtube_patterns = [
-            "youtube.com/watch",
-            "youtu.be/",
-            "youtube.com/embed/",
-            "youtube.com/v/",
-            "youtube.com/playlist",  # NEW: Added playlist support
-            "list="  # NEW: Added list parameter support
-        ]
-        return any(pattern in url.lower() for pattern in youtube_patterns)
-
-    def start_transcription(self):
-        """Start the transcription process based on selected mode"""
+    def get_int_setting(self, var, default=0):
+        """Read a non-negative integer from a Spinbox variable, falling back to default"""
+        try:
+            return max(0, int(var.get()))
+        except (tk.TclError, ValueError):
+            return default
+
+    def build_settings(self):
+        """Snapshot the widgets into engine settings (must run on the UI thread)"""
+        return EngineSettings(
+            device=self.device_var.get(),
+            model=self.model_var.get(),
+            workers=max(1, self.get_int_setting(self.worker_count_var, 1)),
+            devices=self.devices_var.get(),
+            longest_first=self.longest_first_var.get(),
+            warm_worker=self.warm_worker_var.get(),
+            max_retries=self.get_int_setting(self.max_retries_var, 2),
+            cpu_fallback=self.cpu_fallback_var.get(),
+            same_folder=self.same_folder_var.get(),
+            output_folder=self.output_folder_path.get(),
+            use_cache=self.use_cache_var.get(),
+            cache_limit_mb=self.get_int_setting(self.cache_limit_mb_var, 2048),
+            resume=self.resume_var.get(),
+            prefetch_depth=self.get_int_setting(self.prefetch_depth_var),
+            prefetch_budget_mb=self.get_int_setting(self.prefetch_budget_mb_var),
+            reuse_videos=self.reuse_videos_var.get(),
+            recursive=self.recursive_var.get(),
+            watch_existing=self.watch_existing_var.get(),
+            settle_seconds=self.get_int_setting(self.settle_seconds_var, 10),
+            extract_audio=self.extract_audio_var.get(),
+            audio_format=self.audio_format_var.get(),
+            long_file=self.long_file_var.get(),
+            chunk_minutes=self.get_int_setting(self.chunk_minutes_var, 10),
+            output_formats=tuple(output_format for output_format, var in self.format_vars.items() if var.get()),
+            scratch_dir=self.scratch_dir_var.get(),
+        )
+
+    def get_media_index(self):
+        """Return the preview's index of the batch folder, or None when it does not match"""
+        folder = Path(self.folder_path.get())
+        if self.media_index is not None and self.media_index.matches(folder, self.recursive_var.get()):
+            return self.media_index
+        return None
+
+    def setup_worker_rows(self, worker_count, device_names=None):
+        """Create one status/progress row per worker, labelled with its device if given (must run on the UI thread)"""
+        for child in self.workers_frame.winfo_children():
+            child.destroy()
+        self.worker_rows = []
+        for worker_id in range(worker_count):
+            status = tk.StringVar(value="Idle")
+            progress = tk.DoubleVar()
+            label = f"Worker {worker_id + 1}" + (f" ({device_names[worker_id]})" if device_names else "")
+            ttk.Label(self.workers_frame, text=f"{label}:").grid(row=worker_id, column=0, sticky=tk.W, padx=(0, 5))
+            ttk.Progressbar(self.workers_frame, variable=progress, maximum=100, length=120).grid(row=worker_id, column=1, padx=5)
+            ttk.Label(self.workers_frame, textvariable=status).grid(row=worker_id, column=2, sticky=tk.W, padx=5)
+            self.worker_rows.append((status, progress))
+
+    def set_worker_status(self, worker_id, status, progress=None):
+        """Update the status row of a worker (None is the only worker of a single run)"""
+        worker_id = worker_id or 0
+
+        def apply():
+            if worker_id >= len(self.worker_rows):
+                return
+            status_var, progress_var = self.worker_rows[worker_id]
+            status_var.set(status)
+            if progress is not None:
+                progress_var.set(progress)
+
+        self.post_ui(apply)
+
+    def start_transcription(self, retry_failed_only=False):
+        """Start the transcription process based on selected mode.
+
+        With retry_failed_only, batch and playlist runs only redo the items the
+        journal recorded as failed.
+        """
         mode = self.mode_var.get()
+        if retry_failed_only and mode not in ("batch", "playlist"):
+            messagebox.showerror("Error", "Retrying failed items is available for batch and playlist runs.")
+            return
 
         if mode == "batch":
             # BATCH MODE
             if not self.folder_path.get():
                 messagebox.showerror("Error", "Please select an input folder first!")
                 return
-            if not self.same_folder_var.get() and not self.output_folder_path.get():
-                messagebox.showerror("Error", "Please select an output folder!")
-                return
-
-            self.is_processing = True
-            self.start_button.config(state="disabled")
-            self.stop_button.config(state="normal")
-            thread = threading.Thread(target=self.process_files, daemon=True)
-            thread.start()
+            run, args = self.engine.run_batch, (self.folder_path.get(), self.get_media_index(), retry_failed_only)
 
         elif mode == "single":
             # SINGLE MODE
             if not self.file_path.get() and not self.youtube_url.get():
                 messagebox.showerror("Error", "Please provide either a file or a YouTube URL!")
                 return
-            if not self.same_folder_var.get() and not self.output_folder_path.get():
-                messagebox.showerror("Error", "Please select an output folder!")
-                return
-
-            self.is_processing = True
-            self.start_button.config(state="disabled")
-            self.stop_button.config(state="normal")
-
             if self.youtube_url.get():
-                if not self.validate_youtube_url(self.youtube_url.get()):
+                if not validate_youtube_url(self.youtube_url.get()):
                     messagebox.showerror("Error", "Invalid YouTube URL! Please provide a valid YouTube URL.")
-                    self.is_processing = False
-                    self.start_button.config(state="normal")
-                    self.stop_button.config(state="disabled")
                     return
-                thread = threading.Thread(target=self.process_youtube_url, daemon=True)
-                thread.start()
+                run, args = self.engine.run_url, (self.youtube_url.get(),)
             else:
-                thread = threading.Thread(target=self.process_single_file, daemon=True)
-                thread.start()
+                run, args = self.engine.run_file, (self.file_path.get(),)
 
         elif mode == "playlist":
             # PLAYLIST MODE (NEW)
-            if not self.playlist_url.get():
+            playlist_urls = split_urls(self.playlist_url.get())
+            if not playlist_urls:
                 messagebox.showerror("Error", "Please provide a YouTube playlist URL!")
                 return
-            if not self.validate_youtube_url(self.playlist_url.get()):
-                messagebox.showerror("Error", "Invalid YouTube playlist URL! Please provide a valid YouTube playlist URL.")
+            invalid = [url for url in playlist_urls if not validate_youtube_url(url)]
+            if invalid:
+                messagebox.showerror("Error", f"Invalid YouTube playlist URL: {invalid[0]}\n"
+                                     "Please provide valid YouTube playlist or channel URLs, separated by spaces.")
                 return
-            if not self.same_folder_var.get() and not self.output_folder_path.get():
-                messagebox.showerror("Error", "Please select an output folder!")
-                return
-
-            self.is_processing = True
-            self.start_button.config(state="disabled")
-            self.stop_button.config(state="normal")
-            thread = threading.Thread(target=self.process_youtube_playlist, daemon=True)
-            thread.start()
+            run, args = self.engine.run_playlist, (playlist_urls, retry_failed_only)
 
-    def process_youtube_playlist(self):  # NEW METHOD
-        """Process a YouTube playlist by transcribing each video"""
-        try:
-            from yt_dlp import YoutubeDL
-
-            # Get and canonicalize the playlist URL
-            playlist_url = self.playlist_url.get()
-            playlist_url = self.canonicalize_playlist_url(playlist_url)
-
-            self.progress_var.set(0)
-            self.status_var.set("Fetching playlist info...")
-            self.log_message(f"Fetching playlist: {playlist_url}")
-
-            # Extract all video URLs from the playlist
-            ydl_opts = {
-                'quiet': True,
-                'extract_flat': True,
-                'skip_download': True
-            }
-
-            with YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(playlist_url, download=False)
-                entries = info.get('entries', [])
-
-                # Format URLs properly
-                video_urls = []
-                for entry in entries:
-                    if entry:  # Check if entry is not None
-                        if 'url' in entry and entry['url'] and entry['url'].startswith('http'):
-                            video_urls.append(entry['url'])
-                        elif 'id' in entry and entry['id']:
-                            video_urls.append(f"https://www.youtube.com/watch?v={entry['id']}")
-                        elif 'webpage_url' in entry and entry['webpage_url']:
-                            video_urls.append(entry['webpage_url'])
-
-            total = len(video_urls)
-            if total == 0:
-                self.log_message("No videos found in the playlist.")
-                self.log_message("This could be due to:")
-                self.log_message("1. Private/unlisted videos in the playlist")
-                self.log_message("2. Invalid playlist URL")
-                self.log_message("3. Playlist access restrictions")
+        elif mode == "watch":
+            # WATCH MODE
+            if not self.folder_path.get() or not Path(self.folder_path.get()).is_dir():
+                messagebox.showerror("Error", "Please select an existing folder to watch!")
                 return
+            run, args = self.engine.run_watch, (self.folder_path.get(),)
 
-            self.log_message(f"Found {total} videos in playlist.")
-
-            successful = 0
-            failed = 0
-
-            for i, video_url in enumerate(video_urls):
-                if not self.is_processing:
-                    break
-
-                # Update progress
-                progress = (i / total) * 100
-                self.progress_var.set(progress)
-                self.status_var.set(f"Processing video {i+1}/{total}")
-
-                self.log_message(f"\n=== Processing playlist video {i+1}/{total} ===")
-
-                # Transcribe each video
-                if self.transcribe_youtube_url(video_url):
-                    successful += 1
-                    self.log_message(f"✓ Successfully transcribed: {video_url}")
-                else:
-                    failed += 1
-                    self.log_message(f"✗ Failed to transcribe: {video_url}")
-
-            # Final results
-            self.progress_var.set(100)
-            self.status_var.set("Playlist Completed")
-            self.log_message(f"\n=== PLAYLIST TRANSCRIPTION COMPLETED ===")
-            self.log_message(f"Total videos processed: {successful + failed}")
-            self.log_message(f"Successful: {successful}")
-            self.log_message(f"Failed: {failed}")
-
-        except Exception as e:
-            self.log_message(f"ERROR processing playlist: {str(e)}")
-            # Additional troubleshooting info
-            self.log_message("Troubleshooting tips:")
-            self.log_message("1. Ensure yt-dlp is installed: pip install yt-dlp")
-            self.log_message("2. Try using the canonical playlist URL format")
-            self.log_message("3. Check if the playlist is public and accessible")
-        finally:
-            self.is_processing = False
-            self.start_button.config(state="normal")
-            self.stop_button.config(state="disabled")
-
-    def stop_transcription(self):
-        """Stop the transcription process"""
-        self.is_processing = False
-        self.start_button.config(state="normal")
-        self.stop_button.config(state="disabled")
-        self.status_var.set("Stopping...")
-        self.log_message("Transcription stopped by user.")
-    def process_files(self):
-        """Process all media files in the selected folder"""
-        try:
-            folder = Path(self.folder_path.get())
-            files = [f for f in folder.iterdir()
-                   if f.is_file() and f.suffix.lower() in self.supported_formats]
-
-            if not files:
-                self.log_message("No supported files found to process.")
-                return
+        else:
+            return
 
-            total_files = len(files)
-            self.log_message(f"Starting batch transcription of {total_files} files...")
-
-            successful = 0
-            failed = 0
-
-            for i, file_path in enumerate(files):
-                if not self.is_processing:
-                    break
-
-                # Update progress
-                progress = (i / total_files) * 100
-                self.progress_var.set(progress)
-                self.status_var.set(f"Processing: {file_path.name}")
-
-                self.log_message(f"\n=== Processing file {i+1}/{total_files}: {file_path.name} ===")
-
-                try:
-                    # Transcribe the file with custom naming
-                    if self.transcribe_single_file(file_path):
-                        successful += 1
-                        self.log_message(f"✓ Successfully transcribed: {file_path.name}")
-                    else:
-                        failed += 1
-                        self.log_message(f"✗ Failed to transcribe: {file_path.name}")
-                except Exception as e:
-                    failed += 1
-                    self.log_message(f"✗ Error transcribing {file_path.name}: {str(e)}")
-
-            # Final results
-            self.progress_var.set(100)
-            self.status_var.set("Completed")
-            self.log_message(f"\n=== BATCH TRANSCRIPTION COMPLETED ===")
-            self.log_message(f"Total files processed: {successful + failed}")
-            self.log_message(f"Successful: {successful}")
-            self.log_message(f"Failed: {failed}")
-
-        except Exception as e:
-            self.log_message(f"ERROR in batch processing: {str(e)}")
-        finally:
-            self.is_processing = False
-            self.start_button.config(state="normal")
-            self.stop_button.config(state="disabled")
+        self.launch_run(mode, run, args)
 
-    def process_single_file(self):
-        """Process a single file"""
+    def launch_run(self, mode, run, args):
+        """Check the shared settings and start run(*args) on a worker thread"""
+        if self.run_thread is not None and self.run_thread.is_alive():
+            messagebox.showinfo("Busy", "The previous run is still stopping. Please try again in a moment.")
+            return
+        if not self.same_folder_var.get() and not self.output_folder_path.get():
+            messagebox.showerror("Error", "Please select an output folder!")
+            return
+        if not any(var.get() for var in self.format_vars.values()):
+            messagebox.showerror("Error", "Please select at least one output format!")
+            return
         try:
-            file_path = Path(self.file_path.get())
-            if not file_path.exists():
-                self.log_message("ERROR: Selected file does not exist!")
+            device_names = [slot.name for slot in parse_device_spec(self.devices_var.get(), DEVICES)]
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        coordinator = None
+        if self.serve_var.get().strip():
+            try:
+                host, port = parse_address(self.serve_var.get().strip(), default_host="0.0.0.0")
+                coordinator = JobCoordinator(host, port, log=self.log_message).start()
+            except (ValueError, OSError) as e:
+                messagebox.showerror("Error", f"Cannot serve worker agents on {self.serve_var.get()}: {e}")
                 return
 
-            self.progress_var.set(10)
-            self.status_var.set(f"Processing: {file_path.name}")
-            self.log_message(f"\n=== Processing file: {file_path.name} ===")
-
-            if self.transcribe_single_file(file_path):
-                self.log_message(f"✓ Successfully transcribed: {file_path.name}")
-            else:
-                self.log_message(f"✗ Failed to transcribe: {file_path.name}")
-
-            self.progress_var.set(100)
-            self.status_var.set("Completed")
-
-        except Exception as e:
-            self.log_message(f"ERROR processing file: {str(e)}")
-        finally:
-            self.is_processing = False
-            self.start_button.config(state="normal")
-            self.stop_button.config(state="disabled")
-
-    def process_youtube_url(self):
-        """Process a YouTube URL"""
+        self.engine.settings = self.build_settings()
+        self.engine.remote = coordinator
+        self.stopped_by_user = False
+        self.start_button.config(state="disabled")
+        self.stop_button.config(state="normal")
+        pooled = mode != "single" or self.long_file_var.get()  # A single whole file runs on the device above
+        self.setup_worker_rows(self.engine.planned_workers(mode), device_names if pooled else None)
+        self.run_thread = threading.Thread(target=self.run_engine, args=(run, args), daemon=True)
+        self.run_thread.start()
+
+    def run_engine(self, run, args):
+        """Worker thread: run one engine job, then restore the controls"""
         try:
-            url = self.youtube_url.get()
-            self.progress_var.set(10)
-            self.status_var.set(f"Processing YouTube URL")
-            self.log_message(f"\n=== Processing YouTube URL: {url} ===")
-
-            if self.transcribe_youtube_url(url):
-                self.log_message(f"✓ Successfully transcribed YouTube URL: {url}")
-            else:
-                self.log_message(f"✗ Failed to transcribe YouTube URL: {url}")
-
-            self.progress_var.set(100)
-            self.status_var.set("Completed")
-
-        except Exception as e:
-            self.log_message(f"ERROR processing YouTube URL: {str(e)}")
+            run(*args)
         finally:
-            self.is_processing = False
-            self.start_button.config(state="normal")
-            self.stop_button.config(state="disabled")
+            if self.engine.remote is not None:
+                self.engine.remote.close()
+                self.engine.remote = None
+            self.finish_processing()
 
-    def extract_youtube_id(self, url):
-        """Extract YouTube video ID from URL"""
-        # Common YouTube URL patterns
-        patterns = [
-            r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/|youtube\.com\/v\/)([^&\?\/]+)',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
-
-    def transcribe_single_file(self, file_path):
-        """Transcribe a single file with custom naming"""
-        try:
-            # Create temporary directory for this transcription
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-
-                # Determine output directory
-                if self.same_folder_var.get():
-                    final_output_dir = file_path.parent
-                else:
-                    final_output_dir = Path(self.output_folder_path.get())
-
-                final_output_dir.mkdir(parents=True, exist_ok=True)
-
-                # Prepare the transcribe-anything command
-                device_arg = self.device_var.get()
-
-                # Build command
-                cmd_parts = [
-                    'pushd "F:\Python scripts\Transcribe anything"',
-                    'call virtualEnv\Scripts\activate.bat',
-                    f'transcribe-anything "{file_path}" --device {device_arg} --output_dir "{temp_path}"'
-                ]
-
-                bat_content = f"""
-@echo off
-{chr(10).join(cmd_parts)}
-"""
-
-                # Create and run temporary batch file
-                temp_bat = temp_path / "transcribe_temp.bat"
-                with open(temp_bat, "w", encoding="utf-8") as f:
-                    f.write(bat_content)
-
-                self.log_message(f"Running transcription command...")
-
-                # Execute the command
-                result = subprocess.run(['cmd.exe', '/c', str(temp_bat)],
-                                     capture_output=True, text=True, timeout=1800)  # 30 minute timeout
-
-                if result.returncode != 0:
-                    self.log_message(f"Command failed with return code: {result.returncode}")
-                    if result.stderr:
-                        self.log_message(f"Error output: {result.stderr}")
-                    return False
-
-                # Move and rename output files
-                return self.move_and_rename_outputs(temp_path, file_path, final_output_dir)
-
-        except subprocess.TimeoutExpired:
-            self.log_message(f"Transcription timed out after 30 minutes")
-            return False
-        except Exception as e:
-            self.log_message(f"Error in transcribe_single_file: {str(e)}")
-            return False
-
-    def transcribe_youtube_url(self, url):
-        """Transcribe a YouTube URL using video title for naming"""
-        try:
-            # Create temporary directory for this transcription
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-
-                # Determine output directory
-                if not self.same_folder_var.get():
-                    final_output_dir = Path(self.output_folder_path.get())
-                else:
-                    # For YouTube URLs with "same folder", create a subfolder in user's documents
-                    documents_dir = Path.home() / "Documents" / "Transcribe Anything"
-                    final_output_dir = documents_dir
-
-                final_output_dir.mkdir(parents=True, exist_ok=True)
-
-                # Try to get the YouTube video title first
-                self.log_message("Attempting to fetch YouTube video title...")
-                title = self.get_youtube_title(url)
-
-                if title:
-                    base_name = title
-                    self.log_message(f"Using video title: {title}")
-                else:
-                    # Fallback to video ID
-                    video_id = self.extract_youtube_id(url)
-                    base_name = video_id if video_id else "youtube_video"
-                    self.log_message(f"Title not available, using video ID: {base_name}")
-
-                # Create a file path object for naming purpose
-                dummy_file_path = Path(f"{base_name}.mp4")
-
-                # Prepare the transcribe-anything command
-                device_arg = self.device_var.get()
-
-                # Build command
-                cmd_parts = [
-                    'pushd "F:\Python scripts\Transcribe anything"',
-                    'call virtualEnv\Scripts\activate.bat',
-                    f'transcribe-anything "{url}" --device {device_arg} --output_dir "{temp_path}"'
-                ]
-
-                bat_content = f"""
-@echo off
-{chr(10).join(cmd_parts)}
-"""
-
-                # Create and run temporary batch file
-                temp_bat = temp_path / "transcribe_temp.bat"
-                with open(temp_bat, "w", encoding="utf-8") as f:
-                    f.write(bat_content)
-
-                self.log_message(f"Running transcription command for YouTube URL...")
-
-                # Execute the command
-                result = subprocess.run(['cmd.exe', '/c', str(temp_bat)],
-                                     capture_output=True, text=True, timeout=1800)  # 30 minute timeout
-
-                if result.returncode != 0:
-                    self.log_message(f"Command failed with return code: {result.returncode}")
-                    if result.stderr:
-                        self.log_message(f"Error output: {result.stderr}")
-                    return False
-
-                # Move and rename output files
-                return self.move_and_rename_outputs(temp_path, dummy_file_path, final_output_dir)
-
-        except subprocess.TimeoutExpired:
-            self.log_message(f"Transcription timed out after 30 minutes")
-            return False
-        except Exception as e:
-            self.log_message(f"Error in transcribe_youtube_url: {str(e)}")
-            return False
-
-    def move_and_rename_outputs(self, temp_dir, original_file, output_dir):
-        """Move and rename output files from temp directory to final location"""
-        try:
-            temp_path = Path(temp_dir)
-            base_name = original_file.stem  # filename without extension
-
-            # Expected output file extensions from transcribe-anything
-            output_extensions = ['.txt', '.srt', '.vtt', '.json', '.tsv']
-
-            # Extensions to delete after processing
-            extensions_to_delete = ['.json', '.vtt', '.tsv']
-
-            moved_files = 0
-
-            # Look for output files in temp directory
-            for temp_file in temp_path.iterdir():
-                if temp_file.is_file():
-                    # Check if it's one of the expected output files
-                    if temp_file.name.startswith('out.') or temp_file.suffix in output_extensions:
-                        # Determine the new filename
-                        if temp_file.name.startswith('out.'):
-                            # Replace 'out.' with the original filename
-                            new_name = temp_file.name.replace('out.', f'{base_name}.')
-                        else:
-                            # For other files, use base name + extension
-                            new_name = f"{base_name}{temp_file.suffix}"
-
-                        final_path = output_dir / new_name
-
-                        try:
-                            # Copy the file to final location
-                            shutil.copy2(temp_file, final_path)
-                            self.log_message(f" → Created: {new_name}")
-                            moved_files += 1
-                        except Exception as e:
-                            self.log_message(f" ✗ Failed to copy {temp_file.name}: {str(e)}")
-
-            # Auto-delete unwanted extensions after all files are moved
-            if moved_files > 0:
-                self.log_message(f" Successfully created {moved_files} output files")
-                self.delete_unwanted_extensions(output_dir, base_name, extensions_to_delete)
-                return True
-            else:
-                self.log_message(f" No output files found in temp directory")
-                return False
-
-        except Exception as e:
-            self.log_message(f"Error moving output files: {str(e)}")
-            return False
-
-    def delete_unwanted_extensions(self, output_dir, base_name, extensions_to_delete):
-        """Delete files with unwanted extensions from the output directory"""
-        try:
-            deleted_files = 0
-            for ext in extensions_to_delete:
-                file_to_delete = output_dir / f"{base_name}{ext}"
-                if file_to_delete.exists():
-                    try:
-                        file_to_delete.unlink()  # Delete the file
-                        self.log_message(f" 🗑️ Deleted: {file_to_delete.name}")
-                        deleted_files += 1
-                    except Exception as e:
-                        self.log_message(f" ✗ Failed to delete {file_to_delete.name}: {str(e)}")
-
-            if deleted_files > 0:
-                self.log_message(f" Cleaned up {deleted_files} unwanted files")
-            else:
-                self.log_message(f" No unwanted files to delete")
+    def stop_transcription(self):
+        """Stop the transcription process, killing the transcriptions in progress"""
+        self.engine.stop(cancel=True)
+        self.stopped_by_user = True
+        self.stop_button.config(state="disabled")  # Start comes back once the run thread has exited
+        self.set_status("Stopping...")
+        self.log_message("Transcription stopped by user; the items in progress are cancelled.")
 
-        except Exception as e:
-            self.log_message(f"Error during cleanup: {str(e)}")
 
 def main():
     root = tk.Tk()
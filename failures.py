@@ -0,0 +1,46 @@
+"""Telling transient failures from permanent ones, and how long to wait before a retry.
+
+A transient failure (network trouble during a download, the GPU running out
+of memory while another worker holds it) may well succeed on a second try; a
+permanent one (private video, unreadable file) never will, so it is not retried.
+"""
+import random
+import re
+
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+OUT_OF_MEMORY = "out of memory"
+
+# Checked first: these cannot be fixed by trying again
+PERMANENT_PATTERN = re.compile(
+    r"Video unavailable|Private video|members-only|Sign in to confirm|HTTP Error 40[134]|"
+    r"Unsupported URL|No such file|does not exist|Invalid data found|Invalid argument", re.IGNORECASE)
+OUT_OF_MEMORY_PATTERN = re.compile(
+    r"out of memory|OutOfMemoryError|CUBLAS_STATUS_ALLOC_FAILED|CUDNN_STATUS_ALLOC_FAILED", re.IGNORECASE)
+TRANSIENT_PATTERN = re.compile(
+    r"HTTP Error (?:429|5\d\d)|timed out|Connection (?:reset|refused|aborted)|Remote end closed|"
+    r"IncompleteRead|Temporary failure in name resolution|Name or service not known|getaddrinfo failed|"
+    r"Network is unreachable|ConnectionError|SSL: |Unable to download", re.IGNORECASE)
+
+
+def classify_failure(output):
+    """Classify a failure from its error message or output lines.
+
+    Returns TRANSIENT, OUT_OF_MEMORY or PERMANENT; failures nothing is known
+    about count as permanent so they are not retried blindly.
+    """
+    if PERMANENT_PATTERN.search(output):
+        return PERMANENT
+    if OUT_OF_MEMORY_PATTERN.search(output):
+        return OUT_OF_MEMORY
+    if TRANSIENT_PATTERN.search(output):
+        return TRANSIENT
+    return PERMANENT
+
+
+def backoff_delay(attempt, base, cap=300):
+    """Seconds to wait before retry number attempt (1, 2, ...): exponential with some jitter.
+
+    The jitter keeps parallel workers that failed together from retrying in lockstep.
+    """
+    return min(cap, base * 2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
@@ -0,0 +1,119 @@
+"""Watch a folder for new or changed media files.
+
+Uses watchdog (inotify on Linux, ReadDirectoryChangesW on Windows) when it is
+installed and falls back to polling with os.scandir otherwise. A file is only
+reported once its size and modification time have stopped changing for
+settle_seconds, so recordings still being copied are not picked up half-written.
+Partial downloads (".part", ".crdownload") are left out by their extension,
+hidden and temporary names (".name.mp4.XXXX" of rsync, "._name.mp4" of macOS,
+"~name.mp4") by their first character.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+
+from media_index import MediaEntry, scan_media
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Optional dependency
+    Observer = None
+    FileSystemEventHandler = object
+
+# First characters of the names of hidden and temporary files, which are never reported
+IGNORED_PREFIXES = (".", "~")
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        # Moves report the new name in dest_path
+        self.watcher.notify(getattr(event, "dest_path", None) or event.src_path)
+
+
+class FolderWatcher:
+    """Reports media files under root that appear or change while watching"""
+
+    def __init__(self, root, extensions, recursive=False, settle_seconds=5.0, poll_interval=2.0):
+        self.root = Path(root)
+        self.extensions = extensions
+        self.recursive = recursive
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.known = {}  # path -> (size, mtime) already reported
+        self.pending = {}  # path -> (size, mtime, unchanged since)
+        self.lock = threading.Lock()
+        self.uses_events = Observer is not None
+
+    def snapshot_existing(self):
+        """Treat the files currently in the folder as already handled"""
+        for entry in scan_media(self.root, self.extensions, self.recursive):
+            self.known[entry.path] = (entry.size, entry.mtime)
+
+    def notify(self, path):
+        """Mark a path as possibly changed (called by the event handler)"""
+        path = Path(path)
+        if path.suffix.lower() not in self.extensions or path.name.startswith(IGNORED_PREFIXES):
+            return
+        if not self.recursive and path.parent != self.root:
+            return
+        with self.lock:
+            self.pending.setdefault(path, (-1, -1, 0.0))
+
+    def _poll(self):
+        """Fallback change detection: compare a fresh listing against what was reported"""
+        for entry in scan_media(self.root, self.extensions, self.recursive):
+            if self.known.get(entry.path) != (entry.size, entry.mtime):
+                self.notify(entry.path)
+
+    def _collect_ready(self, now):
+        ready = []
+        with self.lock:
+            for path, (size, mtime, since) in list(self.pending.items()):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    del self.pending[path]  # Deleted or renamed away
+                    continue
+                current = (stat.st_size, stat.st_mtime)
+                if current != (size, mtime):
+                    self.pending[path] = (*current, now)  # Still being written
+                    continue
+                if now - since < self.settle_seconds:
+                    continue
+                del self.pending[path]
+                if self.known.get(path) == current:
+                    continue  # Touched but not changed
+                self.known[path] = current
+                relative_dir = os.path.relpath(path.parent, self.root)
+                ready.append(MediaEntry(path, stat.st_size, stat.st_mtime, path.suffix.lower(),
+                                        "" if relative_dir == "." else relative_dir))
+        return ready
+
+    def run(self, on_ready, should_continue):
+        """Call on_ready(MediaEntry) for every settled new/changed file until should_continue() is False"""
+        observer = None
+        if self.uses_events:
+            observer = Observer()
+            observer.schedule(_ChangeHandler(self), str(self.root), recursive=self.recursive)
+            observer.start()
+        # Files already there produce no event; one listing picks them up (unless snapshot_existing ran)
+        self._poll()
+        try:
+            while should_continue():
+                if observer is None:
+                    self._poll()
+                for entry in self._collect_ready(time.monotonic()):
+                    on_ready(entry)
+                time.sleep(self.poll_interval)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
@@ -0,0 +1,326 @@
+"""Hand transcriptions to worker agents on other machines over HTTP.
+
+A JobCoordinator sits behind TranscribeEngine.run_transcriber: instead of
+running the transcriber locally, each transcription becomes a job in a queue
+that worker agents (worker_agent.py) lease over a small JSON protocol. All
+the rest of a run (listing, journal, cache, naming and moving the outputs)
+stays on the coordinator.
+
+    POST /lease                 {"node", "wait"} -> {"job": {id, lease, url or media, ...}} or {"job": null}
+    GET  /jobs/<id>/media       ?lease=<lease_id>, the media file of a local source
+    POST /jobs/<id>/heartbeat   {"lease", "status"} -> {"ok"}; false when the lease was lost
+    POST /jobs/<id>/result      {"lease", "ok", "error", "outputs": {file name: text}} -> {"ok"}
+
+A lease lasts lease_seconds and is renewed by every heartbeat. Jobs of an
+agent that stops sending heartbeats go back to the front of the queue, and
+fail after max_attempts leases.
+"""
+import collections
+import ipaddress
+import itertools
+import json
+import secrets
+import shutil
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from output_finalizer import write_file
+
+DEFAULT_PORT = 8765
+TOKEN_HEADER = "X-Job-Token"
+# Longest time a lease request waits for a job before answering "no job"
+MAX_LEASE_WAIT = 30
+
+
+def is_loopback(host):
+    """True when host only accepts connections from this machine"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False  # A host name, or "" for every interface
+
+
+def parse_address(address, default_host="127.0.0.1"):
+    """Split "host:port", ":port" or "port" into (host, port); raises ValueError"""
+    host, _, port = address.rpartition(":")
+    return host or default_host, int(port)
+
+
+class RemoteJob:
+    """One transcription waiting for, or leased by, a worker agent"""
+
+    def __init__(self, job_id, source, duration=None):
+        self.id = job_id
+        self.source = str(source)
+        self.duration = duration
+        self.is_url = not Path(self.source).is_file()
+        self.lease = None
+        self.node = None
+        self.expires = 0.0
+        self.attempts = 0
+        self.status = None  # Last progress the agent reported
+        self.finished = threading.Event()
+        self.ok = False
+        self.error = None
+        self.outputs = {}
+
+    def describe(self, lease_seconds):
+        """The job as sent to an agent"""
+        job = {"id": self.id, "lease": self.lease, "lease_seconds": lease_seconds, "duration": self.duration,
+               "attempt": self.attempts}
+        if self.is_url:
+            job["url"] = self.source
+        else:
+            job["media"] = Path(self.source).name
+        return job
+
+
+class JobCoordinator:
+    """Queue of transcription jobs served to worker agents; start() before use, close() after.
+
+    transcribe() may be called from any number of threads; each call blocks
+    until an agent delivered the job's outputs. The agents must send token in
+    the X-Job-Token header; it may only be left empty on a loopback host,
+    elsewhere one is generated (and logged by start()).
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, lease_seconds=60, max_attempts=3, token="", log=None):
+        self.address = (host, port)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.token = token
+        self.generated_token = not token and not is_loopback(host)
+        if self.generated_token:
+            self.token = secrets.token_urlsafe(16)
+        self.log = log or (lambda message: None)
+        self.pending = collections.deque()
+        self.jobs = {}  # id -> RemoteJob, pending or leased
+        self.cond = threading.Condition()
+        self.ids = itertools.count(1)
+        self.server = None
+        self.closed = False
+
+    def start(self):
+        handler = type("Handler", (JobRequestHandler,), {"coordinator": self})
+        self.server = ThreadingHTTPServer(self.address, handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._reap_leases, daemon=True).start()
+        host, port = self.server.server_address[:2]
+        self.log(f"Serving jobs to worker agents on http://{host}:{port}")
+        if self.generated_token:
+            self.log(f"No token given, so the agents must pass --token {self.token}")
+        return self
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def close(self):
+        self.closed = True
+        with self.cond:
+            for job in self.jobs.values():
+                job.error = "coordinator closed"
+                job.finished.set()
+            self.jobs.clear()
+            self.pending.clear()
+            self.cond.notify_all()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def transcribe(self, source, temp_path, duration=None, is_running=None, on_status=None):
+        """Have an agent transcribe source (file or URL) and write its outputs into temp_path.
+
+        Returns (ok, error). on_status(node, status) receives the agent's
+        progress; when is_running() turns false the job is withdrawn.
+        """
+        is_running = is_running or (lambda: True)
+        job = RemoteJob(str(next(self.ids)), source, duration)
+        with self.cond:
+            self.jobs[job.id] = job
+            self.pending.append(job)
+            self.cond.notify_all()
+
+        reported = None
+        while not job.finished.wait(0.5):
+            if not is_running() or self.closed:
+                self._withdraw(job)
+                return False, "stopped"
+            status = (job.node, job.status)
+            if on_status and job.node and status != reported:
+                reported = status
+                on_status(*status)
+        if job.ok:
+            for name, text in job.outputs.items():
+                write_file(Path(temp_path) / Path(name).name, text)
+        return job.ok, job.error
+
+    def _withdraw(self, job):
+        with self.cond:
+            self.jobs.pop(job.id, None)
+            if job in self.pending:
+                self.pending.remove(job)
+
+    def lease(self, node, wait=0):
+        """Lease the next job to node, waiting up to wait seconds for one; None when there is none"""
+        deadline = time.monotonic() + min(wait, MAX_LEASE_WAIT)
+        with self.cond:
+            while not self.pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.closed:
+                    return None
+                self.cond.wait(remaining)
+            job = self.pending.popleft()
+            job.lease = uuid.uuid4().hex
+            job.node = node
+            job.attempts += 1
+            job.status = "Leased"
+            job.expires = time.monotonic() + self.lease_seconds
+        self.log(f"Job {job.id} leased to {node}" + (f" (attempt {job.attempts})" if job.attempts > 1 else ""))
+        return job
+
+    def leased_job(self, job_id, lease):
+        """Return the job if lease is its current lease, else None"""
+        with self.cond:
+            job = self.jobs.get(job_id)
+            return job if job is not None and lease and job.lease == lease else None
+
+    def heartbeat(self, job_id, lease, status=None):
+        """Renew a lease; False when it expired and the job went back to the queue"""
+        with self.cond:
+            job = self.jobs.get(job_id)
+            if job is None or job.lease != lease:
+                return False
+            job.expires = time.monotonic() + self.lease_seconds
+            if status:
+                job.status = status
+            return True
+
+    def complete(self, job_id, lease, ok, error=None, outputs=None):
+        """Record an agent's result; False when it is not taken (unknown job, or failure of a lost lease).
+
+        A result that arrives after its lease expired is still taken as long
+        as nobody else finished the job, so slow agents do not waste their work.
+        """
+        with self.cond:
+            job = self.jobs.get(job_id)
+            if job is None or not job.attempts:
+                return False
+            if job.lease != lease and not ok:
+                return False  # A late failure does not override the job's new lease
+            self.jobs.pop(job_id)
+            if job in self.pending:
+                self.pending.remove(job)
+        job.ok = bool(ok)
+        job.error = error
+        job.outputs = outputs or {}
+        job.finished.set()
+        return True
+
+    def _reap_leases(self):
+        """Put the jobs of agents that stopped sending heartbeats back in the queue"""
+        while not self.closed:
+            time.sleep(min(5, self.lease_seconds / 4))
+            now = time.monotonic()
+            expired = []
+            with self.cond:
+                for job in self.jobs.values():
+                    if job.lease and job.expires < now:
+                        expired.append(job)
+                for job in expired:
+                    if job.attempts >= self.max_attempts:
+                        self.jobs.pop(job.id)
+                    else:
+                        job.lease = None  # Heartbeats of the old lease are refused from now on
+                        job.status = None
+                        self.pending.appendleft(job)
+                if expired:
+                    self.cond.notify_all()
+            for job in expired:
+                if job.attempts >= self.max_attempts:
+                    job.error = f"lost {job.attempts} leases (last held by {job.node})"
+                    job.finished.set()
+                    self.log(f"Job {job.id} failed: no heartbeat from {job.node}, {job.attempts} attempts used")
+                else:
+                    self.log(f"Job {job.id}: no heartbeat from {job.node}, queued again")
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """HTTP side of a JobCoordinator (set as the coordinator class attribute)"""
+
+    coordinator = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # The coordinator logs what matters
+
+    def send_json(self, data, code=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def authorized(self):
+        if self.coordinator.token and self.headers.get(TOKEN_HEADER) != self.coordinator.token:
+            self.send_json({"error": "invalid token"}, 403)
+            return False
+        return True
+
+    def route(self):
+        """Return (job_id, action) of a /jobs/<id>/<action> path, or (None, path)"""
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        if len(parts) == 3 and parts[0] == "jobs":
+            return parts[1], parts[2]
+        return None, "/".join(parts)
+
+    def do_POST(self):
+        if not self.authorized():
+            return
+        try:
+            request = self.read_json()
+        except ValueError:
+            self.send_json({"error": "invalid JSON"}, 400)
+            return
+        coordinator = self.coordinator
+        job_id, action = self.route()
+        if job_id is None and action == "lease":
+            job = coordinator.lease(str(request.get("node") or self.client_address[0]), float(request.get("wait", 0)))
+            self.send_json({"job": job.describe(coordinator.lease_seconds) if job else None})
+        elif action == "heartbeat":
+            self.send_json({"ok": coordinator.heartbeat(job_id, request.get("lease"), request.get("status"))})
+        elif action == "result":
+            ok = coordinator.complete(job_id, request.get("lease"), request.get("ok"), request.get("error"),
+                                      request.get("outputs"))
+            self.send_json({"ok": ok}, 200 if ok else 409)
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+        job_id, action = self.route()
+        lease = parse_qs(urlsplit(self.path).query).get("lease", [None])[0]
+        job = self.coordinator.leased_job(job_id, lease) if action == "media" else None
+        if job is None or job.is_url:
+            self.send_json({"error": "no such leased job"}, 404)
+            return
+        with open(job.source, "rb") as f:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(Path(job.source).stat().st_size))
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile, 1024 * 1024)
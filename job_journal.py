@@ -0,0 +1,107 @@
+"""Persistent journal of batch, watch and playlist runs.
+
+Every item of a run is recorded with its state (pending, running, done,
+failed, cancelled), attempt count and timings in a SQLite database, so an
+interrupted run can be resumed without redoing completed items, and failed
+items can be retried on their own. It also keeps how fast each device and model has
+transcribed so far, which run ETAs are based on.
+"""
+import sqlite3
+import threading
+import time
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# Weight of the older speed samples at each new one, so the realtime factor
+# follows hardware and software changes
+SPEED_DECAY = 0.9
+
+
+class JobJournal:
+    """SQLite-backed record of run items; safe to share between worker threads"""
+
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(db_path), check_same_thread=False)
+        with self.db:
+            # WAL keeps the journal consistent if the process dies mid-write
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS runs (
+                run_key TEXT PRIMARY KEY, kind TEXT NOT NULL,
+                created REAL NOT NULL, updated REAL NOT NULL)""")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS items (
+                run_key TEXT NOT NULL, item_key TEXT NOT NULL, label TEXT,
+                signature TEXT, state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,
+                started REAL, finished REAL, error TEXT,
+                PRIMARY KEY (run_key, item_key))""")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS speeds (
+                device TEXT NOT NULL, model TEXT NOT NULL,
+                media_seconds REAL NOT NULL, processing_seconds REAL NOT NULL,
+                PRIMARY KEY (device, model))""")
+
+    def open_run(self, run_key, kind):
+        """Register a run (or reopen it) and reset items left running by a crash"""
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute("""INSERT INTO runs VALUES (?, ?, ?, ?)
+                ON CONFLICT(run_key) DO UPDATE SET updated = excluded.updated""",
+                            (run_key, kind, now, now))
+            interrupted = self.db.execute(
+                "UPDATE items SET state = ? WHERE run_key = ? AND state = ?",
+                (PENDING, run_key, RUNNING)).rowcount
+        return interrupted
+
+    def state(self, run_key, item_key, signature=None):
+        """Return an item's state, or None if unknown or recorded for a different signature"""
+        with self.lock:
+            row = self.db.execute("SELECT state, signature FROM items WHERE run_key = ? AND item_key = ?",
+                                  (run_key, item_key)).fetchone()
+        if row is None or (signature is not None and row[1] != signature):
+            return None
+        return row[0]
+
+    def start(self, run_key, item_key, label=None, signature=None):
+        """Mark an item running and count the attempt"""
+        with self.lock, self.db:
+            self.db.execute("""INSERT INTO items (run_key, item_key, label, signature, state, attempts, started)
+                VALUES (?, ?, ?, ?, ?, 1, ?)
+                ON CONFLICT(run_key, item_key) DO UPDATE SET
+                    label = excluded.label, signature = excluded.signature, state = excluded.state,
+                    attempts = attempts + 1, started = excluded.started, finished = NULL, error = NULL""",
+                            (run_key, item_key, label, signature, RUNNING, time.time()))
+
+    def finish(self, run_key, item_key, ok, error=None, cancelled=False):
+        """Record the outcome of an item; a cancelled one is redone by the next run"""
+        state = CANCELLED if cancelled else DONE if ok else FAILED
+        with self.lock, self.db:
+            self.db.execute("UPDATE items SET state = ?, finished = ?, error = ? WHERE run_key = ? AND item_key = ?",
+                            (state, time.time(), error, run_key, item_key))
+
+    def summary(self, run_key):
+        """Return {state: count} for a run"""
+        with self.lock:
+            rows = self.db.execute("SELECT state, COUNT(*) FROM items WHERE run_key = ? GROUP BY state",
+                                   (run_key,)).fetchall()
+        return dict(rows)
+
+    def record_speed(self, device, model, media_seconds, processing_seconds):
+        """Add a finished transcription to the realtime factor of device and model"""
+        with self.lock, self.db:
+            self.db.execute("""INSERT INTO speeds VALUES (?, ?, ?, ?)
+                ON CONFLICT(device, model) DO UPDATE SET
+                    media_seconds = media_seconds * ? + excluded.media_seconds,
+                    processing_seconds = processing_seconds * ? + excluded.processing_seconds""",
+                            (device, model, media_seconds, processing_seconds, SPEED_DECAY, SPEED_DECAY))
+
+    def realtime_factor(self, device, model):
+        """Return the processing seconds per media second seen for device and model, or None"""
+        with self.lock:
+            row = self.db.execute("SELECT media_seconds, processing_seconds FROM speeds WHERE device = ? AND model = ?",
+                                  (device, model)).fetchone()
+        if row is None or not row[0]:
+            return None
+        return row[1] / row[0]
@@ -0,0 +1,171 @@
+"""Persistent priority queue of transcription work: folders, files, URLs and playlists.
+
+TranscribeEngine.run_queue drains the queue through one worker pool and
+picks up items added while it runs, so the devices keep working from one
+item into the next. A batch, watch or playlist run in progress can take up
+the items as well (TranscribeEngine.take_queue_items). Items can be reordered, re-prioritized, paused and
+cancelled at any time, from the same process or another one sharing the
+database. A paused item that is resumed continues where it stopped, because
+the journal already records its finished files and videos.
+"""
+import sqlite3
+import threading
+import time
+
+FOLDER = "folder"
+FILE = "file"
+URL = "url"
+PLAYLIST = "playlist"
+KINDS = [FOLDER, FILE, URL, PLAYLIST]
+
+QUEUED = "queued"
+RUNNING = "running"
+PAUSED = "paused"
+CANCELLED = "cancelled"
+DONE = "done"
+FAILED = "failed"
+# States of items still to be worked on, as opposed to finished ones
+ACTIVE_STATES = (QUEUED, RUNNING, PAUSED)
+
+
+class QueueItem:
+    """One queued piece of work (kind is one of KINDS, target a path or URL)"""
+
+    FIELDS = ("id", "kind", "target", "priority", "position", "state", "added", "finished", "summary")
+
+    def __init__(self, row):
+        for field, value in zip(self.FIELDS, row):
+            setattr(self, field, value)
+
+    def __repr__(self):
+        return f"QueueItem({self.id}, {self.kind}, {self.target!r}, {self.state})"
+
+
+class JobQueue:
+    """SQLite-backed queue of QueueItems; safe to share between threads and processes.
+
+    Items are taken by priority (higher first), then in the order they were added.
+    """
+
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+        with self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS queue (
+                id INTEGER PRIMARY KEY, kind TEXT NOT NULL, target TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0, position REAL NOT NULL, state TEXT NOT NULL,
+                added REAL NOT NULL, finished REAL, summary TEXT)""")
+
+    def _select(self, where="", params=(), limit=-1):
+        return [QueueItem(row) for row in self.db.execute(
+            f"SELECT {', '.join(QueueItem.FIELDS)} FROM queue {where} ORDER BY priority DESC, position LIMIT ?",
+            (*params, limit))]
+
+    def add(self, kind, target, priority=0):
+        """Queue an item and return its id"""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown queue item kind: {kind}")
+        with self.lock, self.db:
+            position = self.db.execute("SELECT COALESCE(MAX(position), 0) + 1 FROM queue").fetchone()[0]
+            return self.db.execute(
+                "INSERT INTO queue (kind, target, priority, position, state, added) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, target, priority, position, QUEUED, time.time())).lastrowid
+
+    def items(self, finished=False):
+        """Return the items in queue order; finished (done, failed, cancelled) ones too if asked"""
+        with self.lock:
+            if finished:
+                return self._select()
+            return self._select(f"WHERE state IN ({', '.join('?' * len(ACTIVE_STATES))})", ACTIVE_STATES)
+
+    def get(self, item_id):
+        with self.lock:
+            found = self._select("WHERE id = ?", (item_id,))
+        return found[0] if found else None
+
+    def state(self, item_id):
+        with self.lock:
+            row = self.db.execute("SELECT state FROM queue WHERE id = ?", (item_id,)).fetchone()
+        return row[0] if row else None
+
+    def claim(self, above_priority=None):
+        """Mark the next queued item running and return it, or None.
+
+        With above_priority, only an item of a higher priority is taken (to
+        let it go ahead of the one in progress).
+        """
+        with self.lock, self.db:
+            where, params = "WHERE state = ?", [QUEUED]
+            if above_priority is not None:
+                where += " AND priority > ?"
+                params.append(above_priority)
+            found = self._select(where, params, limit=1)
+            if not found:
+                return None
+            item = found[0]
+            self.db.execute("UPDATE queue SET state = ? WHERE id = ?", (RUNNING, item.id))
+            item.state = RUNNING
+            return item
+
+    def finish(self, item_id, ok, summary=None):
+        """Record a running item as done or failed"""
+        with self.lock, self.db:
+            self.db.execute("UPDATE queue SET state = ?, finished = ?, summary = ? WHERE id = ? AND state = ?",
+                            (DONE if ok else FAILED, time.time(), summary, item_id, RUNNING))
+
+    def _set_state(self, item_id, state, from_states):
+        with self.lock, self.db:
+            return self.db.execute(
+                f"UPDATE queue SET state = ? WHERE id = ? AND state IN ({', '.join('?' * len(from_states))})",
+                (state, item_id, *from_states)).rowcount > 0
+
+    def pause(self, item_id):
+        """Stop taking work from an item; items in progress finish their current files. False if not active"""
+        return self._set_state(item_id, PAUSED, (QUEUED, RUNNING))
+
+    def resume(self, item_id):
+        """Queue a paused item again (or retry a failed or cancelled one)"""
+        return self._set_state(item_id, QUEUED, (PAUSED, FAILED, CANCELLED))
+
+    def cancel(self, item_id):
+        """Drop an item that is not finished yet"""
+        return self._set_state(item_id, CANCELLED, ACTIVE_STATES)
+
+    def set_priority(self, item_id, priority):
+        with self.lock, self.db:
+            self.db.execute("UPDATE queue SET priority = ? WHERE id = ?", (priority, item_id))
+
+    def move(self, item_id, offset):
+        """Move an active item offset places up (negative) or down in the queue order"""
+        with self.lock, self.db:
+            items = self._select(f"WHERE state IN ({', '.join('?' * len(ACTIVE_STATES))})", ACTIVE_STATES)
+            index = next((i for i, item in enumerate(items) if item.id == item_id), None)
+            if index is None or not 0 <= index + offset < len(items):
+                return False
+            step = -1 if offset < 0 else 1
+            neighbour = items[index + offset]
+            beyond = items[index + offset + step] if 0 <= index + offset + step < len(items) else None
+            # Take the neighbour's priority and go just past it, before the item beyond it
+            if beyond is not None and beyond.priority == neighbour.priority:
+                position = (neighbour.position + beyond.position) / 2
+            else:
+                position = neighbour.position + step
+            self.db.execute("UPDATE queue SET priority = ?, position = ? WHERE id = ?",
+                            (neighbour.priority, position, item_id))
+            return True
+
+    def requeue(self, item_id):
+        """Queue a running item again, e.g. when the run that took it ends before it is done"""
+        return self._set_state(item_id, QUEUED, (RUNNING,))
+
+    def requeue_running(self):
+        """Queue items again that a crashed or stopped run left running; returns their number"""
+        with self.lock, self.db:
+            return self.db.execute("UPDATE queue SET state = ? WHERE state = ?", (QUEUED, RUNNING)).rowcount
+
+    def clear_finished(self):
+        """Forget done, failed and cancelled items"""
+        with self.lock, self.db:
+            self.db.execute(f"DELETE FROM queue WHERE state NOT IN ({', '.join('?' * len(ACTIVE_STATES))})",
+                            ACTIVE_STATES)
@@ -0,0 +1,91 @@
+"""Folder indexing for batch mode.
+
+scan_media walks a folder with os.scandir (which returns file type and stat
+data from the directory listing itself) and yields entries lazily. MediaIndex
+records what a scan has produced so the preview and the run share one walk,
+and a run can start on the first files while the rest are still being found.
+"""
+import os
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+# relative_dir is the entry's folder relative to the scanned root ("" at the top level)
+MediaEntry = namedtuple("MediaEntry", ["path", "size", "mtime", "extension", "relative_dir"])
+
+
+def scan_media(root, extensions, recursive=False):
+    """Yield a MediaEntry for each file under root whose extension is in extensions"""
+    root = Path(root)
+    pending = [(root, "")]
+    while pending:
+        folder, relative_dir = pending.pop()
+        try:
+            with os.scandir(folder) as it:
+                children = sorted(it, key=lambda e: e.name.lower())
+        except OSError:
+            continue  # Unreadable folder; skip it like the old iterdir() walk would fail on it
+        subfolders = []
+        for entry in children:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        subfolders.append((Path(entry.path), os.path.join(relative_dir, entry.name)))
+                    continue
+                if not entry.is_file():
+                    continue
+                extension = os.path.splitext(entry.name)[1].lower()
+                if extension not in extensions:
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            yield MediaEntry(Path(entry.path), stat.st_size, stat.st_mtime, extension, relative_dir)
+        # Depth-first, keeping alphabetical order of subfolders
+        pending.extend(reversed(subfolders))
+
+
+class MediaIndex:
+    """A shareable, lazily completed index of the media files under a folder.
+
+    Iterating replays the entries found so far and then continues the scan, so
+    several consumers (preview, run) can use the same walk concurrently.
+    """
+
+    def __init__(self, root, extensions, recursive=False):
+        self.root = Path(root)
+        self.recursive = recursive
+        self.entries = []
+        self.complete = False
+        self.lock = threading.Lock()
+        self._scanner = scan_media(self.root, extensions, recursive)
+
+    def matches(self, root, recursive):
+        return self.root == Path(root) and self.recursive == recursive
+
+    @property
+    def count(self):
+        """Number of entries found so far"""
+        return len(self.entries)
+
+    def _next_entry(self, position):
+        with self.lock:
+            if position < len(self.entries):
+                return self.entries[position]
+            if self.complete:
+                return None
+            entry = next(self._scanner, None)
+            if entry is None:
+                self.complete = True
+                return None
+            self.entries.append(entry)
+            return entry
+
+    def __iter__(self):
+        position = 0
+        while True:
+            entry = self._next_entry(position)
+            if entry is None:
+                return
+            position += 1
+            yield entry
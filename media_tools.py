@@ -0,0 +1,235 @@
+"""ffmpeg helpers for preparing media before transcription."""
+import re
+import shutil
+import struct
+import subprocess
+import threading
+from pathlib import Path
+
+from process_tree import run_captured
+
+# Containers worth demuxing; audio-only inputs are already small enough
+VIDEO_EXTENSIONS = {
+    '.mp4', '.avi', '.mov', '.wmv', '.mkv', '.flv', '.webm', '.mpg', '.mpeg', '.m4v',
+    '.3gp', '.ogv', '.ts', '.vob', '.asf', '.rm', '.rmvb', '.divx', '.xvid', '.f4v'
+}
+
+# Whisper resamples everything to 16 kHz mono, so nothing is lost by doing it up front
+AUDIO_FORMATS = {
+    "opus": (".opus", ["-c:a", "libopus", "-b:a", "32k"]),
+    "wav": (".wav", ["-c:a", "pcm_s16le"]),
+}
+
+
+def find_ffmpeg():
+    """Return the path of the ffmpeg executable, or None if it is not on PATH"""
+    return shutil.which("ffmpeg")
+
+
+def find_ffprobe():
+    """Return the path of the ffprobe executable, or None if it is not on PATH"""
+    return shutil.which("ffprobe")
+
+
+def extract_audio(source, output_dir, audio_format="opus", ffmpeg="ffmpeg", timeout=3600,
+                  start=None, duration=None, name="audio", track=None):
+    """Demux source to 16 kHz mono audio in output_dir and return the new file's path.
+
+    start/duration (seconds) cut out a section instead of the whole file.
+    track holds the ffmpeg process while it runs (see run_captured).
+    """
+    extension, codec_args = AUDIO_FORMATS[audio_format]
+    output_path = Path(output_dir) / f"{name}{extension}"
+    cmd = [ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error", "-y"]
+    if start is not None:
+        cmd += ["-ss", f"{start:.3f}"]
+    cmd += ["-i", str(source)]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    cmd += ["-vn", "-ac", "1", "-ar", "16000", *codec_args, str(output_path)]
+    result = run_captured(cmd, timeout, track)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()[-500:]}")
+    return output_path
+
+
+def probe_duration(source, ffprobe="ffprobe", timeout=60):
+    """Return the media duration in seconds, or None if it cannot be determined"""
+    cmd = [ffprobe, "-v", "error", "-show_entries", "format=duration",
+           "-of", "default=noprint_wrappers=1:nokey=1", str(source)]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        return float(result.stdout.strip())
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return None
+
+
+def read_header_duration(source):
+    """Return the duration stored in a WAV or MP4/M4A/MOV header, or None.
+
+    Works without ffprobe for the common containers whose header states the
+    duration; anything else (or a damaged header) gives None.
+    """
+    try:
+        with open(source, "rb") as f:
+            head = f.read(12)
+            if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+                return _wav_duration(f)
+            if head[4:8] == b"ftyp":
+                f.seek(0, 2)
+                end = f.tell()
+                f.seek(0)
+                return _mp4_duration(f, end)
+    except (OSError, struct.error, ValueError, ZeroDivisionError):
+        pass
+    return None
+
+
+def media_file_duration(source):
+    """Return the duration of a media file in seconds, or None.
+
+    Uses ffprobe when available and falls back to the duration in WAV and
+    MP4-family headers. Anything that is not a file (a URL) gives None.
+    """
+    if not Path(source).is_file():
+        return None
+    ffprobe = find_ffprobe()
+    return (probe_duration(source, ffprobe) if ffprobe else None) or read_header_duration(source)
+
+
+class DurationCache:
+    """Media durations probed at most once each, shared by any number of threads.
+
+    duration(source) probes on first use; a thread asking for a source that
+    another thread is probing waits for that probe instead of starting its own.
+    The lock is only held for the lookups, never while probing.
+    """
+
+    def __init__(self, probe=media_file_duration):
+        self.probe = probe
+        self.lock = threading.Lock()
+        self.durations = {}  # str(source) -> duration (None when unknown)
+        self.probing = {}  # str(source) -> Event set once its probe is done
+
+    def duration(self, source):
+        source = str(source)
+        with self.lock:
+            if source in self.durations:
+                return self.durations[source]
+            done = self.probing.get(source)
+            owner = done is None
+            if owner:
+                done = self.probing[source] = threading.Event()
+        if not owner:
+            done.wait()
+            return self.known(source)
+        duration = None
+        try:
+            duration = self.probe(source)
+        finally:
+            with self.lock:
+                self.durations[source] = duration
+                del self.probing[source]
+            done.set()
+        return duration
+
+    def known(self, source):
+        """The duration of source if it was probed already, without probing"""
+        with self.lock:
+            return self.durations.get(str(source))
+
+
+def _wav_duration(f):
+    """Duration of a RIFF/WAVE file positioned after its 12-byte header"""
+    byte_rate = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        kind, size = struct.unpack("<4sI", header)
+        if kind == b"fmt ":
+            byte_rate = struct.unpack("<I", f.read(size)[8:12])[0]
+            f.seek(size % 2, 1)  # Chunks are padded to an even size
+        elif kind == b"data":
+            return size / byte_rate if byte_rate else None
+        else:
+            f.seek(size + size % 2, 1)
+
+
+def _iter_boxes(f, end):
+    """Yield (type, body_start, box_end) of the ISO media boxes between f's position and end"""
+    while f.tell() + 8 <= end:
+        start = f.tell()
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - start
+        if size < header:
+            return
+        yield kind, start + header, start + size
+        f.seek(start + size)
+
+
+def _mp4_duration(f, end):
+    """Duration from the movie header (moov/mvhd) of an MP4-family file"""
+    for kind, body, box_end in _iter_boxes(f, end):
+        if kind != b"moov":
+            continue
+        f.seek(body)
+        for child, child_body, _ in _iter_boxes(f, box_end):
+            if child != b"mvhd":
+                continue
+            f.seek(child_body)
+            version = f.read(4)[0]
+            if version == 1:
+                f.seek(16, 1)
+                timescale, duration = struct.unpack(">IQ", f.read(12))
+            else:
+                f.seek(8, 1)
+                timescale, duration = struct.unpack(">II", f.read(8))
+            return duration / timescale
+        return None
+    return None
+
+
+def detect_silences(source, ffmpeg="ffmpeg", noise_db=-30, min_silence=0.5, timeout=3600, track=None):
+    """Return (start, end) pairs of silent stretches found by ffmpeg's silencedetect"""
+    cmd = [ffmpeg, "-nostdin", "-hide_banner", "-i", str(source), "-vn",
+           "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}", "-f", "null", "-"]
+    result = run_captured(cmd, timeout, track)
+    silences = []
+    start = None
+    for line in result.stderr.splitlines():
+        match = re.search(r"silence_start: (-?[\d.]+)", line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            continue
+        match = re.search(r"silence_end: ([\d.]+)", line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    return silences
+
+
+def plan_chunks(duration, silences, chunk_length, search_window=None):
+    """Split [0, duration] into (start, end) chunks of about chunk_length seconds.
+
+    Each cut is placed in the middle of the silence closest to the ideal cut
+    point (within search_window seconds), so words are not cut in half. The last
+    chunk absorbs a remainder shorter than half a chunk.
+    """
+    window = search_window if search_window is not None else chunk_length * 0.2
+    midpoints = [(start + end) / 2 for start, end in silences]
+    cuts = []
+    position = 0.0
+    while duration - position > chunk_length * 1.5:
+        target = position + chunk_length
+        candidates = [m for m in midpoints if abs(m - target) <= window and m > position]
+        cut = min(candidates, key=lambda m: abs(m - target)) if candidates else target
+        cuts.append(cut)
+        position = cut
+    points = [0.0] + cuts + [duration]
+    return list(zip(points[:-1], points[1:]))
@@ -0,0 +1,131 @@
+"""Move the selected transcript formats from a scratch folder to their destination.
+
+Only the formats the user asked for reach the output folder. They are moved
+with os.replace, which is a plain rename when the scratch folder is on the
+same volume as the destination. Across volumes the file is copied to a
+temporary name next to the destination and then renamed, so a destination
+file is never seen half-written. A selected format the transcriber did not
+write is rendered from the JSON result when there is one.
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+
+from subtitles import render_format
+
+
+def move_file(src, dest):
+    """Move src to dest, replacing dest atomically"""
+    try:
+        os.replace(src, dest)
+        return
+    except OSError:
+        pass  # Most likely a different volume; fall back to copy + rename
+    partial = dest.with_name(f".{dest.name}.partial")
+    try:
+        shutil.copyfile(src, partial)
+        os.replace(partial, dest)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    Path(src).unlink(missing_ok=True)
+
+
+def copy_file(src, dest, link=False):
+    """Copy src to dest atomically, or hard-link it when link is set and the volume allows it"""
+    if link:
+        try:
+            os.link(src, dest)
+            return
+        except OSError:
+            pass  # Different volume, no hard link support or dest exists; copy instead
+    partial = dest.with_name(f".{dest.name}.partial")
+    try:
+        shutil.copyfile(src, partial)
+        os.replace(partial, dest)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+
+def write_file(dest, content):
+    """Write text to dest, replacing it atomically"""
+    partial = dest.with_name(f".{dest.name}.partial")
+    try:
+        partial.write_text(content, encoding="utf-8")
+        os.replace(partial, dest)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+
+def find_output(temp_dir, output_format):
+    """Return the transcriber's output file of a format in temp_dir, or None"""
+    preferred = temp_dir / f"out.{output_format}"
+    if preferred.is_file():
+        return preferred
+    return next((p for p in sorted(temp_dir.glob(f"*.{output_format}")) if p.is_file()), None)
+
+
+def finalize_outputs(temp_dir, base_name, output_dir, formats, log):
+    """Materialize the selected formats as output_dir/base_name.<format>.
+
+    Returns the list of created files; formats that could neither be found
+    nor rendered are reported through log.
+    """
+    temp_dir = Path(temp_dir)
+    output_dir = Path(output_dir)
+    created = []
+    result = None
+    # The JSON result is moved last so the other formats can still be rendered from it
+    for output_format in sorted(formats, key=lambda f: f == "json"):
+        final_path = output_dir / f"{base_name}.{output_format}"
+        try:
+            source = find_output(temp_dir, output_format)
+            if source is not None:
+                move_file(source, final_path)
+            else:
+                if result is None:
+                    json_source = find_output(temp_dir, "json")
+                    if json_source is None:
+                        log(f" ✗ No .{output_format} output and no JSON result to render it from")
+                        continue
+                    result = json.loads(json_source.read_text(encoding="utf-8"))
+                write_file(final_path, render_format(result, output_format))
+            log(f" → Created: {final_path.name}")
+            created.append(final_path)
+        except Exception as e:
+            log(f" ✗ Failed to create {final_path.name}: {str(e)}")
+    return created
+
+
+def reuse_outputs(sources, base_name, output_dir, formats, log, link=False):
+    """Materialize the selected formats in output_dir from the outputs of an earlier transcription.
+
+    sources maps formats to existing files; missing formats are rendered from
+    the JSON one. Files that already are at their destination stay as they are.
+    Returns the list of files in place, or an empty list when a format could
+    not be provided.
+    """
+    if "json" not in sources and any(output_format not in sources for output_format in formats):
+        return []  # A format would need a new transcription
+    output_dir = Path(output_dir)
+    placed = []
+    result = None
+    for output_format in formats:
+        final_path = output_dir / f"{base_name}.{output_format}"
+        source = sources.get(output_format)
+        try:
+            if source is not None:
+                if final_path.resolve() != Path(source).resolve():
+                    copy_file(source, final_path, link)
+            else:
+                if result is None:
+                    result = json.loads(sources["json"].read_text(encoding="utf-8"))
+                write_file(final_path, render_format(result, output_format))
+            placed.append(final_path)
+        except Exception as e:
+            log(f" ✗ Failed to reuse {final_path.name}: {str(e)}")
+            return []
+    return placed
@@ -0,0 +1,141 @@
+"""Producer/consumer prefetching of job inputs.
+
+A PrefetchPipeline runs a prepare step (download, audio extraction, ...) on a
+background thread ahead of the consumers, so preparing the next items overlaps
+with transcribing the current one. At most `depth` prepared items wait in the
+queue, and production also pauses while prepared files use more than the disk
+budget.
+"""
+import queue
+import shutil
+import threading
+
+_DONE = object()
+
+
+class PrefetchedItem:
+    """An item together with the result of its prepare step.
+
+    path is the prepared file (None if preparing failed, see error). Call
+    release() once the item is consumed to delete its scratch data and return
+    its bytes to the disk budget.
+    """
+
+    def __init__(self, pipeline, item, path=None, size=0, scratch_dir=None, error=None):
+        self.pipeline = pipeline
+        self.item = item
+        self.path = path
+        self.size = size
+        self.scratch_dir = scratch_dir
+        self.error = error
+        self.released = False
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        if self.scratch_dir:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+        self.pipeline._release_bytes(self.size)
+
+
+class PrefetchPipeline:
+    """Prepare items on a background thread, up to depth items / disk_budget bytes ahead.
+
+    prepare(item) must return (path, size_in_bytes, scratch_dir) and may raise;
+    the exception is handed to the consumer as PrefetchedItem.error.
+    is_running() is polled so a stopped run does not keep downloading.
+    A disk_budget of 0 means unlimited.
+    """
+
+    def __init__(self, items, prepare, depth=2, disk_budget=0, is_running=None):
+        self.items = items
+        self.prepare = prepare
+        self.disk_budget = disk_budget
+        self.is_running = is_running or (lambda: True)
+        self.ready = queue.Queue(maxsize=max(1, depth))
+        self.disk_used = 0
+        self.disk_cond = threading.Condition()
+        self.thread = threading.Thread(target=self._produce, daemon=True)
+        self.closed = False
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _release_bytes(self, size):
+        with self.disk_cond:
+            self.disk_used -= size
+            self.disk_cond.notify_all()
+
+    def _wait_for_disk(self):
+        """Block while the budget is used up; an empty pipeline may always take one item"""
+        with self.disk_cond:
+            while (self.disk_budget and self.disk_used >= self.disk_budget
+                   and self.is_running() and not self.closed):
+                self.disk_cond.wait(0.5)
+
+    def _put(self, value):
+        while self.is_running() and not self.closed:
+            try:
+                self.ready.put(value, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        try:
+            for item in self.items:
+                self._wait_for_disk()
+                if not self.is_running() or self.closed:
+                    break
+                try:
+                    path, size, scratch_dir = self.prepare(item)
+                    prefetched = PrefetchedItem(self, item, path, size, scratch_dir)
+                except Exception as e:
+                    prefetched = PrefetchedItem(self, item, error=e)
+                with self.disk_cond:
+                    self.disk_used += prefetched.size
+                if not self._put(prefetched):
+                    prefetched.release()
+                    break
+        finally:
+            # The sentinel must always arrive, even when the run was stopped
+            while True:
+                try:
+                    self.ready.put(_DONE, timeout=0.5)
+                    break
+                except queue.Full:
+                    if not self.is_running() or self.closed:
+                        self._drain()
+
+    def _drain(self):
+        while True:
+            try:
+                value = self.ready.get_nowait()
+            except queue.Empty:
+                return
+            if value is _DONE:
+                self.ready.put(_DONE)
+                return
+            value.release()
+
+    def __iter__(self):
+        """Yield PrefetchedItems in input order until the producer is done"""
+        while True:
+            value = self.ready.get()
+            if value is _DONE:
+                self.ready.put(_DONE)  # Let other consumers see the end too
+                return
+            yield value
+
+    def close(self):
+        """Stop producing and delete anything prepared but not consumed"""
+        self.closed = True
+        with self.disk_cond:
+            self.disk_cond.notify_all()
+        if self.thread.is_alive():
+            # A prepare step still in flight releases its own result once it sees closed
+            self.thread.join(timeout=5)
+        self._drain()
@@ -0,0 +1,114 @@
+"""Start child processes in their own group and kill whole trees of them on cancel.
+
+The transcriber runs as cmd.exe -> python -> ffmpeg (and yt-dlp for URLs),
+so killing the direct child alone leaves the rest running and holding the
+GPU. Every process is started as the leader of a new group (a new session on
+POSIX, CREATE_NEW_PROCESS_GROUP on Windows) and kill_process_tree ends the
+whole group: os.killpg on POSIX, taskkill /T on Windows.
+"""
+import contextlib
+import os
+import signal
+import subprocess
+import threading
+
+if os.name == "nt":
+    NEW_PROCESS_GROUP = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    NEW_PROCESS_GROUP = {"start_new_session": True}
+
+# Owner meaning every owner of a ProcessRegistry
+ALL = object()
+
+
+class Cancelled(Exception):
+    """The job was cancelled and its processes killed"""
+
+    def __init__(self, message="cancelled"):
+        super().__init__(message)
+
+
+def kill_process_tree(process):
+    """Kill process and everything it started; never raises"""
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True, timeout=10)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        pass
+    try:
+        process.kill()
+    except OSError:
+        pass
+
+
+def run_captured(cmd, timeout=None, track=None):
+    """Like subprocess.run(cmd, capture_output=True, text=True), in a new process group.
+
+    track(process), when given, is a context manager holding the process
+    while it runs (see ProcessRegistry.running). The whole tree is killed on timeout.
+    """
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True, errors="replace", **NEW_PROCESS_GROUP)
+    with track(process) if track else contextlib.nullcontext():
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill_process_tree(process)
+            process.communicate()
+            raise
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+class ProcessRegistry:
+    """Child processes of the running jobs by owner (a worker id), so a cancel can kill them at once.
+
+    A cancelled owner stays cancelled until reset(owner), so a process it
+    starts afterwards is killed right away too.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.processes = {}  # owner -> set of Popen
+        self.cancelled = set()
+        self.all_cancelled = False
+
+    @contextlib.contextmanager
+    def running(self, owner, process):
+        """Hold process under owner while the block runs"""
+        with self.lock:
+            self.processes.setdefault(owner, set()).add(process)
+            cancelled = self.all_cancelled or owner in self.cancelled
+        if cancelled:
+            kill_process_tree(process)
+        try:
+            yield process
+        finally:
+            with self.lock:
+                self.processes.get(owner, set()).discard(process)
+
+    def cancel(self, owner=ALL):
+        """Kill the process trees of owner (of every owner with ALL) and mark it cancelled"""
+        with self.lock:
+            if owner is ALL:
+                self.all_cancelled = True
+                victims = [process for processes in self.processes.values() for process in processes]
+            else:
+                self.cancelled.add(owner)
+                victims = list(self.processes.get(owner, ()))
+        for process in victims:
+            kill_process_tree(process)
+
+    def is_cancelled(self, owner):
+        with self.lock:
+            return self.all_cancelled or owner in self.cancelled
+
+    def reset(self, owner=ALL):
+        """Let owner (every owner with ALL) start jobs again after a cancel"""
+        with self.lock:
+            if owner is ALL:
+                self.all_cancelled = False
+                self.cancelled.clear()
+            else:
+                self.cancelled.discard(owner)
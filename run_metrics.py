@@ -0,0 +1,157 @@
+"""Per-stage timings of a run, for finding out where the time goes.
+
+Every job (file or video) records the wall time and bytes of its stages
+(metadata, download, extract, transcription, move, cleanup); run-level work
+such as listing a playlist is recorded without a job. The realtime factor of a
+stage is its time divided by the media duration, so 0.5 means twice as fast as
+playback.
+"""
+import csv
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+STAGES = ["metadata", "download", "extract", "transcription", "move", "cleanup"]
+
+
+class StageTimer:
+    """Handed out by RunMetrics.stage; set bytes to record the amount of data handled"""
+
+    def __init__(self):
+        self.bytes = None
+
+
+class RunMetrics:
+    """Thread-safe collection of the stage timings of one run"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.started = time.time()
+        self.finished = None
+        self.jobs = {}  # job key -> {"label", "ok", "duration", "stages": {name: [seconds, bytes]}}
+        self.run_stages = {}  # stage name -> [seconds, bytes] for work outside any job
+        self.lock = threading.Lock()
+
+    def _job(self, key):
+        job = self.jobs.get(key)
+        if job is None:
+            job = self.jobs[key] = {"label": str(key), "ok": None, "duration": None, "stages": {}}
+        return job
+
+    @contextmanager
+    def stage(self, key, name):
+        """Time the enclosed block as stage name of job key (None for run-level work)"""
+        timer = StageTimer()
+        start = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            self.add(key, name, time.perf_counter() - start, timer.bytes)
+
+    def add(self, key, name, seconds, size=None):
+        with self.lock:
+            stages = self.run_stages if key is None else self._job(key)["stages"]
+            totals = stages.setdefault(name, [0.0, None])
+            totals[0] += seconds
+            if size is not None:
+                totals[1] = (totals[1] or 0) + size
+
+    def set_duration(self, key, seconds):
+        """Record the media duration of a job (for realtime factors)"""
+        if seconds:
+            with self.lock:
+                self._job(key)["duration"] = seconds
+
+    def finish_job(self, key, ok, label=None):
+        with self.lock:
+            job = self._job(key)
+            job["ok"] = ok
+            if label:
+                job["label"] = label
+
+    def finish(self):
+        self.finished = time.time()
+
+    def summary(self):
+        """Return one dict per stage: jobs, seconds, mean_s, bytes, mb_per_s, rtf"""
+        with self.lock:
+            totals = {}
+            for job in self.jobs.values():
+                for name, (seconds, size) in job["stages"].items():
+                    row = totals.setdefault(name, {"jobs": 0, "seconds": 0.0, "bytes": 0,
+                                                   "timed_media_s": 0.0, "media_s": 0.0})
+                    row["jobs"] += 1
+                    row["seconds"] += seconds
+                    row["bytes"] += size or 0
+                    if job["duration"]:
+                        row["timed_media_s"] += seconds
+                        row["media_s"] += job["duration"]
+            for name, (seconds, size) in self.run_stages.items():
+                row = totals.setdefault(name, {"jobs": 0, "seconds": 0.0, "bytes": 0,
+                                               "timed_media_s": 0.0, "media_s": 0.0})
+                row["seconds"] += seconds
+                row["bytes"] += size or 0
+
+        rows = []
+        for name in sorted(totals, key=lambda n: STAGES.index(n) if n in STAGES else len(STAGES)):
+            row = totals[name]
+            rows.append({
+                "stage": name,
+                "jobs": row["jobs"],
+                "seconds": round(row["seconds"], 3),
+                "mean_s": round(row["seconds"] / row["jobs"], 3) if row["jobs"] else None,
+                "bytes": row["bytes"],
+                "mb_per_s": round(row["bytes"] / row["seconds"] / 1e6, 2) if row["bytes"] and row["seconds"] else None,
+                "rtf": round(row["timed_media_s"] / row["media_s"], 3) if row["media_s"] else None,
+            })
+        return rows
+
+    def to_dict(self):
+        with self.lock:
+            jobs = [dict(job, key=key, stages={name: {"seconds": round(seconds, 3), "bytes": size}
+                                               for name, (seconds, size) in job["stages"].items()})
+                    for key, job in self.jobs.items()]
+        return {"kind": self.kind, "started": self.started, "finished": self.finished,
+                "summary": self.summary(), "jobs": jobs}
+
+    def export_json(self, path):
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+
+    def export_csv(self, path):
+        """Write one row per job and stage (run-level stages have an empty job)"""
+        with self.lock:
+            rows = [(job["label"], job["ok"], job["duration"], name, seconds, size)
+                    for job in self.jobs.values() for name, (seconds, size) in job["stages"].items()]
+            rows += [("", None, None, name, seconds, size) for name, (seconds, size) in self.run_stages.items()]
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["job", "ok", "media_seconds", "stage", "seconds", "bytes", "rtf"])
+            for label, ok, duration, name, seconds, size in rows:
+                rtf = round(seconds / duration, 4) if duration else ""
+                writer.writerow([label, "" if ok is None else ok, duration or "", name, round(seconds, 4),
+                                 "" if size is None else size, rtf])
+
+    def export(self, folder):
+        """Write run-<time>-<kind>.json and .csv into folder and return the JSON path"""
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        base = folder / f"run-{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))}-{self.kind}"
+        self.export_json(base.with_suffix(".json"))
+        self.export_csv(base.with_suffix(".csv"))
+        return base.with_suffix(".json")
+
+    def format_summary(self):
+        """Human-readable summary lines for the log"""
+        lines = []
+        for row in self.summary():
+            line = f"{row['stage']:<13} {row['seconds']:>9.2f} s"
+            if row["jobs"]:
+                line += f"  ({row['jobs']} jobs, {row['mean_s']:.2f} s each)"
+            if row["bytes"]:
+                line += f"  {row['bytes'] / 1e6:.1f} MB"
+            if row["rtf"] is not None:
+                line += f"  RTF {row['rtf']:.3f}"
+            lines.append(line)
+        return lines
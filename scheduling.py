@@ -0,0 +1,112 @@
+"""Duration-aware ordering of jobs and prediction of the time a run has left.
+
+With several workers pulling from one queue, starting the longest jobs first
+(longest processing time first) keeps a single long recording from being
+picked up last and running alone while the other workers sit idle.
+"""
+import heapq
+import threading
+import time
+
+
+def longest_first_window(items, duration_of, window):
+    """Yield items longest first within a look-ahead of window items.
+
+    For sources that are still being listed (a playlist fetched page by page,
+    a folder still being scanned): the first item is handed out as soon as
+    window items are known, and each next one is the longest of those seen but
+    not yet handed out.
+    """
+    pending = []
+    for counter, item in enumerate(items):
+        heapq.heappush(pending, (-(duration_of(item) or 0), counter, item))
+        if len(pending) >= window:
+            yield heapq.heappop(pending)[2]
+    while pending:
+        yield heapq.heappop(pending)[2]
+
+
+def format_eta(seconds):
+    """Format seconds as H:MM:SS (or M:SS below an hour)"""
+    seconds = int(round(seconds))
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class EtaEstimator:
+    """Predicts the remaining time of a run from media durations and a realtime factor.
+
+    The realtime factor (processing seconds per media second) starts from the
+    device's history and is replaced by what this run measures once items finish.
+    """
+
+    def __init__(self, workers, realtime_factor=None):
+        self.workers = max(1, workers)
+        self.history_rtf = realtime_factor
+        self.durations = {}  # key -> media duration of items not finished yet
+        self.running = {}  # key -> start time
+        self.finished = set()
+        self.total_media = 0.0
+        self.finished_media = 0.0
+        self.unknown = 0  # Items without a known duration
+        self.measured_seconds = 0.0
+        self.measured_media = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, key, duration):
+        """Register an upcoming item (duration None when unknown); finished items are ignored"""
+        with self.lock:
+            if key in self.finished or key in self.durations:
+                return
+            if duration:
+                self.durations[key] = duration
+                self.total_media += duration
+            else:
+                self.unknown += 1
+
+    def start(self, key):
+        with self.lock:
+            self.running[key] = time.monotonic()
+
+    def finish(self, key, ok=True):
+        with self.lock:
+            self.finished.add(key)
+            started = self.running.pop(key, None)
+            duration = self.durations.pop(key, None)
+            self.finished_media += duration or 0.0
+            if ok and started is not None and duration:
+                self.measured_seconds += time.monotonic() - started
+                self.measured_media += duration
+
+    def realtime_factor(self):
+        if self.measured_media:
+            return self.measured_seconds / self.measured_media
+        return self.history_rtf
+
+    def queued_media(self):
+        """Return the media seconds of the known items that have not been started"""
+        with self.lock:
+            return sum(duration for key, duration in self.durations.items() if key not in self.running)
+
+    def progress(self):
+        """Return the finished share of the media duration in percent, or None if some are unknown"""
+        with self.lock:
+            if self.unknown or not self.total_media:
+                return None
+            return self.finished_media / self.total_media * 100
+
+    def remaining(self):
+        """Return the estimated seconds left, or None when there is nothing to base it on"""
+        with self.lock:
+            rtf = self.realtime_factor()
+            if rtf is None or not self.durations:
+                return None
+            now = time.monotonic()
+            left = []
+            for key, duration in self.durations.items():
+                expected = duration * rtf
+                started = self.running.get(key)
+                left.append(max(0.0, expected - (now - started)) if started is not None else expected)
+        # The run cannot end before its longest remaining item
+        return max(sum(left) / self.workers, max(left))
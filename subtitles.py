@@ -0,0 +1,163 @@
+"""Subtitle cue helpers: parsing, formatting and stitching chunk transcripts.
+
+Every output format can also be rendered in-process from Whisper's JSON
+result ({"text", "segments": [{"start", "end", "text"}, ...], "language"}),
+so formats that were not written by the transcriber can be produced later.
+"""
+import json
+import re
+from pathlib import Path
+
+# Formats transcribe-anything/Whisper write, in the order they are listed in the UI
+OUTPUT_FORMATS = ["txt", "srt", "vtt", "json", "tsv"]
+
+TIMESTAMP_PATTERN = re.compile(r"(\d+):(\d{2}):(\d{2})[,.](\d{3})")
+CUE_TIMING_PATTERN = re.compile(
+    r"(\d+:\d{2}:\d{2}[,.]\d{3})\s*-->\s*(\d+:\d{2}:\d{2}[,.]\d{3})")
+
+
+def parse_timestamp(text):
+    """Convert an SRT/VTT timestamp (HH:MM:SS,mmm) to seconds"""
+    match = TIMESTAMP_PATTERN.search(text)
+    if not match:
+        raise ValueError(f"Invalid timestamp: {text}")
+    hours, minutes, seconds, millis = (int(part) for part in match.groups())
+    return hours * 3600 + minutes * 60 + seconds + millis / 1000
+
+
+def format_timestamp(seconds, separator=","):
+    """Convert seconds to an SRT timestamp (use separator='.' for VTT)"""
+    millis = int(round(max(0, seconds) * 1000))
+    hours, millis = divmod(millis, 3600 * 1000)
+    minutes, millis = divmod(millis, 60 * 1000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def parse_srt(text):
+    """Parse SRT content into a list of (start, end, text) cues"""
+    cues = []
+    for block in re.split(r"\n\s*\n", text.replace("\r\n", "\n").strip()):
+        lines = block.split("\n")
+        for i, line in enumerate(lines):
+            timing = CUE_TIMING_PATTERN.search(line)
+            if timing:
+                start, end = (parse_timestamp(t) for t in timing.groups())
+                cues.append((start, end, "\n".join(lines[i + 1:]).strip()))
+                break
+    return cues
+
+
+def format_srt(cues):
+    """Render (start, end, text) cues as SRT, numbered from 1"""
+    blocks = []
+    for number, (start, end, text) in enumerate(cues, start=1):
+        blocks.append(f"{number}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n")
+    return "\n".join(blocks)
+
+
+def format_vtt(cues):
+    """Render (start, end, text) cues as WebVTT"""
+    blocks = ["WEBVTT\n"]
+    for start, end, text in cues:
+        blocks.append(f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{text}\n")
+    return "\n".join(blocks)
+
+
+def segment_cues(result):
+    """Return (start, end, text) cues from a Whisper result's segments"""
+    return [(segment["start"], segment["end"], segment["text"].strip())
+            for segment in result.get("segments") or []]
+
+
+def render_format(result, output_format):
+    """Render a Whisper result dict as the content of an output format (see OUTPUT_FORMATS)"""
+    cues = segment_cues(result)
+    if output_format == "txt":
+        return "".join(f"{text}\n" for _, _, text in cues)
+    if output_format == "srt":
+        return format_srt(cues)
+    if output_format == "vtt":
+        return format_vtt(cues)
+    if output_format == "tsv":
+        rows = [f"{round(start * 1000)}\t{round(end * 1000)}\t{text.replace(chr(9), ' ')}"
+                for start, end, text in cues]
+        return "start\tend\ttext\n" + "".join(f"{row}\n" for row in rows)
+    if output_format == "json":
+        return json.dumps(result, ensure_ascii=False)
+    raise ValueError(f"Unknown output format: {output_format}")
+
+
+def read_cues(path):
+    """Read a transcript file of any output format as (start, end, text) cues.
+
+    Plain text has no timing; its lines come back with start and end None.
+    """
+    path = Path(path)
+    output_format = path.suffix.lstrip(".").lower()
+    text = path.read_text(encoding="utf-8", errors="replace")
+    if output_format in ("srt", "vtt"):
+        return parse_srt(text)
+    if output_format == "json":
+        return segment_cues(json.loads(text))
+    if output_format == "tsv":
+        cues = []
+        for line in text.splitlines()[1:]:
+            start, end, cue_text = (line.split("\t", 2) + ["", ""])[:3]
+            if start.isdigit() and end.isdigit():
+                cues.append((int(start) / 1000, int(end) / 1000, cue_text.strip()))
+        return cues
+    if output_format == "txt":
+        return [(None, None, line.strip()) for line in text.splitlines() if line.strip()]
+    raise ValueError(f"Unknown output format: {output_format}")
+
+
+def merge_chunk_outputs(chunks, dest_dir, base_name="out"):
+    """Stitch per-chunk transcripts into single .txt/.srt (and .json) files in dest_dir.
+
+    chunks is a list of (chunk_output_dir, offset_seconds) in playback order;
+    SRT cue times are shifted by each chunk's offset and renumbered. When every
+    chunk has a JSON result, their segments are merged into one as well, so the
+    other formats can still be rendered from it.
+    """
+    dest_dir = Path(dest_dir)
+    texts = []
+    cues = []
+    segments = []
+    language = None
+    all_json = True
+    for chunk_dir, offset in chunks:
+        chunk_dir = Path(chunk_dir)
+        json_files = sorted(chunk_dir.glob("*.json"))
+        if json_files:
+            result = json.loads(json_files[0].read_text(encoding="utf-8"))
+            language = language or result.get("language")
+            for segment in result.get("segments") or []:
+                segments.append(dict(segment, id=len(segments), start=segment["start"] + offset,
+                                     end=segment["end"] + offset))
+        else:
+            all_json = False
+        txt_files = sorted(chunk_dir.glob("*.txt"))
+        if txt_files:
+            texts.append(txt_files[0].read_text(encoding="utf-8").strip())
+        srt_files = sorted(chunk_dir.glob("*.srt"))
+        if srt_files:
+            for start, end, text in parse_srt(srt_files[0].read_text(encoding="utf-8")):
+                cues.append((start + offset, end + offset, text))
+
+    written = []
+    if texts:
+        txt_path = dest_dir / f"{base_name}.txt"
+        txt_path.write_text("\n".join(t for t in texts if t) + "\n", encoding="utf-8")
+        written.append(txt_path)
+    if cues:
+        srt_path = dest_dir / f"{base_name}.srt"
+        srt_path.write_text(format_srt(cues), encoding="utf-8")
+        written.append(srt_path)
+    if all_json and segments:
+        result = {"text": "".join(segment["text"] for segment in segments), "segments": segments,
+                  "language": language}
+        json_path = dest_dir / f"{base_name}.json"
+        json_path.write_text(render_format(result, "json"), encoding="utf-8")
+        written.append(json_path)
+    return written
@@ -0,0 +1,47 @@
+"""Shared fixtures: engines that run benchmarks/fake_transcriber.py in place of transcribe-anything."""
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from transcribe_engine import EngineSettings, TranscribeEngine
+
+FAKE_TRANSCRIBER = ROOT / "benchmarks" / "fake_transcriber.py"
+
+
+def fake_command(latency=0.0, options=""):
+    """transcriber_command running the fake transcriber (options are appended to its arguments)"""
+    return (f'"{Path(sys.executable).as_posix()}" "{FAKE_TRANSCRIBER.as_posix()}" {{source}} '
+            f'--output_dir {{output_dir}} --device {{device}} --latency {latency} --segments 3 {options}')
+
+
+def fake_worker_command(delay=0.0):
+    """worker_command running transcribe_worker.py with its fake backend, for warm_worker runs"""
+    return f'"{Path(sys.executable).as_posix()}" {{script}} --fake --fake-delay {delay}'
+
+
+@pytest.fixture
+def make_engine(tmp_path):
+    """Return a factory of engines writing into tmp_path; keyword arguments override the settings"""
+
+    def make(**options):
+        settings = {
+            "device": "cpu",
+            "same_folder": False,
+            "output_folder": str(tmp_path / "output"),
+            "use_cache": False,
+            "resume": False,
+            "max_retries": 0,
+            "scratch_dir": str(tmp_path / "scratch"),
+            "data_dir": str(tmp_path / "data"),
+            "export_metrics": False,
+            "transcriber_command": fake_command(),
+        }
+        settings.update(options)
+        return TranscribeEngine(EngineSettings(**settings))
+
+    return make
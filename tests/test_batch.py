@@ -0,0 +1,58 @@
+"""run_batch over a synthetic folder with the fake transcriber, on one and on several workers."""
+import wave
+
+import pytest
+
+from conftest import fake_command
+from fixtures import make_corpus
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_batch_writes_every_output(tmp_path, make_engine, workers):
+    paths = make_corpus(tmp_path / "media", 7, 4096)
+    engine = make_engine(workers=workers)
+
+    assert engine.run_batch(tmp_path / "media") == (7, 0)
+    output = tmp_path / "output"
+    for path in paths:
+        for output_format in engine.settings.output_formats:
+            assert (output / f"{path.stem}.{output_format}").is_file()
+    assert not any((tmp_path / "scratch").iterdir())  # Every job cleaned up after itself
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_batch_counts_failures(tmp_path, make_engine, workers):
+    paths = make_corpus(tmp_path / "media", 6, 4096)
+    engine = make_engine(workers=workers, transcriber_command=fake_command(options="--fail --fail-name 00002"))
+
+    assert engine.run_batch(tmp_path / "media") == (5, 1)
+    written = {path.stem for path in (tmp_path / "output").glob("*.txt")}
+    assert written == {path.stem for path in paths} - {"recording_00002"}
+
+
+def test_batch_subfolders_keep_their_layout(tmp_path, make_engine):
+    paths = make_corpus(tmp_path / "media", 6, 4096, subfolders=2)
+    engine = make_engine(workers=2, recursive=True)
+
+    assert engine.run_batch(tmp_path / "media") == (6, 0)
+    for path in paths:
+        assert (tmp_path / "output" / path.parent.name / f"{path.stem}.txt").is_file()
+
+
+def test_batch_starts_longest_files_first(tmp_path, make_engine):
+    media = tmp_path / "media"
+    media.mkdir()
+    for name, seconds in [("a", 1), ("b", 4), ("c", 2), ("d", 3)]:
+        with wave.open(str(media / f"{name}.wav"), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(1)
+            f.setframerate(8000)
+            f.writeframes(bytes(8000 * seconds))
+    log = []
+    engine = make_engine(workers=2)
+    engine.on_log = log.append
+
+    assert engine.run_batch(media) == (4, 0)
+    started = [line.split(": ")[-1].strip(" =") for line in log if "=== Processing file" in line]
+    assert started[:2] == ["b.wav", "d.wav"] or started[:2] == ["d.wav", "b.wav"]
+    assert sorted(started[2:]) == ["a.wav", "c.wav"]
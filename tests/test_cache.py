@@ -0,0 +1,33 @@
+"""Transcript cache entries are keyed by the device that actually ran the job."""
+from conftest import fake_command
+from fixtures import make_corpus
+
+
+def cached_devices(engine, path, tmp_path):
+    cache = engine.get_transcript_cache()
+    found = []
+    for device in ("cpu", "cuda"):
+        restored = tmp_path / f"restored_{path.stem}_{device}"
+        restored.mkdir()
+        if cache.restore(cache.make_key(path, device, engine.settings.model), restored):
+            found.append(device)
+    return found
+
+
+def test_cache_key_uses_slot_device(tmp_path, make_engine):
+    paths = make_corpus(tmp_path / "media", 2, 4096)
+    engine = make_engine(device="cuda", devices="cpu*2", use_cache=True)
+
+    assert engine.run_batch(tmp_path / "media") == (2, 0)
+    for path in paths:
+        assert cached_devices(engine, path, tmp_path) == ["cpu"]
+
+
+def test_cache_key_uses_fallback_device(tmp_path, make_engine):
+    path = make_corpus(tmp_path / "media", 1, 4096)[0]
+    command = fake_command(options='--fail --fail-device cuda --fail-message "CUDA out of memory"')
+    engine = make_engine(device="cuda", devices="cuda:0", use_cache=True, cpu_fallback=True,
+                         transcriber_command=command)
+
+    assert engine.run_batch(tmp_path / "media") == (1, 0)
+    assert cached_devices(engine, path, tmp_path) == ["cpu"]
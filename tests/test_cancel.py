@@ -0,0 +1,31 @@
+"""stop(cancel=True) ends a batch of long transcriptions right away and cleans up after them."""
+import threading
+import time
+
+from conftest import fake_command
+from fixtures import make_corpus
+
+
+def test_cancel_stops_a_long_batch(tmp_path, make_engine):
+    make_corpus(tmp_path / "media", 3, 4096)
+    engine = make_engine(workers=3, transcriber_command=fake_command(latency=30))
+    started = []
+    engine.on_log = lambda message: "=== Processing" in message and started.append(message)
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(counts=engine.run_batch(tmp_path / "media")), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while len(started) < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.5)  # Let the transcribers start
+
+    stopped = time.monotonic()
+    engine.stop(cancel=True)
+    thread.join(10)
+    assert not thread.is_alive()
+    assert time.monotonic() - stopped < 2.5
+    assert result["counts"] == (0, 0)  # Cancelled items are neither successes nor failures
+    summary = engine.get_journal().summary(f"folder:{(tmp_path / 'media').resolve()}")
+    assert summary == {"cancelled": 3}
+    assert not any((tmp_path / "scratch").iterdir())
+    assert not any((tmp_path / "output").glob("*.txt"))
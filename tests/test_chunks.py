@@ -0,0 +1,103 @@
+"""Long-file chunking: planning the cuts, stitching chunk transcripts and sharing chunks with idle workers."""
+import json
+import threading
+import time
+
+from media_tools import plan_chunks
+from subtitles import format_srt, merge_chunk_outputs, parse_srt
+from transcribe_engine import SharedJobs
+
+
+def test_plan_chunks_cuts_in_nearest_silence():
+    silences = [(95, 97), (118, 122), (250, 260)]
+    assert plan_chunks(400, silences, 120) == [(0.0, 120.0), (120.0, 255.0), (255.0, 400)]
+
+
+def test_plan_chunks_without_silences_and_remainder():
+    assert plan_chunks(350, [], 100) == [(0.0, 100), (100, 200), (200, 350)]  # The last 50 s are absorbed
+    assert plan_chunks(140, [], 100) == [(0.0, 140)]
+
+
+def test_plan_chunks_ignores_silences_outside_the_window():
+    assert plan_chunks(300, [(10, 20), (170, 180)], 100, search_window=10) == [(0.0, 100), (100, 200), (200, 300)]
+
+
+def write_chunk(chunk_dir, cues, language="en"):
+    chunk_dir.mkdir()
+    (chunk_dir / "out.srt").write_text(format_srt(cues), encoding="utf-8")
+    (chunk_dir / "out.txt").write_text("".join(f"{text}\n" for _, _, text in cues), encoding="utf-8")
+    segments = [{"id": i, "start": start, "end": end, "text": f" {text}"} for i, (start, end, text) in enumerate(cues)]
+    (chunk_dir / "out.json").write_text(json.dumps({"segments": segments, "language": language}), encoding="utf-8")
+
+
+def test_merge_chunk_outputs_offsets_and_renumbers(tmp_path):
+    write_chunk(tmp_path / "chunk_000", [(0.5, 2.0, "one"), (2.5, 4.0, "two")])
+    write_chunk(tmp_path / "chunk_001", [(1.0, 3.25, "three")])
+
+    written = merge_chunk_outputs([(tmp_path / "chunk_000", 0.0), (tmp_path / "chunk_001", 600.0)], tmp_path)
+    assert sorted(path.name for path in written) == ["out.json", "out.srt", "out.txt"]
+    srt = (tmp_path / "out.srt").read_text(encoding="utf-8")
+    assert parse_srt(srt) == [(0.5, 2.0, "one"), (2.5, 4.0, "two"), (601.0, 603.25, "three")]
+    assert [block.split("\n")[0] for block in srt.strip().split("\n\n")] == ["1", "2", "3"]
+    assert "00:10:01,000 --> 00:10:03,250" in srt
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8") == "one\ntwo\nthree\n"
+    result = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+    assert [(s["id"], s["start"], s["end"]) for s in result["segments"]] == [(0, 0.5, 2.0), (1, 2.5, 4.0),
+                                                                             (2, 601.0, 603.25)]
+    assert result["text"] == " one two three" and result["language"] == "en"
+
+
+def test_merge_chunk_outputs_skips_json_unless_every_chunk_has_one(tmp_path):
+    write_chunk(tmp_path / "chunk_000", [(0.0, 1.0, "one")])
+    write_chunk(tmp_path / "chunk_001", [(0.0, 1.0, "two")])
+    (tmp_path / "chunk_001" / "out.json").unlink()
+
+    written = merge_chunk_outputs([(tmp_path / "chunk_000", 0.0), (tmp_path / "chunk_001", 60.0)], tmp_path)
+    assert sorted(path.name for path in written) == ["out.srt", "out.txt"]
+
+
+def test_shared_jobs_are_spread_over_helpers():
+    ran = {}
+    lock = threading.Lock()
+
+    def run(worker_id, job):
+        time.sleep(0.1)
+        with lock:
+            ran[job] = worker_id
+        return job != 3
+
+    def help_out(worker_id):
+        while shared.run_next(worker_id):
+            pass
+
+    shared = SharedJobs(range(6), run, print)
+    helpers = [threading.Thread(target=help_out, args=(worker_id,)) for worker_id in (1, 2)]
+    for helper in helpers:
+        helper.start()
+    while shared.run_next(0):
+        pass
+    assert shared.wait(lambda: False, lambda worker_id: None) == 5  # Job 3 failed
+    for helper in helpers:
+        helper.join()
+    assert sorted(ran) == list(range(6))
+    assert set(ran.values()) == {0, 1, 2}
+
+
+def test_shared_jobs_cancel_the_helpers():
+    release = threading.Event()
+    cancelled = []
+
+    shared = SharedJobs(range(4), lambda worker_id, job: release.wait(5), print)
+    helper = threading.Thread(target=shared.run_next, args=(1,))
+    helper.start()
+    while not shared.helpers:
+        time.sleep(0.01)
+
+    def cancel_worker(worker_id):
+        cancelled.append(worker_id)
+        release.set()
+
+    assert shared.wait(lambda: True, cancel_worker) == 1
+    helper.join()
+    assert cancelled == [1]
+    assert not shared.pending  # The chunks nobody took are dropped
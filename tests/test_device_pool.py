@@ -0,0 +1,69 @@
+"""DeviceScheduler dispatch, on its own and driving run_worker_pool with stub workers that only sleep."""
+import threading
+import time
+
+import pytest
+
+from device_pool import DeviceScheduler, DeviceSlot, parse_device_spec
+
+
+def test_parse_device_spec():
+    slots = parse_device_spec("cuda:0, cuda:1,cpu*2", ["cpu", "cuda"])
+    assert [slot.name for slot in slots] == ["cuda:0", "cuda:1", "cpu", "cpu"]
+    assert slots[1].env()["CUDA_VISIBLE_DEVICES"] == "1"
+    with pytest.raises(ValueError):
+        parse_device_spec("tpu:0", ["cpu", "cuda"])
+
+
+def test_fast_slot_takes_longest_item():
+    fast, slow = DeviceSlot("cuda", 0, rtf=0.1), DeviceSlot("cpu", rtf=1.0)
+    durations = {"medium": 120, "long": 600}
+    scheduler = DeviceScheduler(durations, [fast, slow], durations.get)
+
+    assert scheduler.next_for(slow) is None  # Looks at both, takes neither
+    assert [scheduler.next_for(fast), scheduler.next_for(fast)] == ["long", "medium"]
+    assert scheduler.next_for(fast) is None
+    assert scheduler.done()
+
+
+def test_slow_slot_declines_what_fast_slots_finish_sooner():
+    fast, slow = DeviceSlot("cuda", 0, rtf=0.1), DeviceSlot("cpu", rtf=1.0)
+    durations = {"long": 600, "short": 5}
+    scheduler = DeviceScheduler(durations, [fast, slow], durations.get)
+
+    # The CPU would need 600s for the long one; the GPU gets through all 605s of media in 60.5s
+    assert scheduler.next_for(slow) == "short"
+    assert scheduler.next_for(slow) is None
+    assert not scheduler.done()
+    assert scheduler.next_for(fast) == "long"
+    assert scheduler.done()
+
+
+def test_unknown_durations_go_to_any_slot():
+    slow = DeviceSlot("cpu", rtf=1.0)
+    scheduler = DeviceScheduler(["a", "b"], [DeviceSlot("cuda", 0, rtf=0.1), slow], lambda item: None)
+    assert scheduler.next_for(slow) == "a"
+
+
+def test_pool_with_stub_workers_finishes_every_item(make_engine):
+    slots = [DeviceSlot("cuda", 0, rtf=0.1), DeviceSlot("cuda", 1, rtf=0.1), DeviceSlot("cpu", rtf=1.0)]
+    durations = {f"item{i}": duration for i, duration in enumerate([3, 300, 40, 1, 120, 2, 600, 10])}
+    ran = {}
+    ran_lock = threading.Lock()
+    engine = make_engine()
+    engine.is_processing = True
+
+    def process_item(worker_id, index, item):
+        slot = engine.worker_slots[worker_id]
+        time.sleep(durations[item] * slot.rtf / 1000)
+        with ran_lock:
+            ran.setdefault(item, []).append(slot.name)
+        return True
+
+    assert engine.run_worker_pool(durations, process_item, 1, total=len(durations), slots=slots,
+                                  duration_of=durations.get) == (len(durations), 0)
+    assert sorted(ran) == sorted(durations)
+    assert all(len(names) == 1 for names in ran.values())  # Every item ran exactly once
+    # The CPU never got a job that the GPUs would get through sooner
+    assert all(durations[item] < 120 for item, names in ran.items() if names == ["cpu"])
+    assert ran["item6"][0].startswith("cuda") and ran["item1"][0].startswith("cuda")
@@ -0,0 +1,121 @@
+"""Batch runs served by a JobCoordinator to worker agents (threads and a subprocess) running the fake transcriber."""
+import json
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from conftest import ROOT, fake_command
+from fixtures import make_corpus
+from job_coordinator import TOKEN_HEADER, JobCoordinator
+from worker_agent import WorkerAgent
+
+
+def test_two_agents_share_the_jobs(tmp_path, make_engine):
+    paths = make_corpus(tmp_path / "media", 8, 4096)
+    coordinator_log = []
+    engine = make_engine(workers=4)
+    engine.remote = JobCoordinator("127.0.0.1", 0, lease_seconds=30, log=coordinator_log.append).start()
+    agents = [WorkerAgent(engine.remote.url, make_engine(workers=2).settings, node=f"agent{i}", idle_exit=2)
+              for i in range(2)]
+    threads = [threading.Thread(target=agent.run, daemon=True) for agent in agents]
+    for thread in threads:
+        thread.start()
+    try:
+        assert engine.run_batch(tmp_path / "media") == (8, 0)
+    finally:
+        for agent in agents:
+            agent.stop()
+        for thread in threads:
+            thread.join(30)
+        engine.remote.close()
+
+    leased = [re.match(r"Job (\d+) leased to (agent\d)/\d$", message) for message in coordinator_log]
+    leased = [match.groups() for match in leased if match]
+    assert sorted(job_id for job_id, _ in leased) == sorted(str(i) for i in range(1, 9))  # Once each
+    for path in paths:
+        for output_format in engine.settings.output_formats:
+            assert (tmp_path / "output" / f"{path.stem}.{output_format}").is_file()
+    assert not any(thread.is_alive() for thread in threads)
+
+
+def test_agent_kills_job_whose_lease_was_lost(tmp_path, make_engine):
+    media = make_corpus(tmp_path / "media", 1, 4096)[0]
+    coordinator_log = []
+    agent_log = []
+    coordinator = JobCoordinator("127.0.0.1", 0, lease_seconds=3, log=coordinator_log.append).start()
+    wanted = threading.Event()
+    wanted.set()
+    waiting = threading.Thread(target=coordinator.transcribe, args=(media, tmp_path / "out"),
+                               kwargs={"is_running": wanted.is_set}, daemon=True)
+    waiting.start()
+    slow = make_engine(transcriber_command=fake_command(latency=60)).settings
+    agent = WorkerAgent(coordinator.url, slow, node="agent", idle_exit=1, on_log=agent_log.append)
+    thread = threading.Thread(target=agent.run, daemon=True)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 10
+        while not any("leased to" in message for message in coordinator_log) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.5)  # Let the transcriber start
+        wanted.clear()  # The job is withdrawn, so the next heartbeat is refused
+        started = time.monotonic()
+        thread.join(15)
+        assert not thread.is_alive()
+        assert time.monotonic() - started < 15  # The 60 s transcription did not run to the end
+        assert any("given up: its lease was lost" in message for message in agent_log)
+    finally:
+        agent.stop()
+        coordinator.close()
+
+
+def lease_status(url, token=None):
+    request = urllib.request.Request(f"{url}/lease", data=json.dumps({"node": "probe", "wait": 0}).encode(),
+                                     headers={TOKEN_HEADER: token} if token else {})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_subprocess_agent_with_generated_token(tmp_path, make_engine):
+    paths = make_corpus(tmp_path / "media", 3, 4096)
+    coordinator_log = []
+    engine = make_engine(workers=2)
+    engine.remote = JobCoordinator("0.0.0.0", 0, lease_seconds=30, log=coordinator_log.append).start()
+    url = f"http://127.0.0.1:{engine.remote.server.server_address[1]}"
+    token = engine.remote.token
+    assert token and any(f"--token {token}" in message for message in coordinator_log)
+    assert lease_status(url) == lease_status(url, "wrong") == 403
+
+    agent = subprocess.Popen(
+        [sys.executable, str(ROOT / "transcribe_cli.py"), "agent", url, "--token", token, "--node", "subprocess",
+         "--idle-exit", "2", "--device", "cpu", "--workers", "2", "--transcriber-command", fake_command(),
+         "--data-dir", str(tmp_path / "agent_data"), "--scratch-dir", str(tmp_path / "agent_scratch"),
+         "--no-cache", "--quiet"],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        assert engine.run_batch(tmp_path / "media") == (3, 0)
+        output, _ = agent.communicate(timeout=30)
+    finally:
+        if agent.poll() is None:
+            agent.kill()
+        engine.remote.close()
+
+    assert agent.returncode == 0, output
+    assert sum("leased to subprocess/" in message for message in coordinator_log) == 3
+    for path in paths:
+        assert (tmp_path / "output" / f"{path.stem}.txt").is_file()
+
+
+def test_loopback_coordinator_needs_no_token():
+    coordinator = JobCoordinator("127.0.0.1", 0).start()
+    try:
+        assert coordinator.token == ""
+        assert lease_status(coordinator.url) == 200
+    finally:
+        coordinator.close()
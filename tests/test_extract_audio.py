@@ -0,0 +1,89 @@
+"""Batch runs with extract_audio on: video files are demuxed by a stand-in ffmpeg (or the real one when installed)."""
+import shutil
+import subprocess
+
+import pytest
+
+import media_tools
+import transcribe_engine
+from fixtures import make_corpus
+from media_tools import VIDEO_EXTENSIONS, find_ffmpeg, read_header_duration
+
+
+def fake_ffmpeg(monkeypatch, returncode=0):
+    """Replace the ffmpeg call of extract_audio; returns the commands it was given"""
+    commands = []
+
+    def run_captured(cmd, timeout=None, track=None):
+        commands.append(cmd)
+        if returncode == 0:
+            with open(cmd[-1], "wb") as f:
+                f.write(b"extracted audio")
+        return subprocess.CompletedProcess(cmd, returncode, "", "" if returncode == 0 else "Invalid data found")
+
+    monkeypatch.setattr(transcribe_engine, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(media_tools, "run_captured", run_captured)
+    return commands
+
+
+def transcribed_name(tmp_path, path):
+    """Name of the file the fake transcriber was given for path (it writes it into every segment)"""
+    return (tmp_path / "output" / f"{path.stem}.txt").read_text(encoding="utf-8").split()[0]
+
+
+def test_batch_transcribes_extracted_audio_of_videos(tmp_path, make_engine, monkeypatch):
+    paths = make_corpus(tmp_path / "media", 5, 4096)
+    commands = fake_ffmpeg(monkeypatch)
+    engine = make_engine(workers=2, extract_audio=True, audio_format="opus")
+
+    assert engine.run_batch(tmp_path / "media") == (5, 0)
+    videos = [path for path in paths if path.suffix in VIDEO_EXTENSIONS]
+    assert sorted(cmd[cmd.index("-i") + 1] for cmd in commands) == sorted(str(path) for path in videos)
+    assert all(cmd[-3:] == ["-b:a", "32k", cmd[-1]] and cmd[-1].endswith("audio.opus") for cmd in commands)
+    for path in paths:
+        assert transcribed_name(tmp_path, path) == ("audio.opus" if path in videos else path.name)
+    assert not any((tmp_path / "scratch").iterdir())  # Extracted audio released with each job
+
+
+def test_failed_extraction_falls_back_to_original_file(tmp_path, make_engine, monkeypatch):
+    paths = make_corpus(tmp_path / "media", 2, 4096)  # An .mp3 and an .mp4
+    fake_ffmpeg(monkeypatch, returncode=1)
+    log = []
+    engine = make_engine(extract_audio=True)
+    engine.on_log = log.append
+
+    assert engine.run_batch(tmp_path / "media") == (2, 0)
+    assert any("Audio extraction failed for recording_00001.mp4" in line and "Invalid data found" in line
+               for line in log)
+    for path in paths:
+        assert transcribed_name(tmp_path, path) == path.name
+    assert not any((tmp_path / "scratch").iterdir())
+
+
+def test_batch_without_ffmpeg_transcribes_original_files(tmp_path, make_engine, monkeypatch):
+    paths = make_corpus(tmp_path / "media", 2, 4096)
+    monkeypatch.setattr(transcribe_engine, "find_ffmpeg", lambda: None)
+    log = []
+    engine = make_engine(extract_audio=True)
+    engine.on_log = log.append
+
+    assert engine.run_batch(tmp_path / "media") == (2, 0)
+    assert "ffmpeg not found on PATH, transcribing the original files" in log
+    assert [transcribed_name(tmp_path, path) for path in paths] == [path.name for path in paths]
+
+
+@pytest.mark.skipif(not find_ffmpeg(), reason="ffmpeg is not installed")
+def test_extract_batch_audio_with_real_ffmpeg(tmp_path, make_engine):
+    video = tmp_path / "clip.mp4"
+    subprocess.run([find_ffmpeg(), "-nostdin", "-loglevel", "error", "-f", "lavfi", "-i", "sine=duration=2",
+                    "-f", "lavfi", "-i", "color=size=64x64:duration=2", "-shortest", str(video)], check=True)
+    engine = make_engine(extract_audio=True)
+
+    audio, size, scratch_dir = engine.extract_batch_audio(video, find_ffmpeg(), "wav")
+    try:
+        assert audio.parent.parent == tmp_path / "scratch" and audio.suffix == ".wav"
+        assert size == audio.stat().st_size
+        assert read_header_duration(audio) == pytest.approx(2, abs=0.1)
+    finally:
+        shutil.rmtree(scratch_dir)
+    assert engine.extract_batch_audio(tmp_path / "voice.wav", find_ffmpeg(), "wav")[1:] == (0, None)
@@ -0,0 +1,108 @@
+"""FolderWatcher in polling mode: files are reported once settled, existing ones only when asked."""
+import threading
+import time
+
+from folder_watcher import FolderWatcher
+
+EXTENSIONS = {".mp4", ".wav"}
+
+
+def make_watcher(root, **options):
+    watcher = FolderWatcher(root, EXTENSIONS, **options)
+    watcher.uses_events = False  # Poll, whether or not watchdog is installed
+    return watcher
+
+
+def ready_names(watcher, now):
+    watcher._poll()
+    return sorted(entry.path.name for entry in watcher._collect_ready(now))
+
+
+def test_file_is_reported_once_settled(tmp_path):
+    watcher = make_watcher(tmp_path, settle_seconds=5)
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"first part")
+
+    assert ready_names(watcher, 100.0) == []  # Seen for the first time
+    assert ready_names(watcher, 104.0) == []  # Not unchanged for 5 s yet
+    with clip.open("ab") as f:
+        f.write(b", second part")  # Still being copied
+    assert ready_names(watcher, 106.0) == []
+    assert ready_names(watcher, 110.0) == []
+    assert ready_names(watcher, 111.0) == ["clip.mp4"]
+    assert ready_names(watcher, 200.0) == []  # Reported once
+
+
+def test_changed_file_is_reported_again(tmp_path):
+    watcher = make_watcher(tmp_path, settle_seconds=1)
+    clip = tmp_path / "clip.wav"
+    clip.write_bytes(b"take 1")
+    ready_names(watcher, 0.0)
+    assert ready_names(watcher, 2.0) == ["clip.wav"]
+
+    clip.write_bytes(b"take 2, longer")
+    ready_names(watcher, 10.0)
+    assert ready_names(watcher, 12.0) == ["clip.wav"]
+
+
+def test_snapshot_existing_skips_files_already_there(tmp_path):
+    (tmp_path / "old.mp4").write_bytes(b"old")
+    (tmp_path / "edited.mp4").write_bytes(b"old")
+    watcher = make_watcher(tmp_path, settle_seconds=1)
+    watcher.snapshot_existing()
+
+    (tmp_path / "new.mp4").write_bytes(b"new")
+    (tmp_path / "edited.mp4").write_bytes(b"edited")
+    ready_names(watcher, 0.0)
+    assert ready_names(watcher, 2.0) == ["edited.mp4", "new.mp4"]
+
+
+def test_existing_files_are_reported_without_snapshot(tmp_path):
+    (tmp_path / "old.mp4").write_bytes(b"old")
+    watcher = make_watcher(tmp_path, settle_seconds=1)
+    ready_names(watcher, 0.0)
+    assert ready_names(watcher, 2.0) == ["old.mp4"]
+
+
+def test_partial_temp_and_other_files_are_ignored(tmp_path):
+    for name in ["clip.mp4.part", "clip.mp4.crdownload", "clip.tmp", ".clip.mp4.Xy12Ab", "._clip.mp4",
+                 "~clip.mp4", "notes.txt", "clip.mp4"]:
+        (tmp_path / name).write_bytes(b"data")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "nested.mp4").write_bytes(b"data")
+    watcher = make_watcher(tmp_path, settle_seconds=1)
+
+    ready_names(watcher, 0.0)
+    assert ready_names(watcher, 2.0) == ["clip.mp4"]
+    watcher.notify(tmp_path / "._other.wav")  # Events are filtered the same way
+    watcher.notify(tmp_path / "sub" / "nested.mp4")
+    assert not watcher.pending
+
+
+def test_recursive_watch_reports_subfolder_files(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "nested.mp4").write_bytes(b"data")
+    watcher = make_watcher(tmp_path, recursive=True, settle_seconds=1)
+    watcher._poll()
+    watcher._collect_ready(0.0)
+    [entry] = watcher._collect_ready(2.0)
+    assert entry.path.name == "nested.mp4" and entry.relative_dir == "sub"
+
+
+def test_run_reports_new_files(tmp_path):
+    watcher = make_watcher(tmp_path, settle_seconds=0.2, poll_interval=0.05)
+    watcher.snapshot_existing()
+    found = []
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(found.append, lambda: not stop.is_set()), daemon=True)
+    thread.start()
+    try:
+        (tmp_path / "clip.mp4").write_bytes(b"data")
+        deadline = time.monotonic() + 5
+        while not found and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        thread.join(5)
+    assert [entry.path.name for entry in found] == ["clip.mp4"]
+    assert not thread.is_alive()
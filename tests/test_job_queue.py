@@ -0,0 +1,126 @@
+"""JobQueue ordering and state changes, and queued items taken up by a batch run in progress."""
+import threading
+
+from conftest import fake_command
+from fixtures import make_corpus
+from job_queue import CANCELLED, DONE, FILE, FOLDER, PAUSED, QUEUED, RUNNING, URL, JobQueue
+
+
+def claimed_targets(job_queue):
+    targets = []
+    while True:
+        item = job_queue.claim()
+        if item is None:
+            return targets
+        targets.append(item.target)
+
+
+def test_claim_by_priority_then_order(tmp_path):
+    job_queue = JobQueue(tmp_path / "queue.db")
+    for target, priority in [("a", 0), ("b", 1), ("c", 0), ("d", 1)]:
+        job_queue.add(FILE, target, priority)
+
+    assert claimed_targets(job_queue) == ["b", "d", "a", "c"]
+    assert all(item.state == RUNNING for item in job_queue.items())
+
+
+def test_claim_above_priority(tmp_path):
+    job_queue = JobQueue(tmp_path / "queue.db")
+    job_queue.add(FILE, "normal")
+    assert job_queue.claim(above_priority=0) is None
+    urgent = job_queue.add(URL, "urgent", priority=2)
+    assert job_queue.claim(above_priority=0).id == urgent
+    assert job_queue.claim().target == "normal"
+
+
+def test_move(tmp_path):
+    job_queue = JobQueue(tmp_path / "queue.db")
+    ids = [job_queue.add(FILE, target) for target in "abcd"]
+
+    assert job_queue.move(ids[3], -2)
+    assert [item.target for item in job_queue.items()] == ["a", "d", "b", "c"]
+    assert job_queue.move(ids[0], 3)
+    assert [item.target for item in job_queue.items()] == ["d", "b", "c", "a"]
+    assert not job_queue.move(ids[0], 1)  # Already last
+    assert claimed_targets(job_queue) == ["d", "b", "c", "a"]
+
+
+def test_move_takes_the_priority_of_its_neighbour(tmp_path):
+    job_queue = JobQueue(tmp_path / "queue.db")
+    low = job_queue.add(FILE, "low")
+    job_queue.add(FILE, "high", priority=1)
+
+    assert job_queue.move(low, -1)
+    assert job_queue.get(low).priority == 1
+    assert claimed_targets(job_queue) == ["low", "high"]
+
+
+def test_pause_and_resume(tmp_path):
+    job_queue = JobQueue(tmp_path / "queue.db")
+    first = job_queue.add(FILE, "a")
+    job_queue.add(FILE, "b")
+
+    assert job_queue.pause(first)
+    assert job_queue.state(first) == PAUSED
+    assert job_queue.claim().target == "b"
+    assert job_queue.claim() is None
+    assert job_queue.resume(first)
+    assert job_queue.claim().id == first
+    assert not job_queue.resume(first)  # Running, not paused
+
+
+def test_cancel(tmp_path):
+    job_queue = JobQueue(tmp_path / "queue.db")
+    queued = job_queue.add(FILE, "a")
+    running = job_queue.add(FILE, "b")
+    job_queue.pause(queued)
+    job_queue.resume(queued)
+    job_queue.move(running, -1)
+    job_queue.claim()
+
+    assert job_queue.cancel(queued) and job_queue.cancel(running)
+    assert job_queue.state(queued) == job_queue.state(running) == CANCELLED
+    assert job_queue.claim() is None
+    assert job_queue.items() == []
+    job_queue.finish(running, True)  # A run finishing the item afterwards does not revive it
+    assert job_queue.state(running) == CANCELLED
+    assert not job_queue.cancel(running)
+    job_queue.clear_finished()
+    assert job_queue.items(finished=True) == []
+
+
+def test_requeue(tmp_path):
+    job_queue = JobQueue(tmp_path / "queue.db")
+    item_id = job_queue.add(FILE, "a")
+    assert not job_queue.requeue(item_id)
+    job_queue.claim()
+    assert job_queue.requeue(item_id)
+    assert job_queue.state(item_id) == QUEUED
+    assert job_queue.claim().id == item_id
+
+
+def test_batch_run_takes_up_queued_items(tmp_path, make_engine):
+    make_corpus(tmp_path / "media", 6, 4096)
+    extra = [path.rename(path.with_name(f"extra_{path.name}")) for path in make_corpus(tmp_path / "extra", 2, 4096)]
+    engine = make_engine(workers=2, transcriber_command=fake_command(latency=0.5))
+    job_queue = engine.get_job_queue()
+    started = threading.Event()
+    engine.on_log = lambda message: "=== Processing" in message and started.set()
+    queued = {}
+
+    def queue_while_running():
+        started.wait(10)
+        queued["id"] = job_queue.add(FOLDER, str(tmp_path / "extra"))
+        queued["taken"] = engine.take_queue_items()
+
+    thread = threading.Thread(target=queue_while_running, daemon=True)
+    thread.start()
+    assert engine.run_batch(tmp_path / "media") == (6, 0)  # Queue items are not counted in the batch
+    thread.join(5)
+
+    assert queued["taken"]
+    assert job_queue.state(queued["id"]) == DONE
+    for path in extra:
+        assert (tmp_path / "output" / f"{path.stem}.txt").is_file()
+    assert engine.side_queue is None
+    assert not engine.take_queue_items()  # Nothing runs any more
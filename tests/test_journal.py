@@ -0,0 +1,73 @@
+"""JobJournal states, and runs resuming from it: done items are skipped unless the file or model changed."""
+from conftest import fake_command
+from fixtures import make_corpus
+from job_journal import CANCELLED, DONE, FAILED, PENDING, RUNNING, JobJournal
+
+
+def test_journal_states(tmp_path):
+    journal = JobJournal(tmp_path / "journal.db")
+    assert journal.open_run("run", "batch") == 0
+    journal.start("run", "a", "A", "v1")
+    journal.start("run", "b", "B", "v1")
+    journal.start("run", "c", "C", "v1")
+    journal.finish("run", "a", True)
+    journal.finish("run", "b", False, "boom")
+
+    assert journal.state("run", "a", "v1") == DONE
+    assert journal.state("run", "a", "v2") is None  # Recorded for another version
+    assert journal.state("run", "a") == DONE
+    assert journal.state("run", "b", "v1") == FAILED
+    assert journal.state("run", "c", "v1") == RUNNING
+    assert journal.state("other", "a", "v1") is None
+    assert journal.summary("run") == {DONE: 1, FAILED: 1, RUNNING: 1}
+
+    # A crash left c running: reopening the run makes it pending again
+    assert journal.open_run("run", "batch") == 1
+    assert journal.state("run", "c") == PENDING
+    journal.start("run", "c", "C", "v1")
+    journal.finish("run", "c", False, cancelled=True)
+    assert journal.state("run", "c") == CANCELLED
+
+
+def transcribed(log):
+    return sorted(line.split(": ")[-1].strip(" =") for line in log if "=== Processing file" in line)
+
+
+def test_resume_skips_done_files(tmp_path, make_engine):
+    paths = make_corpus(tmp_path / "media", 4, 4096)
+    assert make_engine(resume=True, workers=2).run_batch(tmp_path / "media") == (4, 0)
+
+    log = []
+    engine = make_engine(resume=True, workers=2)
+    engine.on_log = log.append
+    assert engine.run_batch(tmp_path / "media") == (0, 0)
+    assert any("All 4 files were already transcribed" in line for line in log)
+
+    paths[1].write_bytes(paths[1].read_bytes() + b"changed")  # A new version of one file is redone
+    log.clear()
+    assert engine.run_batch(tmp_path / "media") == (1, 0)
+    assert transcribed(log) == [paths[1].name]
+
+
+def test_model_change_forces_a_redo(tmp_path, make_engine):
+    paths = make_corpus(tmp_path / "media", 3, 4096)
+    assert make_engine(resume=True, model="tiny").run_batch(tmp_path / "media") == (3, 0)
+
+    log = []
+    engine = make_engine(resume=True, model="large-v3")
+    engine.on_log = log.append
+    assert engine.run_batch(tmp_path / "media") == (3, 0)
+    assert transcribed(log) == sorted(path.name for path in paths)
+
+
+def test_retry_failed_only(tmp_path, make_engine):
+    paths = make_corpus(tmp_path / "media", 5, 4096)
+    failing = make_engine(resume=True, transcriber_command=fake_command(options="--fail --fail-name 00003"))
+    assert failing.run_batch(tmp_path / "media") == (4, 1)
+
+    log = []
+    engine = make_engine(resume=True)
+    engine.on_log = log.append
+    assert engine.run_batch(tmp_path / "media", retry_failed_only=True) == (1, 0)
+    assert transcribed(log) == [paths[3].name]
+    assert engine.get_journal().summary(f"folder:{(tmp_path / 'media').resolve()}") == {DONE: 5}
@@ -0,0 +1,48 @@
+"""ffmpeg-free helpers of media_tools: duration probing and its cache."""
+import threading
+import time
+import wave
+
+from media_tools import DurationCache, media_file_duration
+
+
+def write_wav(path, seconds, rate=8000):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(1)
+        f.setframerate(rate)
+        f.writeframes(bytes(rate * seconds))
+    return path
+
+
+def test_media_file_duration_from_wav_header(tmp_path):
+    assert media_file_duration(write_wav(tmp_path / "a.wav", 3)) == 3
+    assert media_file_duration("https://www.youtube.com/watch?v=x") is None
+
+
+def test_duration_cache_probes_each_source_once():
+    probes = []
+
+    def slow_probe(source):
+        probes.append(source)
+        time.sleep(0.1)
+        return 42.0
+
+    cache = DurationCache(slow_probe)
+    assert cache.known("a") is None
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.duration("a"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [42.0] * 5
+    assert probes == ["a"]
+    assert cache.known("a") == 42.0
+
+
+def test_duration_cache_remembers_failed_probes():
+    calls = []
+    cache = DurationCache(lambda source: calls.append(source))
+    assert cache.duration("x") is None and cache.duration("x") is None
+    assert calls == ["x"]
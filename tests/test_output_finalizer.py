@@ -0,0 +1,138 @@
+"""Moving transcriber outputs into place, rendering missing formats from JSON, and reusing earlier outputs."""
+import json
+import os
+
+import pytest
+
+import output_finalizer
+from output_finalizer import finalize_outputs, reuse_outputs
+from subtitles import parse_srt, render_format
+
+RESULT = {"text": " Hello there. General Kenobi.", "language": "en",
+          "segments": [{"id": 0, "start": 0.0, "end": 1.5, "text": " Hello there."},
+                       {"id": 1, "start": 2.0, "end": 4.25, "text": " General Kenobi."}]}
+
+
+@pytest.fixture
+def scratch(tmp_path):
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    (scratch / "out.json").write_text(json.dumps(RESULT), encoding="utf-8")
+    return scratch
+
+
+def test_render_format():
+    assert render_format(RESULT, "txt") == "Hello there.\nGeneral Kenobi.\n"
+    assert parse_srt(render_format(RESULT, "srt")) == [(0.0, 1.5, "Hello there."), (2.0, 4.25, "General Kenobi.")]
+    vtt = render_format(RESULT, "vtt")
+    assert vtt.startswith("WEBVTT\n") and "00:00:02.000 --> 00:00:04.250\nGeneral Kenobi." in vtt
+    assert render_format(RESULT, "tsv") == "start\tend\ttext\n0\t1500\tHello there.\n2000\t4250\tGeneral Kenobi.\n"
+    assert json.loads(render_format(RESULT, "json")) == RESULT
+    with pytest.raises(ValueError):
+        render_format(RESULT, "docx")
+
+
+def test_finalize_moves_outputs_with_os_replace(tmp_path, scratch, monkeypatch):
+    (scratch / "out.txt").write_text("from the transcriber\n", encoding="utf-8")
+    replaced = []
+    real_replace = os.replace
+    monkeypatch.setattr(output_finalizer.os, "replace", lambda src, dest: (replaced.append((src, dest)),
+                                                                          real_replace(src, dest)))
+    output = tmp_path / "output"
+    output.mkdir()
+
+    created = finalize_outputs(scratch, "talk", output, ("txt", "json"), print)
+    assert created == [output / "talk.txt", output / "talk.json"]
+    assert replaced[0] == (scratch / "out.txt", output / "talk.txt")  # A rename, not a copy
+    assert (output / "talk.txt").read_text(encoding="utf-8") == "from the transcriber\n"
+    assert not (scratch / "out.txt").exists() and not (scratch / "out.json").exists()
+
+
+def test_finalize_copies_then_renames_across_volumes(tmp_path, scratch, monkeypatch):
+    (scratch / "out.txt").write_text("text\n", encoding="utf-8")
+    real_replace = os.replace
+
+    def replace(src, dest):
+        if os.path.dirname(src) != os.path.dirname(dest):
+            raise OSError(18, "Invalid cross-device link")
+        real_replace(src, dest)
+
+    monkeypatch.setattr(output_finalizer.os, "replace", replace)
+    output = tmp_path / "output"
+    output.mkdir()
+
+    assert finalize_outputs(scratch, "talk", output, ("txt",), print) == [output / "talk.txt"]
+    assert (output / "talk.txt").read_text(encoding="utf-8") == "text\n"
+    assert not (scratch / "out.txt").exists()
+    assert sorted(path.name for path in output.iterdir()) == ["talk.txt"]  # No .partial file left behind
+
+
+def test_finalize_renders_missing_formats_from_json(tmp_path, scratch):
+    output = tmp_path / "output"
+    output.mkdir()
+
+    created = finalize_outputs(scratch, "talk", output, ("json", "txt", "srt", "vtt"), print)
+    assert [path.name for path in created] == ["talk.txt", "talk.srt", "talk.vtt", "talk.json"]  # JSON moved last
+    for output_format in ("txt", "srt", "vtt"):
+        assert (output / f"talk.{output_format}").read_text(encoding="utf-8") == render_format(RESULT, output_format)
+    assert json.loads((output / "talk.json").read_text(encoding="utf-8")) == RESULT
+
+
+def test_finalize_reports_formats_it_cannot_provide(tmp_path):
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    (scratch / "out.txt").write_text("text\n", encoding="utf-8")
+    log = []
+
+    assert finalize_outputs(scratch, "talk", tmp_path, ("txt", "srt"), log.append) == [tmp_path / "talk.txt"]
+    assert any("No .srt output and no JSON result" in line for line in log)
+
+
+def test_reuse_copies_and_renders(tmp_path, scratch):
+    (scratch / "out.srt").write_text(render_format(RESULT, "srt"), encoding="utf-8")
+    sources = {"json": scratch / "out.json", "srt": scratch / "out.srt"}
+    output = tmp_path / "output"
+    output.mkdir()
+
+    placed = reuse_outputs(sources, "talk", output, ("srt", "txt"), print)
+    assert placed == [output / "talk.srt", output / "talk.txt"]
+    assert (output / "talk.txt").read_text(encoding="utf-8") == render_format(RESULT, "txt")
+    assert (scratch / "out.srt").is_file()  # Copied, not moved
+
+
+def test_reuse_links_when_asked(tmp_path, scratch):
+    output = tmp_path / "output"
+    output.mkdir()
+    assert reuse_outputs({"json": scratch / "out.json"}, "talk", output, ("json",), print, link=True)
+    assert os.path.samefile(output / "talk.json", scratch / "out.json")
+
+
+def test_reuse_leaves_files_already_in_place(tmp_path, scratch):
+    source = scratch / "out.json"
+    before = source.stat().st_mtime_ns
+    assert reuse_outputs({"json": source}, "out", scratch, ("json",), print) == [scratch / "out.json"]
+    assert source.stat().st_mtime_ns == before
+    assert sorted(path.name for path in scratch.iterdir()) == ["out.json"]
+
+
+def test_reuse_needs_json_for_missing_formats(tmp_path):
+    (tmp_path / "out.txt").write_text("text\n", encoding="utf-8")
+    assert reuse_outputs({"txt": tmp_path / "out.txt"}, "talk", tmp_path, ("txt", "srt"), print) == []
+
+
+def test_reuse_log_when_outputs_are_already_in_place(tmp_path, make_engine):
+    engine = make_engine()
+    output = tmp_path / "output"
+    output.mkdir()
+    (output / "Talk.txt").write_text("text\n", encoding="utf-8")
+    (output / "Talk.srt").write_text(render_format(RESULT, "srt"), encoding="utf-8")
+    engine.get_video_index().record("abc123", [output / "Talk.txt", output / "Talk.srt"])
+    log = []
+    engine.on_log = log.append
+
+    assert engine.reuse_video_outputs("abc123", output)
+    assert log == ["The outputs of the earlier transcription of abc123 are already in place"]
+    other = tmp_path / "other"
+    other.mkdir()
+    assert engine.reuse_video_outputs("abc123", other)
+    assert log[-1] == "Copied 2 output(s) of the earlier transcription of abc123"
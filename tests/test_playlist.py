@@ -0,0 +1,41 @@
+"""run_playlist against a stubbed YoutubeDL listing: titles come from the listing, which is read lazily."""
+import pytest
+
+from fixtures import make_stub_youtube_dl
+from transcribe_engine import PLAYLIST_SCHEDULING_WINDOW
+
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLtest"
+
+
+@pytest.mark.parametrize("workers, prefetch_depth", [(1, 0), (3, 2)])
+def test_playlist_titles_come_from_listing(tmp_path, make_engine, workers, prefetch_depth):
+    engine = make_engine(workers=workers, prefetch_depth=prefetch_depth)
+    engine.YoutubeDL = make_stub_youtube_dl(videos=5, download_bytes=1024, page_size=2)
+
+    assert engine.run_playlist(PLAYLIST_URL) == (5, 0)
+    for i in range(5):
+        assert (tmp_path / "output" / f"Synthetic video {i}.txt").is_file()
+
+    video_calls = [(url, download) for url, download in engine.YoutubeDL.calls if "list=" not in url]
+    # No metadata fetch per video; only the prefetch stage downloads, once per video
+    assert not [url for url, download in video_calls if not download]
+    assert len(video_calls) == (5 if prefetch_depth else 0)
+
+
+@pytest.mark.parametrize("workers, prefetch_depth", [(1, 0), (3, 2)])
+def test_playlist_pages_are_listed_lazily(tmp_path, make_engine, workers, prefetch_depth):
+    engine = make_engine(workers=workers, prefetch_depth=prefetch_depth)
+    engine.YoutubeDL = make_stub_youtube_dl(videos=500, download_bytes=64, page_size=20)
+    listed_at_start = []
+
+    def on_log(message):
+        if "=== Processing playlist video" in message and not listed_at_start:
+            listed_at_start.append(engine.YoutubeDL.listed)
+            engine.stop()
+
+    engine.on_log = on_log
+    engine.run_playlist(PLAYLIST_URL)
+    # The first job started after one scheduling window of entries, not after listing all 500
+    limit = (PLAYLIST_SCHEDULING_WINDOW if workers > 1 else 1) + prefetch_depth + 1
+    assert listed_at_start and listed_at_start[0] <= limit
+    assert engine.YoutubeDL.listed < 500  # Stopping the run left the later pages unread
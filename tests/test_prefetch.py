@@ -0,0 +1,102 @@
+"""PrefetchPipeline: how far ahead it prepares, its disk budget, and cleaning up on close."""
+import threading
+import time
+
+from prefetch import PrefetchPipeline
+
+
+class Preparer:
+    """prepare step writing size bytes per item into its own scratch folder under root"""
+
+    def __init__(self, root, size=100, fail=()):
+        self.root = root
+        self.size = size
+        self.fail = fail
+        self.prepared = []
+        self.lock = threading.Lock()
+
+    def __call__(self, item):
+        if item in self.fail:
+            raise RuntimeError(f"cannot prepare {item}")
+        scratch_dir = self.root / f"item{item}"
+        scratch_dir.mkdir(parents=True)
+        path = scratch_dir / "audio.opus"
+        path.write_bytes(bytes(self.size))
+        with self.lock:
+            self.prepared.append(item)
+        return path, self.size, scratch_dir
+
+    def wait_for(self, count, timeout=5):
+        deadline = time.monotonic() + timeout
+        while len(self.prepared) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.2)  # Give the producer the chance to go further than it should
+        return len(self.prepared)
+
+
+def test_items_arrive_in_order_with_errors(tmp_path):
+    prepare = Preparer(tmp_path, fail={2})
+    pipeline = PrefetchPipeline(range(4), prepare, depth=2).start()
+    consumed = []
+    for prefetched in pipeline:
+        consumed.append((prefetched.item, prefetched.path is not None, type(prefetched.error).__name__))
+        prefetched.release()
+    assert consumed == [(0, True, "NoneType"), (1, True, "NoneType"), (2, False, "RuntimeError"),
+                        (3, True, "NoneType")]
+    assert not any(tmp_path.iterdir())  # Released items deleted their scratch folders
+    assert pipeline.disk_used == 0
+
+
+def test_depth_bounds_the_items_prepared_ahead(tmp_path):
+    prepare = Preparer(tmp_path)
+    pipeline = PrefetchPipeline(range(10), prepare, depth=2).start()
+    try:
+        # Two wait in the queue and a third is ready to go in
+        assert prepare.wait_for(3) == 3
+        consumed = iter(pipeline)
+        next(consumed).release()
+        assert prepare.wait_for(4) == 4
+    finally:
+        pipeline.close()
+
+
+def test_producer_blocks_once_the_disk_budget_is_spent(tmp_path):
+    prepare = Preparer(tmp_path, size=100)
+    pipeline = PrefetchPipeline(range(10), prepare, depth=10, disk_budget=250).start()
+    try:
+        assert prepare.wait_for(3) == 3  # 300 bytes prepared; the budget of 250 is spent
+        assert pipeline.disk_used == 300
+        consumed = iter(pipeline)
+        first = next(consumed)
+        assert prepare.wait_for(4, timeout=0.3) == 3  # Consumed but still on disk
+        first.release()
+        assert prepare.wait_for(4) == 4  # Released, so 200 bytes are in use
+    finally:
+        pipeline.close()
+
+
+def test_close_drains_and_deletes_prepared_files(tmp_path):
+    prepare = Preparer(tmp_path)
+    pipeline = PrefetchPipeline(range(10), prepare, depth=3).start()
+    assert prepare.wait_for(4) == 4
+    assert len(list(tmp_path.iterdir())) == 4
+
+    pipeline.close()
+    assert not pipeline.thread.is_alive()
+    assert not any(tmp_path.iterdir())
+    assert pipeline.disk_used == 0
+    assert len(prepare.prepared) == 4  # Nothing more was prepared
+
+
+def test_stopped_run_ends_the_pipeline(tmp_path):
+    running = threading.Event()
+    running.set()
+    prepare = Preparer(tmp_path)
+    pipeline = PrefetchPipeline(range(10), prepare, depth=2, is_running=running.is_set).start()
+    assert prepare.wait_for(3) == 3
+    running.clear()
+    pipeline.thread.join(5)
+    assert not pipeline.thread.is_alive()
+    assert len(prepare.prepared) == 3
+    pipeline.close()
+    assert not any(tmp_path.iterdir())
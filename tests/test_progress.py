@@ -0,0 +1,31 @@
+"""parse_progress_line on the progress formats of the transcriber's output."""
+import pytest
+
+from transcribe_engine import parse_progress_line
+
+
+@pytest.mark.parametrize("line, duration, expected", [
+    # tqdm bars
+    (" 45%|####5     | 12/27 [00:10<00:12,  1.20it/s]", None, (45.0, "00:12")),
+    ("100%|##########| 27/27 [00:22<00:00,  1.21it/s]", None, (100.0, "00:00")),
+    (" 12%|#2        | 3000/25000 [01:02<1:14:31,  4.9frames/s]", None, (12.0, "1:14:31")),
+    (" 7%|7 | 1/14 [00:01<?, ?it/s]", None, (7.0, None)),
+    # Whisper's verbose segment lines, relative to the media duration
+    ("[01:02.000 --> 01:05.500]  And then we went home.", 131.0, (50.0, None)),
+    ("[1:00:00.000 --> 1:30:00.000]  Late in the recording.", 7200.0, (75.0, None)),
+    ("[01:02.000 --> 01:05.500]  Duration unknown.", None, None),
+    ("[10:00.000 --> 10:05.000]  Past the probed duration.", 300.0, (100.0, None)),
+    # yt-dlp downloads
+    ("[download]  12.3% of   45.67MiB at    1.23MiB/s ETA 00:34", None, (12.3, "00:34")),
+    ("[download]  56.0% of ~ 120.50MiB at  2.00MiB/s ETA 01:02:03 (frag 12/40)", None, (56.0, "01:02:03")),
+    ("[download]   0.1% of 45.67MiB at  Unknown B/s ETA Unknown", None, (0.1, None)),
+    ("[download] 100% of   45.67MiB in 00:00:12 at 3.71MiB/s", None, (100.0, None)),
+    # Anything else
+    ("[download] Destination: /tmp/video.webm", None, None),
+    ("Detected language: English", 60.0, None),
+    ("Loaded 95% of the things", None, None),
+    ("", 60.0, None),
+    ("\x1b[2K garbage %%% |||", None, None),
+])
+def test_parse_progress_line(line, duration, expected):
+    assert parse_progress_line(line, duration) == expected
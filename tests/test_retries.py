@@ -0,0 +1,30 @@
+"""Retries of failed transcriptions."""
+from conftest import fake_command
+from fixtures import make_corpus
+
+
+def test_timed_out_transcription_is_retried_with_a_longer_timeout(tmp_path, make_engine):
+    make_corpus(tmp_path / "media", 1, 4096)
+    engine = make_engine(max_retries=1, retry_backoff=0, transcriber_command=fake_command(latency=1.0))
+    timeouts = []
+
+    def run_transcriber_once(source, temp_path, worker_id, device, timeout, env=None):
+        timeouts.append(timeout)
+        return original(source, temp_path, worker_id, device, timeout, env)
+
+    original = engine.run_transcriber_once
+    engine.run_transcriber_once = run_transcriber_once
+    engine.transcription_timeout = lambda duration, device: 0.7  # The fake takes 1 s
+
+    assert engine.run_batch(tmp_path / "media") == (1, 0)
+    assert timeouts == [0.7, 1.4]
+
+
+def test_permanent_failure_is_not_retried(tmp_path, make_engine):
+    make_corpus(tmp_path / "media", 1, 4096)
+    log = []
+    engine = make_engine(max_retries=2, retry_backoff=0, transcriber_command=fake_command(options="--fail"))
+    engine.on_log = log.append
+
+    assert engine.run_batch(tmp_path / "media") == (0, 1)
+    assert not any("retrying" in line for line in log)
@@ -0,0 +1,80 @@
+"""RunMetrics totals and their JSON and CSV exports."""
+import csv
+import json
+
+from fixtures import make_corpus
+from run_metrics import RunMetrics
+
+
+def two_job_metrics():
+    metrics = RunMetrics("batch")
+    metrics.add(None, "metadata", 0.5)  # Run-level work, e.g. listing a playlist
+    metrics.add("a.mp3", "transcription", 30.0, 3_000_000)
+    metrics.add("a.mp3", "move", 0.25, 1000)
+    metrics.set_duration("a.mp3", 60)
+    metrics.finish_job("a.mp3", True, "a.mp3")
+    metrics.add("https://youtu.be/b", "download", 2.0, 4_000_000)
+    metrics.add("https://youtu.be/b", "transcription", 10.0)
+    metrics.add("https://youtu.be/b", "transcription", 5.0)  # A retry adds to the stage
+    metrics.set_duration("https://youtu.be/b", 30)
+    metrics.finish_job("https://youtu.be/b", False, "Video B")
+    metrics.finish()
+    return metrics
+
+
+def test_summary_totals():
+    rows = {row["stage"]: row for row in two_job_metrics().summary()}
+    assert list(rows) == ["metadata", "download", "transcription", "move"]  # In pipeline order
+    transcription = rows["transcription"]
+    assert (transcription["jobs"], transcription["seconds"], transcription["mean_s"]) == (2, 45.0, 22.5)
+    assert transcription["bytes"] == 3_000_000
+    assert transcription["rtf"] == 0.5  # 45 s for 90 s of media
+    assert transcription["mb_per_s"] == round(3_000_000 / 45 / 1e6, 2)
+    assert rows["metadata"]["jobs"] == 0 and rows["metadata"]["mean_s"] is None
+    assert rows["download"]["mb_per_s"] == 2.0
+
+
+def test_export_json_and_csv(tmp_path):
+    metrics = two_job_metrics()
+    json_path = metrics.export(tmp_path / "metrics")
+    assert json_path.name.startswith("run-") and json_path.name.endswith("-batch.json")
+
+    report = json.loads(json_path.read_text(encoding="utf-8"))
+    assert report["kind"] == "batch" and report["finished"] >= report["started"]
+    assert report["summary"] == json.loads(json.dumps(metrics.summary()))
+    jobs = {job["key"]: job for job in report["jobs"]}
+    assert jobs["a.mp3"]["ok"] is True and jobs["a.mp3"]["duration"] == 60
+    assert jobs["https://youtu.be/b"]["label"] == "Video B"
+    assert jobs["https://youtu.be/b"]["stages"]["transcription"] == {"seconds": 15.0, "bytes": None}
+
+    with open(json_path.with_suffix(".csv"), newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["job"], row["stage"]) for row in rows] == [
+        ("a.mp3", "transcription"), ("a.mp3", "move"), ("Video B", "download"), ("Video B", "transcription"),
+        ("", "metadata")]
+    assert rows[0] == {"job": "a.mp3", "ok": "True", "media_seconds": "60", "stage": "transcription",
+                       "seconds": "30.0", "bytes": "3000000", "rtf": "0.5"}
+    assert rows[3]["ok"] == "False" and rows[3]["bytes"] == "" and rows[3]["rtf"] == "0.5"
+    assert rows[4]["ok"] == rows[4]["media_seconds"] == rows[4]["rtf"] == ""
+    assert sum(float(row["seconds"]) for row in rows) == 47.75
+
+
+def test_stage_times_the_block():
+    metrics = RunMetrics("file")
+    with metrics.stage("job", "move") as stage:
+        stage.bytes = 42
+    [row] = metrics.summary()
+    assert row["stage"] == "move" and row["bytes"] == 42 and row["seconds"] >= 0
+
+
+def test_batch_run_exports_its_metrics(tmp_path, make_engine):
+    make_corpus(tmp_path / "media", 2, 4096)
+    engine = make_engine(export_metrics=True)
+    assert engine.run_batch(tmp_path / "media") == (2, 0)
+
+    [json_path] = (tmp_path / "data" / "metrics").glob("*.json")
+    report = json.loads(json_path.read_text(encoding="utf-8"))
+    assert len(report["jobs"]) == 2 and all(job["ok"] for job in report["jobs"])
+    stages = {row["stage"]: row for row in report["summary"]}
+    assert stages["transcription"]["jobs"] == 2
+    assert json_path.with_suffix(".csv").is_file()
@@ -0,0 +1,101 @@
+"""longest_first_window ordering and EtaEstimator predictions, on a fake clock."""
+import pytest
+
+import scheduling
+from scheduling import EtaEstimator, format_eta, longest_first_window
+
+
+def test_longest_first_within_each_window():
+    durations = {"a": 10, "b": 50, "c": 30, "d": 5, "e": 60, "f": 20}
+    assert list(longest_first_window("abcdef", durations.get, 3)) == ["b", "c", "e", "f", "a", "d"]
+
+
+def test_longest_first_window_is_lazy():
+    pulled = []
+
+    def source():
+        for item, duration in [("a", 1), ("b", 3), ("c", 2), ("d", 9)]:
+            pulled.append(item)
+            yield item, duration
+
+    ordered = longest_first_window(source(), lambda item: item[1], 2)
+    assert next(ordered) == ("b", 3)
+    assert pulled == ["a", "b"]  # The first item went out as soon as a window was known
+    assert [item for item, _ in ordered] == ["c", "d", "a"]
+
+
+def test_longest_first_window_unknown_durations_go_last_in_order():
+    durations = {"b": 5}
+    assert list(longest_first_window("abcd", durations.get, 10)) == ["b", "a", "c", "d"]
+    assert list(longest_first_window("abcd", durations.get, 1)) == ["a", "b", "c", "d"]  # No look-ahead
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(scheduling.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_eta_from_history_then_measured_rtf(clock):
+    eta = EtaEstimator(workers=2, realtime_factor=0.5)
+    for key in "abcd":
+        eta.add(key, 100)
+    assert eta.remaining() == 100  # 4 * 50 s at the device's historic speed, on 2 workers
+    assert eta.progress() == 0
+
+    eta.start("a")
+    eta.start("b")
+    clock[0] += 20
+    assert eta.remaining() == 80  # (30 + 30 + 50 + 50) / 2
+
+    clock[0] += 80  # a and b took 100 s for 100 s of media: the measured rtf is 1.0
+    eta.finish("a")
+    eta.finish("b")
+    assert eta.realtime_factor() == 1.0
+    assert eta.remaining() == 100  # (100 + 100) / 2 at the measured speed
+    assert eta.progress() == 50
+    assert eta.queued_media() == 200
+
+    eta.start("c")
+    eta.start("d")
+    clock[0] += 60
+    assert eta.remaining() == 40
+    assert eta.queued_media() == 0
+    eta.finish("c")
+    eta.finish("d")
+    assert eta.remaining() is None and eta.progress() == 100
+
+
+def test_eta_is_bounded_by_the_longest_item(clock):
+    eta = EtaEstimator(workers=4, realtime_factor=1.0)
+    eta.add("long", 400)
+    eta.add("short", 40)
+    assert eta.remaining() == 400  # Not 440 / 4
+
+
+def test_failed_items_are_not_measured(clock):
+    eta = EtaEstimator(workers=1, realtime_factor=0.5)
+    eta.add("a", 100)
+    eta.add("b", 100)
+    eta.start("a")
+    clock[0] += 5  # Failed almost at once
+    eta.finish("a", ok=False)
+    assert eta.realtime_factor() == 0.5
+    assert eta.remaining() == 50
+
+
+def test_eta_with_unknown_durations(clock):
+    eta = EtaEstimator(workers=1)
+    eta.add("a", None)
+    eta.add("b", 60)
+    assert eta.remaining() is None  # No realtime factor yet
+    assert eta.progress() is None  # Unknown share of the work
+    eta.add("b", 60)  # Registered once only
+    eta.finish("b")
+    eta.add("b", 60)  # Finished items stay finished
+    assert eta.queued_media() == 0
+
+
+def test_format_eta():
+    assert [format_eta(s) for s in (0, 59.6, 61, 3600, 3725)] == ["0:00", "1:00", "1:01", "1:00:00", "1:02:05"]
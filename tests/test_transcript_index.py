@@ -0,0 +1,92 @@
+"""TranscriptIndex search, with FTS5 and with the plain-table LIKE fallback."""
+import pytest
+
+from subtitles import format_srt
+from transcript_index import TranscriptIndex, fts5_available
+
+CUES = [(0.0, 2.0, "Welcome to the weekly meeting."),
+        (2.0, 5.0, "First the budget for the new building."),
+        (65.0, 70.0, "We spent 100% of it on coffee_beans.")]
+
+
+@pytest.fixture(params=[True, False], ids=["fts5", "like"])
+def index(request, tmp_path):
+    index = TranscriptIndex(tmp_path / "transcripts.db", full_text=request.param)
+    if request.param and not index.full_text:
+        pytest.skip("SQLite was built without FTS5")
+    return index
+
+
+def write_transcript(folder, name, cues):
+    folder.mkdir(parents=True, exist_ok=True)
+    srt = folder / f"{name}.srt"
+    srt.write_text(format_srt(cues), encoding="utf-8")
+    txt = folder / f"{name}.txt"
+    txt.write_text("".join(f"{text}\n" for _, _, text in cues), encoding="utf-8")
+    return [txt, srt]
+
+
+def test_add_and_search(tmp_path, index):
+    paths = write_transcript(tmp_path, "meeting", CUES)
+    assert index.add(paths, "https://www.youtube.com/watch?v=abc") == 3
+    assert index.count() == 1
+
+    [hit] = index.search("budget")
+    assert hit.path == paths[1].resolve()  # The SRT is indexed, for its timing
+    assert (hit.start, hit.end, hit.timestamp) == (2.0, 5.0, "00:00:02")
+    assert "[budget]" in hit.snippet
+    assert hit.link() == "https://www.youtube.com/watch?v=abc&t=2s"
+
+    assert [h.start for h in index.search('"new building"')] == [2.0]
+    assert index.search('"building new"') == []
+    assert [h.start for h in index.search("budg*")] == [2.0]
+    assert [h.start for h in index.search("weekly welcome")] == [0.0]  # Every word, in any order
+    assert index.search("weekly budget") == []
+    assert [h.start for h in index.search("coffee?!")] == [65.0]  # Punctuation is not query syntax
+    assert index.search("   ") == []
+
+
+def test_like_wildcards_are_literal(tmp_path):
+    index = TranscriptIndex(tmp_path / "transcripts.db", full_text=False)
+    index.add(write_transcript(tmp_path, "meeting", CUES))
+    assert [h.start for h in index.search('"100%"')] == [65.0]
+    assert [h.start for h in index.search("coffee_beans")] == [65.0]
+    assert index.search("coffee%beans") == []
+    assert index.search("e_k") == []  # Would match "weekly" if _ were a wildcard
+
+
+def test_readding_replaces_the_transcript(tmp_path, index):
+    paths = write_transcript(tmp_path, "meeting", CUES)
+    index.add(paths)
+    write_transcript(tmp_path, "meeting", [(0.0, 1.0, "Budget approved.")])
+    assert index.add(paths) == 1
+    assert index.count() == 1
+    assert [h.snippet for h in index.search("budget")] == ["[Budget] approved."]
+
+
+def test_missing_transcripts_are_dropped(tmp_path, index):
+    kept = write_transcript(tmp_path, "kept", CUES)
+    gone = write_transcript(tmp_path, "gone", CUES)
+    index.add(kept)
+    index.add(gone)
+    assert len(index.search("budget")) == 2
+
+    for path in gone:
+        path.unlink()
+    assert [hit.path for hit in index.search("budget")] == [kept[1].resolve()]
+    assert index.count() == 1
+
+
+def test_add_folder_skips_unchanged(tmp_path, index):
+    write_transcript(tmp_path / "out", "one", CUES)
+    write_transcript(tmp_path / "out" / "sub", "two", CUES[:1])
+    assert index.add_folder(tmp_path / "out") == (2, 0)
+    assert index.add_folder(tmp_path / "out") == (0, 2)
+    assert index.add_folder(tmp_path / "out", recursive=False) == (0, 1)
+    assert len(index.search("welcome")) == 2
+
+
+def test_fts5_detection(tmp_path):
+    index = TranscriptIndex(tmp_path / "transcripts.db")
+    assert index.full_text == fts5_available(index.db)
+    assert TranscriptIndex(tmp_path / "plain.db", full_text=False).cues_table == "plain_cues"
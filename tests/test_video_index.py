@@ -0,0 +1,97 @@
+"""VideoIndex, and playlists reusing the outputs of videos transcribed before instead of redoing them."""
+import os
+import time
+
+from fixtures import make_stub_youtube_dl
+from video_index import VideoIndex
+
+FIRST = "https://www.youtube.com/playlist?list=PLfirst"
+SECOND = "https://www.youtube.com/playlist?list=PLsecond"
+
+
+def test_outputs_are_newest_first_and_must_exist(tmp_path):
+    index = VideoIndex(tmp_path / "videos.db")
+    old, new, gone = tmp_path / "old.txt", tmp_path / "new.txt", tmp_path / "gone.srt"
+    for path in (old, new, gone):
+        path.write_text("text", encoding="utf-8")
+    index.record("abc", [old, gone])
+    time.sleep(0.01)
+    index.record("abc", [new])
+    gone.unlink()
+
+    assert index.outputs("abc") == {"txt": new.resolve()}
+    assert index.outputs("unknown") == {}
+
+
+def transcribed(log):
+    return sum("=== Processing playlist video" in line for line in log)
+
+
+def run_playlist(make_engine, url, YoutubeDL, **options):
+    log = []
+    engine = make_engine(prefetch_depth=0, **options)
+    engine.YoutubeDL = YoutubeDL
+    engine.on_log = log.append
+    return engine.run_playlist(url), log
+
+
+def test_duplicate_in_one_playlist_is_transcribed_once(tmp_path, make_engine):
+    stub = make_stub_youtube_dl(videos=3, download_bytes=64)
+
+    class RepeatingYoutubeDL(stub):
+        def playlist_pages(self):
+            entries = list(super().playlist_pages())
+            yield from entries + entries[:2]
+
+    result, log = run_playlist(make_engine, FIRST, RepeatingYoutubeDL, workers=2)
+    assert result == (3, 0)
+    assert transcribed(log) == 3
+    assert sorted(path.name for path in (tmp_path / "output").glob("*.txt")) == [
+        f"Synthetic video {i}.txt" for i in range(3)]
+
+
+def test_second_playlist_copies_shared_videos(tmp_path, make_engine):
+    stub = make_stub_youtube_dl(videos=3, download_bytes=64)
+    assert run_playlist(make_engine, FIRST, stub)[0] == (3, 0)
+
+    result, log = run_playlist(make_engine, SECOND, stub, output_folder=str(tmp_path / "second"))
+    assert result == (3, 0)
+    assert transcribed(log) == 0
+    assert sum(line.startswith("Copied 2 output(s)") for line in log) == 3
+    for i in range(3):
+        copied = tmp_path / "second" / f"Synthetic video {i}.txt"
+        assert copied.read_text(encoding="utf-8") == (tmp_path / "output" / copied.name).read_text(encoding="utf-8")
+        assert not os.path.samefile(copied, tmp_path / "output" / copied.name)
+
+
+def test_second_playlist_links_shared_videos(tmp_path, make_engine):
+    stub = make_stub_youtube_dl(videos=2, download_bytes=64)
+    run_playlist(make_engine, FIRST, stub)
+
+    result, log = run_playlist(make_engine, SECOND, stub, output_folder=str(tmp_path / "second"), reuse_videos="link")
+    assert result == (2, 0) and transcribed(log) == 0
+    name = "Synthetic video 0.srt"
+    assert os.path.samefile(tmp_path / "second" / name, tmp_path / "output" / name)
+
+
+def test_stale_index_rows_are_transcribed_again(tmp_path, make_engine):
+    stub = make_stub_youtube_dl(videos=3, download_bytes=64)
+    run_playlist(make_engine, FIRST, stub)
+    for path in (tmp_path / "output").glob("Synthetic video 1.*"):
+        path.unlink()  # The outputs the index points to are gone
+
+    result, log = run_playlist(make_engine, SECOND, stub, output_folder=str(tmp_path / "second"))
+    assert result == (3, 0)
+    assert transcribed(log) == 1
+    assert (tmp_path / "second" / "Synthetic video 1.txt").is_file()
+    # The index now points at the new outputs
+    outputs = make_engine().get_video_index().outputs("video00001")
+    assert outputs["txt"] == (tmp_path / "second" / "Synthetic video 1.txt").resolve()
+
+
+def test_reuse_off_transcribes_again(tmp_path, make_engine):
+    stub = make_stub_youtube_dl(videos=2, download_bytes=64)
+    run_playlist(make_engine, FIRST, stub)
+
+    result, log = run_playlist(make_engine, SECOND, stub, reuse_videos="off")
+    assert result == (2, 0) and transcribed(log) == 2
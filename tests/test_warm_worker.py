@@ -0,0 +1,30 @@
+"""Warm workers: one model load per pool worker, reused for every file of a run."""
+import os
+
+import pytest
+
+from conftest import fake_worker_command
+from fixtures import make_corpus
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_warm_worker_loads_model_once_per_worker(tmp_path, make_engine, workers):
+    paths = make_corpus(tmp_path / "media", 6, 4096)
+    log = []
+    engine = make_engine(workers=workers, warm_worker=True, worker_command=fake_worker_command())
+    engine.on_log = log.append
+
+    assert engine.run_batch(tmp_path / "media") == (6, 0)
+    for path in paths:
+        for output_format in engine.settings.output_formats:
+            assert (tmp_path / "output" / f"{path.stem}.{output_format}").is_file()
+    starts = [line for line in log if line.startswith("Starting warm worker")]
+    assert 1 <= len(starts) <= workers
+    assert not engine.warm_workers  # Shut down at the end of the run
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Windows runs the worker through a batch file")
+def test_warm_worker_command_default(make_engine, tmp_path):
+    engine = make_engine()
+    command = engine.warm_worker_command(tmp_path, "cpu")
+    assert command[1].endswith("transcribe_worker.py") and command[-2:] == ["--device", "cpu"]
@@ -0,0 +1,28 @@
+"""Video IDs and playlist URLs recognised in the forms YouTube links come in."""
+import pytest
+
+from transcribe_engine import canonicalize_playlist_url, extract_youtube_id
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL123&index=2",
+    "https://youtu.be/dQw4w9WgXcQ?t=42",
+    "https://www.youtube.com/embed/dQw4w9WgXcQ",
+    "https://www.youtube.com/v/dQw4w9WgXcQ",
+    "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+    "https://m.youtube.com/shorts/dQw4w9WgXcQ?feature=share",
+    "https://www.youtube.com/live/dQw4w9WgXcQ?si=abc",
+])
+def test_extract_youtube_id(url):
+    assert extract_youtube_id(url) == "dQw4w9WgXcQ"
+
+
+def test_extract_youtube_id_of_other_urls():
+    assert extract_youtube_id("https://www.youtube.com/@channel/shorts") is None
+    assert extract_youtube_id("https://example.com/video.mp4") is None
+
+
+def test_canonicalize_playlist_url():
+    assert (canonicalize_playlist_url("https://www.youtube.com/watch?v=x&list=PL_a-1")
+            == "https://www.youtube.com/playlist?list=PL_a-1")
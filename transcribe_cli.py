@@ -0,0 +1,413 @@
+"""Command line and daemon entry point for headless servers (cron, systemd).
+
+Runs the same TranscribeEngine as the GUI without importing tkinter:
+
+    python transcribe_cli.py batch "D:/Recordings" --recursive --workers 2
+    python transcribe_cli.py batch "D:/Recordings" --devices cuda:0,cuda:1,cpu*2
+    python transcribe_cli.py file talk.mp4 --device cpu --model small
+    python transcribe_cli.py url "https://youtu.be/..." --output-dir transcripts
+    python transcribe_cli.py playlist "https://www.youtube.com/playlist?list=..." "https://www.youtube.com/@channel"
+    python transcribe_cli.py watch "D:/Inbox" --settle-seconds 30    # runs until stopped
+
+Transcription can be spread over several machines: a run started with --serve
+hands its transcriptions to worker agents, which run until stopped:
+
+    python transcribe_cli.py batch "D:/Recordings" --serve 0.0.0.0:8765 --workers 8 --token secret
+    python transcribe_cli.py agent http://coordinator:8765 --device cuda --workers 2 --token secret
+
+A persistent queue takes folders, files, URLs and playlists, also while a
+"queue run" is draining it (higher --priority goes first):
+
+    python transcribe_cli.py queue run --devices cuda:0,cpu*2          # runs until stopped
+    python transcribe_cli.py queue add folder "D:/Recordings"
+    python transcribe_cli.py queue add playlist "https://www.youtube.com/playlist?list=..." --priority 5
+    python transcribe_cli.py queue list
+    python transcribe_cli.py queue pause 3
+
+Finished transcripts are indexed for full-text search (older ones with "index"):
+
+    python transcribe_cli.py search "quarterly budget"
+    python transcribe_cli.py index "D:/Recordings" --recursive
+
+Exits with 0 when every item succeeded, 1 when some failed or the run could
+not start, 2 on invalid arguments (search: 1 when nothing was found).
+SIGINT/SIGTERM finish the items in progress and then stop; a second signal
+kills the transcriptions in progress and journals their items as cancelled.
+"""
+import argparse
+import logging
+import logging.handlers
+import signal
+import sys
+import time
+from pathlib import Path
+
+from device_pool import parse_device_spec
+from job_coordinator import DEFAULT_PORT, JobCoordinator, parse_address
+from job_queue import FILE, FOLDER, KINDS, PLAYLIST, URL, JobQueue
+from media_tools import AUDIO_FORMATS
+from subtitles import OUTPUT_FORMATS
+from transcript_index import TranscriptIndex
+from transcribe_engine import (APP_DATA_DIR, DEVICES, REUSE_MODES, TRANSCRIBE_ANYTHING_DIR, WHISPER_MODELS,
+                               EngineSettings, TranscribeEngine, validate_youtube_url)
+from worker_agent import WorkerAgent
+
+logger = logging.getLogger("transcribe_cli")
+
+REUSE_HELP = ("videos transcribed before, in any playlist or run: copy or link their outputs here, "
+              "skip them, or transcribe them again (off)")
+
+
+def parse_formats(value):
+    formats = tuple(dict.fromkeys(f.strip().lstrip(".").lower() for f in value.split(",") if f.strip()))
+    unknown = [f for f in formats if f not in OUTPUT_FORMATS]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(f"choose from {', '.join(OUTPUT_FORMATS)}")
+    return formats
+
+
+def parse_devices(value):
+    try:
+        parse_device_spec(value, DEVICES)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def parse_serve_address(value):
+    try:
+        return parse_address(value, default_host="0.0.0.0")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected [host:]port, e.g. 0.0.0.0:{DEFAULT_PORT}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Transcribe files, folders and YouTube videos with transcribe-anything")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--device", choices=DEVICES, default="cuda")
+    common.add_argument("--model", choices=WHISPER_MODELS, default="default")
+    common.add_argument("--workers", type=int, default=1, help="parallel transcription workers")
+    common.add_argument("--devices", type=parse_devices, default="",
+                        help="run one worker per listed device at once, e.g. cuda:0,cuda:1,cpu*2 "
+                             "(replaces --device and --workers; long media goes to the fastest devices)")
+    common.add_argument("--in-order", action="store_true",
+                        help="keep folder/playlist order instead of starting the longest media first")
+    common.add_argument("--warm", action="store_true", help="keep the model loaded between files")
+    common.add_argument("--output-dir", help="write outputs here instead of next to the input")
+    common.add_argument("--formats", type=parse_formats, default=("txt", "srt"),
+                        help=f"comma-separated output formats out of {','.join(OUTPUT_FORMATS)} (default: txt,srt)")
+    common.add_argument("--scratch-dir", default="",
+                        help="work folder for transcriber output; on the output volume, outputs are renamed "
+                             "into place instead of copied")
+    common.add_argument("--no-cache", action="store_true", help="do not reuse cached transcripts")
+    common.add_argument("--cache-limit-mb", type=int, default=2048)
+    common.add_argument("--no-resume", action="store_true", help="redo items the journal records as done")
+    common.add_argument("--retries", type=int, default=2, help="extra attempts for network and GPU memory errors")
+    common.add_argument("--retry-backoff", type=float, default=10,
+                        help="seconds before the first retry, doubled for every further one")
+    common.add_argument("--cpu-fallback", action="store_true", help="redo a job on the CPU when the GPU runs out of memory")
+    common.add_argument("--long-files", action="store_true", help="split long recordings at silences")
+    common.add_argument("--chunk-minutes", type=int, default=10)
+    common.add_argument("--transcriber-dir", default=TRANSCRIBE_ANYTHING_DIR,
+                        help="folder holding the transcribe-anything virtualenv")
+    common.add_argument("--transcriber-command", default="",
+                        help="command to run instead of transcribe-anything in its virtualenv, e.g. "
+                             "'transcribe-anything {source} --device {device} --output_dir {output_dir}'")
+    common.add_argument("--worker-command", default="",
+                        help="command starting the --warm worker instead of transcribe_worker.py in the "
+                             "virtualenv, e.g. 'python {script} --device {device} --model {model}'")
+    common.add_argument("--data-dir", default=str(APP_DATA_DIR), help="folder for the journal, cache and logs")
+    common.add_argument("--metrics", help="also write the run's stage timings to this .json or .csv file")
+    common.add_argument("--log-file", action="store_true", help="also log to the logs folder of the data dir")
+    common.add_argument("--quiet", action="store_true", help="only log warnings and the final results")
+    common.add_argument("--token", default="", help="shared secret between --serve and its worker agents "
+                             "(generated and logged when --serve is not on a loopback address)")
+
+    serving = argparse.ArgumentParser(add_help=False)
+    serving.add_argument("--serve", type=parse_serve_address, metavar="[HOST:]PORT",
+                         help="hand the transcriptions to worker agents (the agent command) connecting here; "
+                              "--workers then sets how many jobs are handed out at once")
+    serving.add_argument("--lease-seconds", type=int, default=60,
+                         help="how long an agent may go without a heartbeat before its job is handed out again")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", parents=[common, serving], help="transcribe all media files in a folder")
+    batch.add_argument("folder")
+    batch.add_argument("--recursive", action="store_true", help="include subfolders")
+    batch.add_argument("--extract-audio", choices=sorted(AUDIO_FORMATS),
+                       help="pre-extract 16 kHz mono audio from videos in this format")
+    batch.add_argument("--retry-failed", action="store_true", help="only redo files that failed last time")
+
+    single = commands.add_parser("file", parents=[common, serving], help="transcribe one media file")
+    single.add_argument("path")
+
+    url = commands.add_parser("url", parents=[common, serving], help="transcribe one YouTube video")
+    url.add_argument("url")
+    url.add_argument("--reuse-videos", choices=REUSE_MODES, default="copy", help=REUSE_HELP)
+
+    playlist = commands.add_parser("playlist", parents=[common, serving],
+                                   help="transcribe every video of playlists or channels")
+    playlist.add_argument("urls", nargs="+", metavar="url", help="playlist or channel URLs, processed in one run")
+    playlist.add_argument("--reuse-videos", choices=REUSE_MODES, default="copy", help=REUSE_HELP)
+    playlist.add_argument("--prefetch", type=int, default=2, help="videos downloaded ahead of transcription")
+    playlist.add_argument("--prefetch-budget-mb", type=int, default=4096)
+    playlist.add_argument("--retry-failed", action="store_true", help="only redo videos that failed last time")
+
+    watch = commands.add_parser("watch", parents=[common, serving], help="transcribe files as they appear in a folder")
+    watch.add_argument("folder")
+    watch.add_argument("--recursive", action="store_true", help="include subfolders")
+    watch.add_argument("--existing", action="store_true", help="also process files already in the folder")
+    watch.add_argument("--settle-seconds", type=int, default=10,
+                       help="seconds a file must stay unchanged before it is picked up")
+
+    agent = commands.add_parser("agent", parents=[common],
+                                help="transcribe jobs handed out by a run started with --serve, until stopped")
+    agent.add_argument("server", help="URL of the serving run, e.g. http://coordinator:8765")
+    agent.add_argument("--node", help="name of this agent in the coordinator's log (default: host name)")
+    agent.add_argument("--idle-exit", type=int, default=0,
+                       help="stop after this many seconds without a job (default: keep running)")
+
+    index_data = argparse.ArgumentParser(add_help=False)
+    index_data.add_argument("--data-dir", default=str(APP_DATA_DIR), help="folder holding the search index")
+
+    search = commands.add_parser("search", parents=[index_data], help="search the indexed transcripts")
+    search.add_argument("query", nargs="+",
+                        help='words that must all appear in a cue; "quoted words" for a phrase, word* for a prefix')
+    search.add_argument("--limit", type=int, default=20)
+
+    index = commands.add_parser("index", parents=[index_data],
+                                help="add the transcripts already in a folder to the search index")
+    index.add_argument("folder")
+    index.add_argument("--recursive", action="store_true", help="include subfolders")
+
+    queue_data = argparse.ArgumentParser(add_help=False)
+    queue_data.add_argument("--data-dir", default=str(APP_DATA_DIR), help="folder holding the queue")
+
+    job_queue = commands.add_parser("queue", help="add to, edit or run the persistent job queue")
+    actions = job_queue.add_subparsers(dest="action", required=True)
+    queue_run = actions.add_parser("run", parents=[common, serving],
+                                   help="transcribe the queued items, taking up new ones until stopped")
+    queue_run.add_argument("--until-empty", action="store_true", help="stop once nothing is queued")
+    queue_run.add_argument("--recursive", action="store_true", help="include subfolders of queued folders")
+    queue_run.add_argument("--reuse-videos", choices=REUSE_MODES, default="copy", help=REUSE_HELP)
+    queue_run.add_argument("--prefetch", type=int, default=2, help="playlist videos downloaded ahead of transcription")
+    queue_run.add_argument("--prefetch-budget-mb", type=int, default=4096)
+    queue_add = actions.add_parser("add", parents=[queue_data], help="queue a folder, file, video URL or playlist")
+    queue_add.add_argument("kind", choices=KINDS)
+    queue_add.add_argument("target", help="folder or file path, or YouTube URL")
+    queue_add.add_argument("--priority", type=int, default=0, help="higher priorities are taken first")
+    queue_list = actions.add_parser("list", parents=[queue_data], help="show the queue")
+    queue_list.add_argument("--all", action="store_true", help="include finished and cancelled items")
+    queue_move = actions.add_parser("move", parents=[queue_data], help="move an item up or down the queue")
+    queue_move.add_argument("id", type=int)
+    queue_move.add_argument("direction", choices=["up", "down"])
+    queue_priority = actions.add_parser("priority", parents=[queue_data], help="change the priority of an item")
+    queue_priority.add_argument("id", type=int)
+    queue_priority.add_argument("priority", type=int)
+    for action, help_text in [("pause", "stop taking work from an item"),
+                              ("resume", "queue a paused, failed or cancelled item again"),
+                              ("cancel", "drop an item")]:
+        actions.add_parser(action, parents=[queue_data], help=help_text).add_argument("id", type=int)
+    actions.add_parser("clear", parents=[queue_data], help="forget finished and cancelled items")
+    return parser
+
+
+def run_index_command(args):
+    """The search and index commands: print to stdout and return the exit code"""
+    data_dir = Path(args.data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    transcript_index = TranscriptIndex(data_dir / "transcripts.db")
+    if args.command == "index":
+        indexed, unchanged = transcript_index.add_folder(args.folder, args.recursive,
+                                                         log=lambda message: print(message, file=sys.stderr))
+        print(f"Indexed {indexed} transcript(s), {unchanged} unchanged; {transcript_index.count()} in the index")
+        return 0
+    started = time.perf_counter()
+    hits = transcript_index.search(" ".join(args.query), max(1, args.limit))
+    for hit in hits:
+        print(f"{hit.path}\t{hit.timestamp or '-'}\t{hit.snippet}")
+        if hit.media and hit.media.startswith("http"):
+            print(f"\t\t{hit.link()}")
+    print(f"{len(hits)} hit(s) in {(time.perf_counter() - started) * 1000:.0f} ms", file=sys.stderr)
+    return 0 if hits else 1
+
+
+def run_queue_command(args, parser):
+    """The queue commands other than "queue run": print to stdout and return the exit code"""
+    data_dir = Path(args.data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    job_queue = JobQueue(data_dir / "queue.db")
+    if args.action == "add":
+        target = args.target
+        if args.kind in (FOLDER, FILE):
+            path = Path(target)
+            if not (path.is_dir() if args.kind == FOLDER else path.is_file()):
+                parser.error(f"{args.kind} does not exist: {target}")
+            target = str(path.resolve())
+        elif args.kind in (URL, PLAYLIST) and not validate_youtube_url(target):
+            parser.error(f"not a YouTube URL: {target}")
+        print(f"Queued item {job_queue.add(args.kind, target, args.priority)}")
+        return 0
+    if args.action == "list":
+        items = job_queue.items(finished=args.all)
+        for item in items:
+            print(f"{item.id}\t{item.state}\t{item.priority}\t{item.kind}\t{item.target}"
+                  + (f"\t{item.summary}" if item.summary else ""))
+        print(f"{len(items)} item(s)", file=sys.stderr)
+        return 0
+    if args.action == "clear":
+        job_queue.clear_finished()
+        return 0
+    if job_queue.get(args.id) is None:
+        print(f"No queue item {args.id}", file=sys.stderr)
+        return 1
+    if args.action == "move":
+        changed = job_queue.move(args.id, -1 if args.direction == "up" else 1)
+    elif args.action == "priority":
+        job_queue.set_priority(args.id, args.priority)
+        changed = True
+    else:
+        changed = getattr(job_queue, args.action)(args.id)
+    if not changed:
+        print(f"Cannot {args.action} item {args.id} ({job_queue.state(args.id)})", file=sys.stderr)
+    return 0 if changed else 1
+
+
+def build_settings(args):
+    """Translate parsed arguments into engine settings"""
+    settings = EngineSettings(
+        device=args.device,
+        model=args.model,
+        workers=max(1, args.workers),
+        devices=args.devices,
+        longest_first=not args.in_order,
+        warm_worker=args.warm,
+        same_folder=not args.output_dir,
+        output_folder=args.output_dir or "",
+        use_cache=not args.no_cache,
+        cache_limit_mb=max(0, args.cache_limit_mb),
+        resume=not args.no_resume,
+        max_retries=max(0, args.retries),
+        retry_backoff=max(0, args.retry_backoff),
+        cpu_fallback=args.cpu_fallback,
+        long_file=args.long_files,
+        chunk_minutes=max(1, args.chunk_minutes),
+        transcriber_dir=args.transcriber_dir,
+        output_formats=args.formats,
+        scratch_dir=args.scratch_dir,
+        transcriber_command=args.transcriber_command,
+        worker_command=args.worker_command,
+        data_dir=args.data_dir,
+    )
+    queue_run = args.command == "queue"
+    if args.command in ("batch", "watch") or queue_run:
+        settings.recursive = args.recursive
+    if args.command == "batch" and args.extract_audio:
+        settings.extract_audio = True
+        settings.audio_format = args.extract_audio
+    if args.command in ("url", "playlist") or queue_run:
+        settings.reuse_videos = args.reuse_videos
+    if args.command == "playlist" or queue_run:
+        settings.prefetch_depth = max(0, args.prefetch)
+        settings.prefetch_budget_mb = max(0, args.prefetch_budget_mb)
+    if args.command == "watch":
+        settings.watch_existing = args.existing
+        settings.settle_seconds = max(1, args.settle_seconds)
+    return settings
+
+
+def setup_logging(args):
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s", "%H:%M:%S"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.WARNING if args.quiet else logging.INFO)
+    if args.log_file:
+        log_dir = Path(args.data_dir) / "logs"
+        log_dir.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_dir / "transcribe_cli.log", maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(file_handler)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command in ("search", "index"):
+        if args.command == "index" and not Path(args.folder).is_dir():
+            parser.error(f"folder does not exist: {args.folder}")
+        return run_index_command(args)
+    if args.command == "queue" and args.action != "run":
+        return run_queue_command(args, parser)
+    if args.command in ("url", "playlist"):
+        for url in args.urls if args.command == "playlist" else [args.url]:
+            if not validate_youtube_url(url):
+                parser.error(f"not a YouTube URL: {url}")
+    if args.command in ("batch", "watch") and not Path(args.folder).is_dir():
+        parser.error(f"folder does not exist: {args.folder}")
+    setup_logging(args)
+
+    def log(message):
+        level = logging.WARNING if message.lstrip().startswith(("ERROR", "✗")) else logging.INFO
+        logger.log(level, message)
+
+    if args.command == "agent":
+        agent = WorkerAgent(args.server, build_settings(args), args.node, args.token, max(0, args.idle_exit),
+                            on_log=log)
+        engine = agent.engine
+    else:
+        engine = TranscribeEngine(build_settings(args), on_log=log)
+
+    signals = [0]
+
+    def request_stop(signum, frame):
+        signals[0] += 1
+        if signals[0] == 1:
+            logger.warning("Stopping after the items in progress (signal again to cancel them)...")
+            engine.stop()
+        else:
+            logger.warning("Cancelling the items in progress...")
+            engine.stop(cancel=True)
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    if args.command == "agent":
+        agent.run()
+        return 0
+
+    if args.serve:
+        host, port = args.serve
+        engine.remote = JobCoordinator(host, port, max(1, args.lease_seconds), token=args.token, log=log).start()
+    try:
+        if args.command == "batch":
+            result = engine.run_batch(args.folder, retry_failed_only=args.retry_failed)
+        elif args.command == "file":
+            result = engine.run_file(args.path)
+        elif args.command == "url":
+            result = engine.run_url(args.url)
+        elif args.command == "playlist":
+            result = engine.run_playlist(args.urls, retry_failed_only=args.retry_failed)
+        elif args.command == "queue":
+            result = engine.run_queue(until_empty=args.until_empty)
+        else:
+            result = engine.run_watch(args.folder)
+    finally:
+        if engine.remote is not None:
+            engine.remote.close()
+
+    if args.metrics:
+        if args.metrics.lower().endswith(".csv"):
+            engine.metrics.export_csv(args.metrics)
+        else:
+            engine.metrics.export_json(args.metrics)
+    if result is None:
+        return 1
+    successful, failed = result
+    logger.warning(f"Done: {successful} successful, {failed} failed")
+    return 1 if failed or signals[0] > 1 else 0  # Cancelled items did not succeed either
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2090 @@
+"""Transcription engine shared by the GUI and the command line.
+
+TranscribeEngine runs batch, single file/URL, playlist and watch-folder jobs
+from an EngineSettings object and reports progress through plain callbacks, so
+it can be driven without a display. This module must never import tkinter.
+"""
+import collections
+import contextlib
+import itertools
+import os
+import queue
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from device_pool import DeviceScheduler, parse_device_spec
+from folder_watcher import FolderWatcher
+from failures import OUT_OF_MEMORY, PERMANENT, backoff_delay, classify_failure
+from job_journal import CANCELLED, DONE, FAILED, JobJournal
+from job_queue import CANCELLED as ITEM_CANCELLED, FILE, FOLDER, PLAYLIST, RUNNING, JobQueue
+from media_index import MediaIndex
+from media_tools import (VIDEO_EXTENSIONS, DurationCache, detect_silences, extract_audio, find_ffmpeg, find_ffprobe,
+                         plan_chunks)
+from output_finalizer import finalize_outputs, reuse_outputs
+from prefetch import PrefetchPipeline
+from process_tree import NEW_PROCESS_GROUP, Cancelled, ProcessRegistry, kill_process_tree
+from run_metrics import RunMetrics
+from scheduling import EtaEstimator, format_eta, longest_first_window
+from subtitles import merge_chunk_outputs
+from transcript_cache import TranscriptCache
+from transcript_index import TranscriptIndex
+from transcribe_worker import WarmTranscriber, download_audio
+from video_index import VideoIndex
+
+# Folder holding the transcribe-anything virtualenv (override with the environment variable)
+TRANSCRIBE_ANYTHING_DIR = os.environ.get("TRANSCRIBE_ANYTHING_DIR", r"F:\Python scripts\Transcribe anything")
+WORKER_SCRIPT = Path(__file__).resolve().with_name("transcribe_worker.py")
+# Per-user state (transcript cache, journal, logs)
+APP_DATA_DIR = Path.home() / ".transcribe_gui"
+WHISPER_MODELS = ["default", "tiny", "base", "small", "medium", "large-v2", "large-v3"]
+DEVICES = ["cpu", "cuda", "insane", "mps"]
+# What to do with videos the video index knows (see EngineSettings.reuse_videos)
+REUSE_MODES = ["copy", "link", "skip", "off"]
+
+# Supported file extensions
+SUPPORTED_FORMATS = {
+    '.mp4', '.avi', '.mov', '.wmv', '.mkv', '.flv', '.webm', '.mpg', '.mpeg', '.m4v',
+    '.3gp', '.ogv', '.ts', '.vob', '.asf', '.rm', '.rmvb', '.divx', '.xvid', '.f4v',
+    '.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a', '.opus', '.aiff', '.au'
+}
+
+# Levels of nested playlists followed (channel -> tab -> playlist)
+PLAYLIST_NESTING = 3
+# Upcoming files or playlist videos among which the longest is started first
+PLAYLIST_SCHEDULING_WINDOW = 50
+# Runs whose worker pool also takes up the job queue's items (see TranscribeEngine.take_queue_items)
+POOLED_RUN_KINDS = ("batch", "watch", "playlist")
+
+# Lines of transcriber output kept for error reports (the rest is discarded)
+OUTPUT_TAIL_LINES = 200
+# ProcessRegistry owner of the ffmpeg runs of the prefetch pipeline, which no worker owns
+PREFETCH_OWNER = "prefetch"
+
+# Transcription timeouts: model loading allowance plus the expected time (media
+# duration x realtime factor) with a safety margin. The journal's measured factor
+# of the device is used when there is one, these guesses otherwise.
+DEFAULT_REALTIME_FACTORS = {"cpu": 2.0, "cuda": 0.3, "insane": 0.15, "mps": 0.6}
+TIMEOUT_ALLOWANCE = 600
+TIMEOUT_MARGIN = 3
+UNKNOWN_DURATION_TIMEOUT = 2 * 3600
+# A timed out transcription is retried with its timeout multiplied by this, since the same limit would only run out again
+TIMEOUT_RETRY_GROWTH = 2
+
+PERCENT_PATTERN = re.compile(r"(\d{1,3}(?:\.\d+)?)%")
+ETA_PATTERN = re.compile(r"<\s*((?:\d+:)?\d{1,2}:\d{2})")
+# yt-dlp's download progress: "[download]  12.3% of ~  45.67MiB at  1.23MiB/s ETA 00:34"
+DOWNLOAD_PATTERN = re.compile(r"\[download\]\s+(\d{1,3}(?:\.\d+)?)% of\b(?:.*\bETA\s+((?:\d+:)?\d{1,2}:\d{2}))?")
+SEGMENT_PATTERN = re.compile(r"\[(?:\d+:)?\d{2}:\d{2}\.\d{3} --> ((?:\d+:)?\d{2}:\d{2}\.\d{3})\]")
+
+
+def load_youtube_dl(log=None):
+    """Return the YoutubeDL class, preferring yt-dlp over youtube-dl"""
+    try:
+        from yt_dlp import YoutubeDL
+    except ImportError:
+        if log:
+            log("yt-dlp not found, trying youtube-dl...")
+        from youtube_dl import YoutubeDL
+    return YoutubeDL
+
+
+def sanitize_title(title):
+    """Make a video title safe to use as a file name, or return None if empty"""
+    if not title:
+        return None
+    # Remove characters not allowed in filenames
+    title = re.sub(r'[\\/*?:"<>|]', "_", title)
+    # Limit length to avoid filesystem issues
+    return title[:200]
+
+
+def validate_youtube_url(url):
+    """Validate if the given URL is a YouTube URL (video, playlist or channel)"""
+    youtube_patterns = [
+        "youtube.com/watch",
+        "youtu.be/",
+        "youtube.com/embed/",
+        "youtube.com/v/",
+        "youtube.com/playlist",
+        "youtube.com/@",
+        "youtube.com/channel/",
+        "youtube.com/c/",
+        "youtube.com/user/",
+        "list="
+    ]
+    return any(pattern in url.lower() for pattern in youtube_patterns)
+
+
+def canonicalize_playlist_url(url):
+    """Convert any YouTube playlist URL to canonical format"""
+    # Extract playlist ID from various URL formats
+    match = re.search(r'list=([a-zA-Z0-9_-]+)', url)
+    if match:
+        return f"https://www.youtube.com/playlist?list={match.group(1)}"
+    return url  # Return original if no playlist ID found
+
+
+def extract_youtube_id(url):
+    """Extract YouTube video ID from URL"""
+    match = re.search(r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/(?:embed|v|shorts|live)\/)([^&\?\/#]+)',
+                      url)
+    return match.group(1) if match else None
+
+
+def video_url(video_id):
+    """Return the watch URL of a YouTube video ID"""
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def iter_playlist_entries(playlist_url, YoutubeDL):
+    """Yield the videos of a playlist or channel while its pages are being fetched.
+
+    Entries are dicts with url, id, title and duration (title/duration may be
+    None), so callers never need a second metadata request per video. Only the
+    first page is requested up front; later pages are fetched as the generator
+    is consumed. The tabs of a channel (videos, shorts, streams) are listed one
+    after another.
+    """
+    ydl_opts = {
+        'quiet': True,
+        'extract_flat': 'in_playlist',
+        'skip_download': True,
+        'lazy_playlist': True,
+    }
+
+    with YoutubeDL(ydl_opts) as ydl:
+        # process=False leaves 'entries' as the extractor's page-by-page generator
+        info = ydl.extract_info(playlist_url, download=False, process=False)
+        yield from _flat_playlist_entries(ydl, info)
+
+
+def _flat_playlist_entries(ydl, info, depth=0):
+    if info.get('_type') == 'url' and depth < PLAYLIST_NESTING:
+        # A redirect, e.g. from a channel's home page to its videos tab
+        info = ydl.extract_info(info['url'], download=False, process=False)
+        depth += 1
+    for entry in info.get('entries') or []:
+        if not entry:  # Unavailable entries come back as None
+            continue
+        if entry.get('_type') == 'playlist' or entry.get('ie_key') == 'YoutubeTab':
+            if depth < PLAYLIST_NESTING:
+                yield from _flat_playlist_entries(ydl, entry if entry.get('entries') is not None else
+                                                  ydl.extract_info(entry['url'], download=False, process=False),
+                                                  depth + 1)
+            continue
+        # Format URLs properly
+        if entry.get('url') and entry['url'].startswith('http'):
+            url = entry['url']
+        elif entry.get('id'):
+            url = video_url(entry['id'])
+        elif entry.get('webpage_url'):
+            url = entry['webpage_url']
+        else:
+            continue
+        yield {
+            'url': url,
+            'id': entry.get('id'),
+            'title': sanitize_title(entry.get('title')),
+            'duration': entry.get('duration'),
+        }
+
+
+def split_urls(text):
+    """Split a list of URLs separated by whitespace or commas"""
+    return [url for url in re.split(r"[\s,]+", text.strip()) if url]
+
+
+def parse_progress_line(line, duration=None):
+    """Extract (percent, eta) from a line of transcriber output, or return None.
+
+    Understands tqdm bars (" 45%|####  | 12/27 [00:10<00:12, ...]"), yt-dlp download
+    lines ("[download]  12.3% of 45.67MiB at 1.23MiB/s ETA 00:34") and, when the media
+    duration is known, Whisper's verbose segment lines ("[01:02.000 --> 01:05.500] text").
+    """
+    match = DOWNLOAD_PATTERN.search(line)
+    if match:
+        return min(float(match.group(1)), 100.0), match.group(2)
+    match = PERCENT_PATTERN.search(line)
+    if match and "|" in line:
+        eta = ETA_PATTERN.search(line)
+        return min(float(match.group(1)), 100.0), eta.group(1) if eta else None
+    if duration:
+        match = SEGMENT_PATTERN.search(line)
+        if match:
+            seconds = 0.0
+            for part in match.group(1).split(":"):
+                seconds = seconds * 60 + float(part)
+            return min(seconds / duration * 100, 100.0), None
+    return None
+
+
+def run_streaming(cmd, on_line, timeout=None, env=None, track=None):
+    """Run cmd and hand each line of its combined stdout/stderr to on_line as it arrives.
+
+    env is the process environment (None inherits ours). The process runs in
+    its own process group, held by track(process) (see ProcessRegistry.running)
+    while it runs. Returns the exit code; raises subprocess.TimeoutExpired
+    (after killing the process tree) when it runs longer than timeout seconds.
+    """
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, errors="replace", bufsize=1, env=env, **NEW_PROCESS_GROUP)
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        kill_process_tree(process)
+
+    timer = threading.Timer(timeout, kill) if timeout else None
+    if timer:
+        timer.start()
+    try:
+        with track(process) if track else contextlib.nullcontext():
+            # Universal newlines also split tqdm's carriage-return updates into lines
+            for line in process.stdout:
+                line = line.rstrip()
+                if line:
+                    on_line(line)
+            returncode = process.wait()
+    finally:
+        if timer:
+            timer.cancel()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    return returncode
+
+
+def entry_signature(entry, model):
+    """Identify a file version and model in the journal, so a changed file or model is not considered done"""
+    return f"{entry.size}:{entry.mtime}:{model}"
+
+
+class EngineSettings:
+    """Options of a run; the GUI fills them from its widgets, the CLI from its arguments"""
+
+    DEFAULTS = {
+        "device": "cuda",
+        "model": "default",
+        "workers": 1,
+        # Device pool such as "cuda:0,cuda:1,cpu*2" (one worker per entry) used instead of device and
+        # workers; long media goes to the fastest devices, short media also to the slower ones
+        "devices": "",
+        "longest_first": True,  # With several workers, start the longest media first
+        "warm_worker": False,  # Keep the model loaded across files
+        "same_folder": True,  # Write outputs next to the input (Documents for URLs)
+        "output_folder": "",
+        "use_cache": True,  # Restore outputs of already transcribed media
+        "cache_limit_mb": 2048,
+        "resume": True,  # Skip items the journal records as done
+        "prefetch_depth": 2,  # Playlist videos downloaded ahead of transcription
+        "prefetch_budget_mb": 4096,
+        "recursive": False,  # Include subfolders in batch and watch mode
+        "watch_existing": False,  # Watch mode: also queue files already present
+        "settle_seconds": 10,
+        "extract_audio": False,  # Demux video to 16 kHz mono before transcribing
+        "audio_format": "opus",
+        "long_file": False,  # Split long recordings and transcribe chunks in parallel
+        "chunk_minutes": 10,
+        "transcriber_dir": TRANSCRIBE_ANYTHING_DIR,
+        "output_formats": ("txt", "srt"),  # Formats written to the output folder (see OUTPUT_FORMATS)
+        "scratch_dir": "",  # Work folder for transcriber output; "" uses the system temp folder
+        # Command run instead of transcribe-anything in its virtualenv, split like a POSIX command
+        # line; {source}, {output_dir}, {device} and {model} are filled in per job
+        "transcriber_command": "",
+        # Command starting the warm worker instead of transcribe_worker.py in the virtualenv, split the
+        # same way; {script}, {device} and {model} are filled in
+        "worker_command": "",
+        "data_dir": str(APP_DATA_DIR),  # Journal, cache, logs and run metrics
+        "export_metrics": True,  # Write each run's stage timings to <data_dir>/metrics as JSON and CSV
+        "max_retries": 2,  # Extra attempts for transient failures (network errors, GPU out of memory)
+        "retry_backoff": 10,  # Seconds before the first retry, doubled for every further one
+        "cpu_fallback": False,  # Redo a job on the CPU when the GPU runs out of memory
+        # Videos transcribed before (in any playlist or run): "copy" or "link" their outputs to the
+        # destination, "skip" them, or "off" to transcribe them again
+        "reuse_videos": "copy",
+        "index_transcripts": True,  # Add finished transcripts to the full-text search index in data_dir
+    }
+
+    def __init__(self, **options):
+        unknown = set(options) - set(self.DEFAULTS)
+        if unknown:
+            raise TypeError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        self.__dict__.update(self.DEFAULTS)
+        self.__dict__.update(options)
+
+
+class TranscribeEngine:
+    """Runs transcription jobs and reports through callbacks.
+
+    on_log(message), on_progress(percent), on_status(text),
+    on_worker_status(worker_id, status, progress) and on_run_finished(metrics)
+    are called from worker threads. The run_* methods block until the run ends and return
+    (successful, failed), or None when the run failed as a whole; stop() ends a
+    run from another thread once the items in progress are finished, or at once
+    with cancel=True. Cancelled items count as neither.
+    """
+
+    def __init__(self, settings=None, on_log=None, on_progress=None, on_status=None, on_worker_status=None,
+                 on_run_finished=None):
+        self.settings = settings or EngineSettings()
+        self.on_log = on_log or (lambda message: None)
+        self.on_progress = on_progress or (lambda percent: None)
+        self.on_status = on_status or (lambda text: None)
+        self.on_worker_status = on_worker_status or (lambda worker_id, status, progress: None)
+        self.on_run_finished = on_run_finished or (lambda metrics: None)
+        self.is_processing = False
+        self.retry_failed_only = False
+        self.warm_workers = {}  # worker_id -> (WarmTranscriber, scratch dir)
+        self.warm_workers_lock = threading.Lock()
+        self.transcript_cache = None  # Opened on first use
+        self.journal = None  # Opened on first use
+        self.video_index = None  # Opened on first use
+        self.transcript_index = None  # Opened on first use
+        self.job_queue = None  # Opened on first use
+        self.run_kind = None  # Kind of the current (or last) run: "batch", "playlist", "queue", ...
+        self.side_queue = None  # QueueWork whose items the workers of a batch, watch or playlist run take up
+        self.side_queue_lock = threading.Lock()
+        self.shared_chunks = []  # SharedJobs of the long files being transcribed in chunks by pool workers
+        self.shared_chunks_lock = threading.Lock()
+        self.YoutubeDL = None  # YoutubeDL class to use instead of yt-dlp (stubs for benchmarks)
+        self.remote = None  # JobCoordinator handing the transcriptions to worker agents instead of running them here
+        self.metrics = RunMetrics("idle")  # Stage timings of the current (or last) run
+        self.durations = DurationCache()  # Probed media durations, for the current run
+        self.worker_slots = {}  # worker_id -> DeviceSlot of the current device pool
+        self.worker_devices = {}  # worker_id -> device its last successful transcription ran on
+        self.processes = ProcessRegistry()  # Child processes of the jobs in progress, by worker_id
+
+    def log_message(self, message):
+        self.on_log(message)
+
+    def set_progress(self, value):
+        self.on_progress(value)
+
+    def set_status(self, text):
+        self.on_status(text)
+
+    def set_worker_status(self, worker_id, status, progress=None):
+        """Report the status of a worker (None is the only worker of a single run)"""
+        self.on_worker_status(worker_id or 0, status, progress)
+
+    def stop(self, cancel=False):
+        """Ask the current run to stop picking up new items.
+
+        With cancel, the items in progress are cancelled as well: their process
+        trees are killed right away and the journal records them as cancelled.
+        """
+        self.is_processing = False
+        if cancel:
+            self.processes.cancel()
+
+    def cancel_worker(self, worker_id):
+        """Cancel the item a worker is transcribing, killing its processes; the run goes on"""
+        self.processes.cancel(worker_id)
+
+    def begin_run(self, kind, retry_failed_only=False):
+        self.is_processing = True
+        self.run_kind = kind
+        self.processes.reset()
+        self.retry_failed_only = retry_failed_only
+        self.metrics = RunMetrics(kind)
+        self.durations = DurationCache()
+
+    def finish_run(self):
+        """Common end of every run: release the warm workers and report the stage timings"""
+        self.close_warm_workers()
+        self.is_processing = False
+        with self.side_queue_lock:
+            side_queue, self.side_queue = self.side_queue, None
+        if side_queue:
+            side_queue.close()  # Queue items the run did not get to are left for the next queue run
+        self.metrics.finish()
+        lines = self.metrics.format_summary()
+        if lines:
+            self.log_message("Time per stage:\n" + "\n".join(lines))
+        if self.settings.export_metrics and lines:
+            try:
+                path = self.metrics.export(Path(self.settings.data_dir) / "metrics")
+                self.log_message(f"Run metrics written to {path.with_suffix('')}.json/.csv")
+            except OSError as e:
+                self.log_message(f"Could not write run metrics: {e}")
+        self.on_run_finished(self.metrics)
+
+    def media_duration(self, source):
+        """Return the duration of a media file in seconds (probed once per run), or None.
+
+        Uses ffprobe when available and falls back to the duration in WAV and
+        MP4-family headers.
+        """
+        return self.durations.duration(source)
+
+    def device_rtf(self, device):
+        """Return the realtime factor of device ("cuda:1", "cpu", ...): measured if known, guessed otherwise"""
+        journal = self.get_journal()
+        base = device.split(":")[0]
+        return (journal.realtime_factor(device, self.settings.model)
+                or journal.realtime_factor(base, self.settings.model)
+                or DEFAULT_REALTIME_FACTORS.get(base, 1.0))
+
+    def device_slots(self):
+        """Return the DeviceSlots of the devices setting, rated by speed, or None without a device pool.
+
+        Raises ValueError for an invalid device spec.
+        """
+        if not self.settings.devices.strip():
+            return None
+        slots = parse_device_spec(self.settings.devices, DEVICES)
+        if not slots:
+            return None
+        for slot in slots:
+            slot.rtf = self.device_rtf(slot.name)
+        return slots
+
+    def pool_workers(self, slots):
+        """Number of pool workers: one per device slot, or the workers setting without a pool"""
+        return len(slots) if slots else max(1, self.settings.workers)
+
+    def log_device_pool(self, slots):
+        if slots:
+            self.log_message("Device pool: " + ", ".join(f"{slot.name} ({slot.rtf:.2f}x realtime)"
+                                                         for slot in slots))
+
+    def make_eta(self, worker_count, slots=None):
+        """Return an EtaEstimator seeded with the historical realtime factor of the device(s)"""
+        if slots:
+            # The pool as worker_count workers of equal speed, processing as much media per second
+            return EtaEstimator(worker_count, worker_count / sum(1 / slot.rtf for slot in slots))
+        rtf = self.get_journal().realtime_factor(self.settings.device, self.settings.model)
+        return EtaEstimator(worker_count, rtf)
+
+    def record_speed(self, device, media_seconds, processing_seconds):
+        """Remember how fast device transcribed, for the ETAs and timeouts of later runs"""
+        if media_seconds and processing_seconds > 0:
+            self.get_journal().record_speed(device, self.settings.model, media_seconds, processing_seconds)
+
+    def transcription_timeout(self, duration, device):
+        """Seconds a transcription of duration seconds of media may take on device"""
+        if not duration:
+            return UNKNOWN_DURATION_TIMEOUT
+        return TIMEOUT_ALLOWANCE + duration * self.device_rtf(device) * TIMEOUT_MARGIN
+
+    def wait_before_retry(self, attempt, kind, label):
+        """Log and sleep the backoff before retry number attempt; False when the run was stopped meanwhile"""
+        delay = backoff_delay(attempt, self.settings.retry_backoff)
+        self.log_message(f"{label} failed ({kind}), retrying in {delay:.0f} s "
+                         f"(attempt {attempt + 1} of {self.settings.max_retries + 1})")
+        deadline = time.monotonic() + delay
+        while self.is_processing and time.monotonic() < deadline:
+            time.sleep(0.2)
+        return self.is_processing
+
+    def call_with_retries(self, label, func):
+        """Return func(), retrying it with backoff while it raises transient errors"""
+        attempt = 1
+        while True:
+            try:
+                return func()
+            except Exception as e:
+                kind = classify_failure(str(e))
+                if (kind == PERMANENT or attempt > self.settings.max_retries
+                        or not self.wait_before_retry(attempt, kind, label)):
+                    raise
+                attempt += 1
+
+    def remove_scratch(self, job_key, path):
+        """Delete a job's scratch folder, timing it as the job's cleanup stage"""
+        with self.metrics.stage(job_key, "cleanup") as stage:
+            stage.bytes = sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+            shutil.rmtree(path, ignore_errors=True)
+
+    def planned_workers(self, mode):
+        """Number of worker status rows a run of mode will report on"""
+        if mode == "single" and not self.settings.long_file:
+            return 1
+        try:
+            return self.pool_workers(self.device_slots())
+        except ValueError:
+            return max(1, self.settings.workers)
+
+    def get_journal(self):
+        """Return the job journal, opening it on first use"""
+        if self.journal is None:
+            data_dir = Path(self.settings.data_dir)
+            data_dir.mkdir(parents=True, exist_ok=True)
+            self.journal = JobJournal(data_dir / "journal.db")
+        return self.journal
+
+    def open_journal_run(self, run_key, kind):
+        """Register a run in the journal and report items a crash left unfinished"""
+        interrupted = self.get_journal().open_run(run_key, kind)
+        if interrupted:
+            self.log_message(f"Resuming: {interrupted} item(s) were interrupted last time and will be redone")
+
+    def entry_journal_key(self, entry):
+        """Return the journal (item_key, signature) of an indexed file"""
+        return str(entry.path), entry_signature(entry, self.settings.model)
+
+    def filter_journal_items(self, run_key, items, key_of, skipped):
+        """Yield the items of a run that still need work according to the journal.
+
+        key_of(item) returns (item_key, signature); skipped[0] counts items left
+        out because they are already done.
+        """
+        journal = self.get_journal()
+        resume = self.settings.resume
+        for item in items:
+            item_key, signature = key_of(item)
+            state = journal.state(run_key, item_key, signature)
+            if self.retry_failed_only and state != FAILED:
+                continue
+            if resume and state == DONE:
+                skipped[0] += 1
+                continue
+            yield item
+
+    def log_journal_summary(self, run_key, skipped):
+        """Log what the journal knows about a run after it ends"""
+        if skipped:
+            self.log_message(f"Skipped (already done): {skipped}")
+        summary = self.get_journal().summary(run_key)
+        self.log_message(f"Journal: {summary.get(DONE, 0)} done, {summary.get(FAILED, 0)} failed in total"
+                         + (f", {summary[CANCELLED]} cancelled" if summary.get(CANCELLED) else ""))
+
+    def get_video_index(self):
+        """Return the video ID index, opening it on first use"""
+        if self.video_index is None:
+            data_dir = Path(self.settings.data_dir)
+            data_dir.mkdir(parents=True, exist_ok=True)
+            self.video_index = VideoIndex(data_dir / "videos.db")
+        return self.video_index
+
+    def reuse_video_outputs(self, video_id, output_dir, job_key=None):
+        """Provide the outputs of an already transcribed video instead of transcribing it again.
+
+        Depending on the reuse_videos setting the earlier outputs are copied or
+        linked into output_dir, or the video is just skipped. Returns True when
+        the video needs no transcription.
+        """
+        mode = self.settings.reuse_videos
+        if mode == "off" or not video_id:
+            return False
+        sources = self.get_video_index().outputs(video_id)
+        if not sources:
+            return False
+        if mode == "skip":
+            self.log_message(f"Already transcribed: {next(iter(sources.values()))}")
+            return True
+        with self.metrics.stage(job_key, "move"):
+            base_name = next(iter(sources.values())).stem
+            placed = reuse_outputs(sources, base_name, output_dir, self.settings.output_formats,
+                                   self.log_message, link=mode == "link")
+        if not placed:
+            return False
+        earlier = {Path(source).resolve() for source in sources.values()}
+        provided = [path for path in placed if path.resolve() not in earlier]
+        self.get_video_index().record(video_id, placed)
+        self.index_transcripts(placed, video_url(video_id))
+        if provided:
+            action = "Linked" if mode == "link" else "Copied"
+            self.log_message(f"{action} {len(provided)} output(s) of the earlier transcription of {video_id}")
+        else:
+            self.log_message(f"The outputs of the earlier transcription of {video_id} are already in place")
+        return True
+
+    def get_transcript_index(self):
+        """Return the full-text index of transcripts, opening it on first use"""
+        if self.transcript_index is None:
+            data_dir = Path(self.settings.data_dir)
+            data_dir.mkdir(parents=True, exist_ok=True)
+            self.transcript_index = TranscriptIndex(data_dir / "transcripts.db")
+        return self.transcript_index
+
+    def get_job_queue(self):
+        """Return the persistent job queue, opening it on first use"""
+        if self.job_queue is None:
+            data_dir = Path(self.settings.data_dir)
+            data_dir.mkdir(parents=True, exist_ok=True)
+            self.job_queue = JobQueue(data_dir / "queue.db")
+        return self.job_queue
+
+    def take_queue_items(self):
+        """Have the workers of the run in progress take up the job queue's items as well.
+
+        Only batch, watch and playlist runs have a worker pool to share; returns
+        False for other runs (and when nothing runs), whose queued items wait
+        for a queue run.
+        """
+        with self.side_queue_lock:
+            if not self.is_processing or self.run_kind not in POOLED_RUN_KINDS:
+                return False
+            if self.side_queue is None:
+                self.side_queue = QueueWork(self, self.get_job_queue()).start()
+                self.log_message("Queued items will be taken up by the workers of this run")
+            return True
+
+    def process_queue_unit(self, worker_id):
+        """Transcribe the next unit of a queue item handed to the current run; False when there is none"""
+        side_queue = self.side_queue
+        unit = side_queue.next_unit() if side_queue else None
+        if unit is None:
+            return False
+        item, payload = unit
+        try:
+            side_queue.process(worker_id, f"queue #{side_queue.units_queued}", item, payload)
+        except Cancelled:
+            pass
+        except Exception as e:
+            self.log_message(f"✗ Worker {worker_id + 1} error: {str(e)}")
+        return True
+
+    def help_with_chunks(self, worker_id):
+        """Transcribe a chunk of a long file another pool worker is splitting up; False when there is none"""
+        with self.shared_chunks_lock:
+            candidates = list(self.shared_chunks)
+        for shared in candidates:
+            self.processes.reset(worker_id)
+            if shared.run_next(worker_id):
+                return True
+        return False
+
+    def index_transcripts(self, paths, media):
+        """Add the outputs of a finished job to the search index; failures are logged, never fatal"""
+        if not self.settings.index_transcripts:
+            return
+        try:
+            self.get_transcript_index().add(paths, media)
+        except Exception as e:
+            self.log_message(f"Could not add the transcript to the search index: {e}")
+
+    def youtube_output_dir(self):
+        """Return the output folder for videos"""
+        if not self.settings.same_folder:
+            return Path(self.settings.output_folder)
+        # For YouTube URLs with "same folder", create a subfolder in user's documents
+        return Path.home() / "Documents" / "Transcribe Anything"
+
+    def get_transcript_cache(self):
+        """Return the transcript cache, or None when caching is disabled"""
+        if not self.settings.use_cache:
+            return None
+        if self.transcript_cache is None:
+            self.transcript_cache = TranscriptCache(Path(self.settings.data_dir) / "cache")
+        self.transcript_cache.max_bytes = self.settings.cache_limit_mb * 1024 * 1024
+        return self.transcript_cache
+
+    def get_scratch_dir(self):
+        """Return the configured scratch folder, or None for the system temp folder.
+
+        Putting it on the same volume as the outputs (or on a RAM disk) lets
+        outputs be moved into place with a rename instead of a copy.
+        """
+        if not self.settings.scratch_dir:
+            return None
+        scratch_dir = Path(self.settings.scratch_dir)
+        scratch_dir.mkdir(parents=True, exist_ok=True)
+        return scratch_dir
+
+    def get_youtube_dl(self):
+        """Return the YoutubeDL class, loading yt-dlp unless one was injected"""
+        if self.YoutubeDL is None:
+            self.YoutubeDL = load_youtube_dl(self.log_message)
+        return self.YoutubeDL
+
+    def get_youtube_info(self, url):
+        """Fetch the YouTube video title (sanitized for filesystem use) and duration; None where unknown"""
+        try:
+            YoutubeDL = self.get_youtube_dl()
+            ydl_opts = {'quiet': True, 'no_warnings': True}
+
+            def extract():
+                with YoutubeDL(ydl_opts) as ydl:
+                    return ydl.extract_info(url, download=False)
+
+            info = self.call_with_retries("Fetching video info", extract)
+            return sanitize_title(info.get('title')), info.get('duration')
+        except Exception as e:
+            self.log_message(f"Could not fetch YouTube title: {e}")
+        return None, None
+
+    def run_worker_pool(self, items, process_item, worker_count, total=None, eta=None, slots=None,
+                        duration_of=None, lookahead=PLAYLIST_SCHEDULING_WINDOW, take_queue_items=True):
+        """Run process_item(worker_id, index, item) over items on a pool of worker threads.
+
+        items may be any iterable (including a generator that is still being
+        produced); pass total when it has no len(), or a callable returning the
+        number of items known so far. With an EtaEstimator as eta, progress is
+        weighted by media duration and the status shows the time left. Returns a
+        (successful, failed) tuple. Workers stop picking up new items as soon as
+        the run is stopped.
+
+        With DeviceSlots as slots there is one worker per slot, and a
+        DeviceScheduler hands out the items by their duration_of(item) (looking
+        at most lookahead items ahead). process_item may return None for an
+        item it skipped or that was cancelled; it is then not counted.
+
+        With take_queue_items, the workers also transcribe the units of queue
+        items handed to the run (see take_queue_items) ahead of their own next
+        item. Workers that run out of items keep taking those, and help with
+        the chunks of long files the other workers are transcribing, until
+        those are done. Neither is counted in the returned tuple.
+        """
+        if total is None:
+            total = len(items)
+        source = enumerate(items)
+        source_lock = threading.Lock()
+        scheduler = None
+        if slots:
+            worker_count = len(slots)
+            self.worker_slots = dict(enumerate(slots))
+            scheduler = DeviceScheduler(items, slots, duration_of or (lambda item: None), lookahead,
+                                        backlog=eta.queued_media if eta else None)
+            dispatched = itertools.count()
+
+        def next_item(worker_id):
+            if scheduler is None:
+                with source_lock:
+                    return next(source, (None, None))
+            while self.is_processing:
+                item = scheduler.next_for(slots[worker_id])
+                if item is not None:
+                    with source_lock:
+                        return next(dispatched), item
+                if scheduler.done():
+                    break
+                time.sleep(0.5)  # Waiting items are left to faster devices; look again shortly
+            return None, None
+
+        counters = {"successful": 0, "failed": 0}
+        counters_lock = threading.Lock()
+        busy = [worker_count]  # Workers still going through items
+
+        def worker(worker_id):
+            while self.is_processing:
+                if take_queue_items and self.process_queue_unit(worker_id):
+                    continue
+                index, item = next_item(worker_id)
+                if index is None:
+                    break
+
+                self.processes.reset(worker_id)  # A cancel of the previous item does not carry over
+                try:
+                    ok = process_item(worker_id, index, item)
+                except Cancelled:
+                    ok = None
+                except Exception as e:
+                    self.log_message(f"✗ Worker {worker_id + 1} error: {str(e)}")
+                    ok = False
+                if ok is None:
+                    continue
+
+                with counters_lock:
+                    counters["successful" if ok else "failed"] += 1
+                    done = counters["successful"] + counters["failed"]
+                    known = total() if callable(total) else total
+                    percent = eta.progress() if eta else None
+                    if percent is None and known:
+                        percent = done / known * 100
+                    if percent is not None:
+                        self.set_progress(min(percent, 100))
+                    status = f"Processed {done}/{known}"
+                    remaining = eta.remaining() if eta else None
+                    if remaining is not None:
+                        status += f" - ETA {format_eta(remaining)}"
+                    self.set_status(status)
+            with counters_lock:
+                busy[0] -= 1
+            # Help with queued items and long-file chunks while the other workers finish their own
+            while self.is_processing:
+                if take_queue_items and self.process_queue_unit(worker_id):
+                    continue
+                if not self.help_with_chunks(worker_id):
+                    if not busy[0]:
+                        break
+                    time.sleep(0.5)
+            self.set_worker_status(worker_id, "Idle")
+
+        threads = [threading.Thread(target=worker, args=(worker_id,), daemon=True)
+                   for worker_id in range(worker_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.worker_slots = {}
+
+        return counters["successful"], counters["failed"]
+
+    def run_batch(self, folder, index=None, retry_failed_only=False):
+        """Transcribe all media files in folder.
+
+        index is a MediaIndex of the folder that was already (partly) scanned,
+        e.g. for a preview; it is replaced when it does not match the settings.
+        With retry_failed_only, only the files the journal recorded as failed
+        are redone.
+        """
+        self.begin_run("batch", retry_failed_only)
+        try:
+            folder = Path(folder)
+            if index is None or not index.matches(folder, self.settings.recursive):
+                index = MediaIndex(folder, SUPPORTED_FORMATS, self.settings.recursive)
+            run_key = f"folder:{index.root.resolve()}"
+            self.open_journal_run(run_key, "batch")
+            skipped = [0]
+            entries = self.filter_journal_items(run_key, index, self.entry_journal_key, skipped)
+            first = next(entries, None)
+            if first is None:
+                if skipped[0]:
+                    self.log_message(f"All {skipped[0]} files were already transcribed (see Resume option).")
+                else:
+                    self.log_message("No supported files found to process.")
+                return 0, 0
+            # Processing starts right away; the rest of the folder is indexed as workers pull entries
+            entries = itertools.chain([first], entries)
+
+            def total_files():
+                return index.count - skipped[0]  # Grows until the folder is fully indexed
+
+            slots = self.device_slots()
+            worker_count = self.pool_workers(slots)
+            self.set_progress(0)
+            self.log_device_pool(slots)
+            eta = self.make_eta(worker_count, slots)
+            # Durations for the ETA are probed alongside, without holding up the first files
+            threading.Thread(target=self.feed_eta, args=(eta, run_key, index), daemon=True).start()
+            probed = None
+            if worker_count > 1 and self.settings.longest_first:
+                # Like playlists: order each stretch of upcoming files instead of scanning the whole folder first.
+                # The files are probed on a thread of their own, so workers pulling the next file (under the
+                # pool's lock) never wait for an ffprobe of their own
+                probed = PrefetchPipeline(entries, lambda entry: (self.media_duration(entry.path), 0, None),
+                                          depth=PLAYLIST_SCHEDULING_WINDOW, is_running=lambda: self.is_processing)
+                entries = longest_first_window((prefetched.item for prefetched in probed.start()),
+                                               lambda entry: self.durations.known(entry.path),
+                                               PLAYLIST_SCHEDULING_WINDOW)
+                self.log_message("Scheduling longest files first")
+
+            if index.complete:
+                self.log_message(f"Starting batch transcription of {index.count} files with {worker_count} worker(s)...")
+            else:
+                self.log_message(f"Starting batch transcription with {worker_count} worker(s) while indexing the folder...")
+
+            pipeline = None
+            items = entries
+            if self.settings.extract_audio:
+                ffmpeg = find_ffmpeg()
+                if ffmpeg:
+                    # Extract the next files' audio while the current ones are transcribed
+                    audio_format = self.settings.audio_format
+                    self.log_message(f"Pre-extracting 16 kHz mono {audio_format} audio from video files...")
+                    pipeline = PrefetchPipeline(entries, lambda e: self.extract_batch_audio(e.path, ffmpeg, audio_format),
+                                                depth=worker_count, is_running=lambda: self.is_processing).start()
+                    items = pipeline
+                else:
+                    self.log_message("ffmpeg not found on PATH, transcribing the original files")
+
+            def process_item(worker_id, i, item):
+                prefetched = item if pipeline else None
+                entry = prefetched.item if prefetched else item
+                file_path = entry.path
+                media_path = None
+                if prefetched and prefetched.error:
+                    self.log_message(f"Audio extraction failed for {file_path.name} ({prefetched.error}), using original file")
+                elif prefetched:
+                    media_path = prefetched.path
+
+                eta.start(str(file_path))
+                ok = False
+                try:
+                    ok = self.transcribe_batch_entry(worker_id, entry, f"{i+1}/{total_files()}", media_path, run_key)
+                    return ok
+                finally:
+                    eta.finish(str(file_path), ok)
+                    if prefetched:
+                        with self.metrics.stage(str(file_path), "cleanup"):
+                            prefetched.release()
+
+            def duration_of(item):
+                entry = item.item if pipeline else item
+                return self.durations.known(entry.path)  # Known once probed, here or by feed_eta
+
+            try:
+                # Items the scheduler holds back keep their extracted audio, so it only looks ahead with no pipeline
+                successful, failed = self.run_worker_pool(items, process_item, worker_count, total_files, eta,
+                                                          slots, duration_of, lookahead=1 if pipeline else
+                                                          PLAYLIST_SCHEDULING_WINDOW)
+            finally:
+                if pipeline:
+                    pipeline.close()
+                if probed:
+                    probed.close()
+
+            # Final results
+            self.set_progress(100)
+            self.set_status("Completed" if self.is_processing else "Stopped")
+            self.log_message(f"\n=== BATCH TRANSCRIPTION COMPLETED ===")
+            self.log_message(f"Total files processed: {successful + failed}")
+            self.log_message(f"Successful: {successful}")
+            self.log_message(f"Failed: {failed}")
+            self.log_journal_summary(run_key, skipped[0])
+            return successful, failed
+
+        except Exception as e:
+            self.log_message(f"ERROR in batch processing: {str(e)}")
+            return None
+        finally:
+            self.finish_run()
+
+    def feed_eta(self, eta, run_key, index):
+        """Add the durations of a batch's files to eta while the run is already going"""
+        entries = self.filter_journal_items(run_key, index, self.entry_journal_key, [0])
+        for entry in entries:
+            if not self.is_processing:
+                break
+            eta.add(str(entry.path), self.media_duration(entry.path))
+
+    def transcribe_batch_entry(self, worker_id, entry, position, media_path=None, run_key=None):
+        """Transcribe one indexed file on a pool worker, logging the outcome (and journaling it under run_key).
+
+        Returns True on success, False on failure and None when it was cancelled.
+        """
+        file_path = entry.path
+        self.set_worker_status(worker_id, f"Processing: {file_path.name}", 0)
+        self.log_message(f"\n=== Processing file {position}: {Path(entry.relative_dir, file_path.name)} ===")
+        if run_key:
+            item_key, signature = self.entry_journal_key(entry)
+            self.get_journal().start(run_key, item_key, file_path.name, signature)
+
+        ok = False
+        error = None
+        cancelled = False
+        try:
+            # Transcribe the file with custom naming
+            ok = self.transcribe_single_file(file_path, worker_id, media_path=media_path,
+                                             output_subdir=entry.relative_dir)
+            if ok:
+                self.log_message(f"✓ Successfully transcribed: {file_path.name}")
+            else:
+                self.log_message(f"✗ Failed to transcribe: {file_path.name}")
+            return ok
+        except Cancelled:
+            cancelled = True
+            self.log_message(f"■ Cancelled: {file_path.name}")
+            return None
+        except Exception as e:
+            error = str(e)
+            self.log_message(f"✗ Error transcribing {file_path.name}: {str(e)}")
+            return False
+        finally:
+            if run_key:
+                self.get_journal().finish(run_key, str(file_path), ok, error, cancelled)
+            self.metrics.finish_job(str(file_path), ok, str(Path(entry.relative_dir, file_path.name)))
+            self.set_worker_status(worker_id, f"{'Cancelled' if cancelled else 'Finished'}: {file_path.name}", 100)
+
+    def run_watch(self, folder):
+        """Watch folder and transcribe files as they are added or changed, until stop()"""
+        self.begin_run("watch")
+        try:
+            folder = Path(folder)
+            watcher = FolderWatcher(folder, SUPPORTED_FORMATS, self.settings.recursive,
+                                    settle_seconds=self.settings.settle_seconds)
+            if not self.settings.watch_existing:
+                watcher.snapshot_existing()
+            # Shares the batch journal, so files a batch run already did are skipped
+            run_key = f"folder:{folder.resolve()}"
+            self.open_journal_run(run_key, "watch")
+            skipped = [0]
+
+            ready = queue.Queue()
+            threading.Thread(target=watcher.run, args=(ready.put, lambda: self.is_processing),
+                             daemon=True).start()
+            method = "file system events" if watcher.uses_events else "polling (install watchdog for events)"
+            self.log_message(f"Watching {folder} using {method}...")
+            self.set_progress(0)
+            self.set_status("Watching for new files...")
+
+            queued = [0]
+
+            def watched_entries():
+                while self.is_processing:
+                    try:
+                        entry = ready.get(timeout=0.5)
+                    except queue.Empty:
+                        continue
+                    queued[0] += 1
+                    yield entry
+
+            def process_item(worker_id, i, entry):
+                ok = self.transcribe_batch_entry(worker_id, entry, f"#{i+1}", run_key=run_key)
+                self.set_status("Watching for new files...")
+                return ok
+
+            entries = self.filter_journal_items(run_key, watched_entries(), self.entry_journal_key, skipped)
+            slots = self.device_slots()
+            self.log_device_pool(slots)
+            successful, failed = self.run_worker_pool(entries, process_item, self.pool_workers(slots),
+                                                      lambda: queued[0] - skipped[0], slots=slots,
+                                                      duration_of=lambda entry: self.media_duration(entry.path),
+                                                      lookahead=1)
+
+            self.set_status("Stopped watching")
+            self.log_message(f"\n=== WATCH FOLDER STOPPED ===")
+            self.log_message(f"Successful: {successful}")
+            self.log_message(f"Failed: {failed}")
+            return successful, failed
+
+        except Exception as e:
+            self.log_message(f"ERROR watching folder: {str(e)}")
+            return None
+        finally:
+            self.finish_run()
+
+    def run_file(self, file_path):
+        """Transcribe a single file"""
+        self.begin_run("file")
+        try:
+            file_path = Path(file_path)
+            if not file_path.exists():
+                self.log_message("ERROR: Selected file does not exist!")
+                return None
+
+            self.set_progress(10)
+            self.set_status(f"Processing: {file_path.name}")
+            self.log_message(f"\n=== Processing file: {file_path.name} ===")
+
+            try:
+                ok = self.transcribe_single_file(file_path)
+            except Cancelled:
+                self.log_message(f"■ Cancelled: {file_path.name}")
+                self.set_status("Cancelled")
+                return 0, 0
+            self.metrics.finish_job(str(file_path), ok, file_path.name)
+            if ok:
+                self.log_message(f"✓ Successfully transcribed: {file_path.name}")
+            else:
+                self.log_message(f"✗ Failed to transcribe: {file_path.name}")
+
+            self.set_progress(100)
+            self.set_status("Completed")
+            return (1, 0) if ok else (0, 1)
+
+        except Exception as e:
+            self.log_message(f"ERROR processing file: {str(e)}")
+            return None
+        finally:
+            self.finish_run()
+
+    def run_url(self, url):
+        """Transcribe a single YouTube URL"""
+        self.begin_run("url")
+        try:
+            self.set_progress(10)
+            self.set_status(f"Processing YouTube URL")
+            self.log_message(f"\n=== Processing YouTube URL: {url} ===")
+
+            try:
+                ok = self.transcribe_youtube_url(url)
+            except Cancelled:
+                self.log_message(f"■ Cancelled: {url}")
+                self.set_status("Cancelled")
+                return 0, 0
+            self.metrics.finish_job(url, ok)
+            if ok:
+                self.log_message(f"✓ Successfully transcribed YouTube URL: {url}")
+            else:
+                self.log_message(f"✗ Failed to transcribe YouTube URL: {url}")
+
+            self.set_progress(100)
+            self.set_status("Completed")
+            return (1, 0) if ok else (0, 1)
+
+        except Exception as e:
+            self.log_message(f"ERROR processing YouTube URL: {str(e)}")
+            return None
+        finally:
+            self.finish_run()
+
+    def run_playlist(self, playlist_urls, retry_failed_only=False):
+        """Transcribe every video of one or more YouTube playlists or channels.
+
+        Videos are queued while the playlists are still being listed page by
+        page, so the first transcription starts right away however long they are.
+        """
+        self.begin_run("playlist", retry_failed_only)
+        try:
+            YoutubeDL = self.get_youtube_dl()
+
+            # Get and canonicalize the playlist URLs
+            if isinstance(playlist_urls, str):
+                playlist_urls = [playlist_urls]
+            playlist_urls = list(dict.fromkeys(canonicalize_playlist_url(url) for url in playlist_urls))
+
+            self.set_progress(0)
+            self.set_status("Fetching playlist info...")
+
+            listed = [0]
+            skipped = [0]
+            duplicates = [0]
+            reused = [0]
+            slots = self.device_slots()
+            worker_count = self.pool_workers(slots)
+            self.log_device_pool(slots)
+            eta = self.make_eta(worker_count, slots)
+
+            def queued_entries():
+                entries = self.unique_entries(self.playlist_entries(playlist_urls, YoutubeDL, listed, skipped),
+                                              duplicates)
+                for entry in self.skip_known_videos(entries, reused):
+                    eta.add(entry['url'], entry['duration'])
+                    yield entry
+
+            def total_videos():
+                return listed[0] - skipped[0] - duplicates[0] - reused[0]  # Grows while listing
+
+            entries = queued_entries()
+            first = next(entries, None)
+            if first is None:
+                if listed[0] == 0:
+                    self.log_message("No videos found in the playlist.")
+                    self.log_message("This could be due to:")
+                    self.log_message("1. Private/unlisted videos in the playlist")
+                    self.log_message("2. Invalid playlist URL")
+                    self.log_message("3. Playlist access restrictions")
+                else:
+                    self.log_message("Nothing left to transcribe in this playlist.")
+                    self.log_playlist_skips(skipped, duplicates, reused)
+                return reused[0], 0
+            entries = itertools.chain([first], entries)
+            if worker_count > 1 and self.settings.longest_first:
+                # The whole list is not known up front; order each stretch of upcoming videos instead
+                entries = longest_first_window(entries, lambda entry: entry['duration'], PLAYLIST_SCHEDULING_WINDOW)
+                self.log_message("Scheduling longest videos first")
+
+            prefetch_depth = self.settings.prefetch_depth
+            pipeline = None
+            items = entries
+            if prefetch_depth > 0:
+                # Download upcoming videos while the current ones are being transcribed
+                budget = self.settings.prefetch_budget_mb * 1024 * 1024
+                self.log_message(f"Prefetching audio up to {prefetch_depth} video(s) ahead...")
+                pipeline = PrefetchPipeline(entries, self.download_playlist_audio, depth=prefetch_depth,
+                                            disk_budget=budget, is_running=lambda: self.is_processing).start()
+                items = pipeline
+
+            def process_item(worker_id, i, item):
+                prefetched = item if pipeline else None
+                entry = prefetched.item if prefetched else item
+                video_url = entry['url']
+                media_path = None
+                if prefetched and prefetched.error:
+                    self.log_message(f"Prefetch of {video_url} failed ({prefetched.error}), downloading directly")
+                elif prefetched:
+                    media_path = prefetched.path
+
+                eta.start(video_url)
+                ok = False
+                try:
+                    ok = self.transcribe_playlist_entry(worker_id, entry, f"{i+1}/{total_videos()}", media_path)
+                    return ok
+                finally:
+                    eta.finish(video_url, ok)
+                    if prefetched:
+                        with self.metrics.stage(video_url, "cleanup"):
+                            prefetched.release()
+
+            def duration_of(item):
+                return (item.item if pipeline else item)['duration']
+
+            try:
+                # Items the scheduler holds back keep their downloads, so it only looks ahead with no pipeline
+                successful, failed = self.run_worker_pool(items, process_item, worker_count, total_videos, eta,
+                                                          slots, duration_of, lookahead=1 if pipeline else
+                                                          PLAYLIST_SCHEDULING_WINDOW)
+            finally:
+                if pipeline:
+                    pipeline.close()
+
+            # Final results
+            self.set_progress(100)
+            self.set_status("Playlist Completed")
+            successful += reused[0]
+            self.log_message(f"\n=== PLAYLIST TRANSCRIPTION COMPLETED ===")
+            self.log_message(f"Total videos processed: {successful + failed}")
+            self.log_message(f"Successful: {successful}")
+            self.log_message(f"Failed: {failed}")
+            self.log_playlist_skips(skipped, duplicates, reused)
+            for playlist_url in playlist_urls:
+                summary = self.get_journal().summary(f"playlist:{playlist_url}")
+                self.log_message(f"Journal of {playlist_url}: {summary.get(DONE, 0)} done, "
+                                 f"{summary.get(FAILED, 0)} failed in total")
+            return successful, failed
+
+        except Exception as e:
+            self.log_message(f"ERROR processing playlist: {str(e)}")
+            # Additional troubleshooting info
+            self.log_message("Troubleshooting tips:")
+            self.log_message("1. Ensure yt-dlp is installed: pip install yt-dlp")
+            self.log_message("2. Try using the canonical playlist URL format")
+            self.log_message("3. Check if the playlist is public and accessible")
+            return None
+        finally:
+            self.finish_run()
+
+    def run_queue(self, job_queue=None, until_empty=False):
+        """Work through a JobQueue (the one in data_dir by default) until stop().
+
+        One worker pool drains all items, so the workers go from the files of
+        one item straight to those of the next. Items added, reordered, paused
+        or cancelled meanwhile are taken into account, and an item queued with
+        a higher priority than the one in progress goes ahead of it. With until_empty
+        the run ends once nothing is queued. Returns (successful, failed)
+        counts of files and videos.
+        """
+        self.begin_run("queue")
+        try:
+            job_queue = job_queue or self.get_job_queue()
+            requeued = job_queue.requeue_running()
+            if requeued:
+                self.log_message(f"Resuming {requeued} queue item(s) left running last time")
+            work = QueueWork(self, job_queue)
+
+            def queued_units():
+                while self.is_processing:
+                    unit = work.next_unit()
+                    if unit is not None:
+                        yield unit
+                    elif until_empty:
+                        return
+                    else:
+                        self.set_status("Waiting for queue items...")
+                        time.sleep(0.5)
+
+            def prepare(unit):
+                item, payload = unit
+                if item.kind == PLAYLIST and job_queue.state(item.id) == RUNNING:
+                    return self.download_playlist_audio(payload)
+                return None, 0, None  # Nothing to prefetch
+
+            def duration_of(unit):
+                item, payload = unit.item if pipeline else unit
+                if item.kind == PLAYLIST:
+                    return payload['duration']
+                if item.kind == FOLDER:
+                    return self.durations.known(payload[0].path)
+                return None
+
+            pipeline = None
+            items = queued_units()
+            if self.settings.prefetch_depth > 0:
+                # Download upcoming playlist videos while the current units are transcribed
+                pipeline = PrefetchPipeline(items, prepare, depth=self.settings.prefetch_depth,
+                                            disk_budget=self.settings.prefetch_budget_mb * 1024 * 1024,
+                                            is_running=lambda: self.is_processing).start()
+                items = pipeline
+
+            def process_item(worker_id, i, unit):
+                prefetched = unit if pipeline else None
+                item, payload = prefetched.item if prefetched else unit
+                try:
+                    media_path = None
+                    if prefetched and prefetched.error:
+                        self.log_message(f"Prefetch failed ({prefetched.error}), downloading directly")
+                    elif prefetched:
+                        media_path = prefetched.path
+                    return work.process(worker_id, f"#{i+1}", item, payload, media_path)
+                finally:
+                    if prefetched:
+                        prefetched.release()
+
+            slots = self.device_slots()
+            self.log_device_pool(slots)
+            self.set_progress(0)
+            work.start()
+            try:
+                successful, failed = self.run_worker_pool(items, process_item, self.pool_workers(slots),
+                                                          lambda: work.units_queued, slots=slots,
+                                                          duration_of=duration_of, lookahead=1,
+                                                          take_queue_items=False)
+            finally:
+                work.close(requeue=False)  # Items left running are requeued when the queue runs again
+                if pipeline:
+                    pipeline.close()
+
+            self.set_status("Queue finished" if self.is_processing else "Stopped")
+            self.log_message(f"\n=== QUEUE STOPPED ===")
+            self.log_message(f"Successful: {successful}")
+            self.log_message(f"Failed: {failed}")
+            return successful, failed
+
+        except Exception as e:
+            self.log_message(f"ERROR processing the queue: {str(e)}")
+            return None
+        finally:
+            self.finish_run()
+
+    def run_queue_unit(self, worker_id, item, payload, position, media_path=None):
+        """Transcribe one file or video of a queue item on a pool worker.
+
+        Returns True on success, False on failure and None when it was cancelled.
+        """
+        if item.kind == FOLDER:
+            entry, run_key = payload
+            return self.transcribe_batch_entry(worker_id, entry, position, run_key=run_key)
+        if item.kind == PLAYLIST:
+            return self.transcribe_playlist_entry(worker_id, payload, position, media_path)
+
+        # A single file or video, as in run_file and run_url
+        label = Path(payload).name if item.kind == FILE else payload
+        self.set_worker_status(worker_id, f"Processing: {label}", 0)
+        self.log_message(f"\n=== Processing {position}: {label} ===")
+        try:
+            if item.kind == FILE:
+                ok = self.transcribe_single_file(Path(payload), worker_id)
+            else:
+                ok = self.transcribe_youtube_url(payload, worker_id)
+        except Cancelled:
+            self.metrics.finish_job(payload, False, label)
+            self.log_message(f"■ Cancelled: {label}")
+            self.set_worker_status(worker_id, f"Cancelled: {label}", 100)
+            return None
+        self.metrics.finish_job(payload, ok, label)
+        if ok:
+            self.log_message(f"✓ Successfully transcribed: {label}")
+        else:
+            self.log_message(f"✗ Failed to transcribe: {label}")
+        self.set_worker_status(worker_id, f"Finished: {label}", 100)
+        return ok
+
+    def transcribe_playlist_entry(self, worker_id, entry, position, media_path=None):
+        """Transcribe one listed playlist video on a pool worker, journaling it under the entry's run_key.
+
+        Returns True on success, False on failure and None when it was cancelled.
+        """
+        video_url = entry['url']
+        label = entry['title'] or video_url
+        self.set_worker_status(worker_id, f"Processing: {label}", 0)
+        self.log_message(f"\n=== Processing playlist video {position} ===")
+
+        run_key = entry['run_key']
+        item_key = entry['id'] or video_url
+        self.get_journal().start(run_key, item_key, label, self.settings.model)
+        ok = False
+        cancelled = False
+        try:
+            ok = self.transcribe_youtube_url(video_url, worker_id, title=entry['title'], media_path=media_path,
+                                             duration=entry['duration'])
+        except Cancelled:
+            cancelled = True
+        finally:
+            self.get_journal().finish(run_key, item_key, ok, cancelled=cancelled)
+            self.metrics.finish_job(video_url, ok, label)
+            self.set_worker_status(worker_id, f"{'Cancelled' if cancelled else 'Finished'}: {label}", 100)
+
+        if cancelled:
+            self.log_message(f"■ Cancelled: {video_url}")
+            return None
+        if ok:
+            self.log_message(f"✓ Successfully transcribed: {video_url}")
+        else:
+            self.log_message(f"✗ Failed to transcribe: {video_url}")
+        return ok
+
+    def playlist_entries(self, playlist_urls, YoutubeDL, listed, skipped):
+        """Yield the videos of each playlist that still need work, while the playlists are being listed.
+
+        listed[0] counts the videos found, skipped[0] those the journal
+        records as done.
+        """
+        for playlist_url in playlist_urls:
+            run_key = f"playlist:{playlist_url}"
+            self.open_journal_run(run_key, "playlist")
+            yield from self.filter_journal_items(run_key, self.list_playlist(playlist_url, run_key, YoutubeDL, listed),
+                                                 lambda e: (e['id'] or e['url'], self.settings.model), skipped)
+
+    def list_playlist(self, playlist_url, run_key, YoutubeDL, listed):
+        """Yield the videos of a playlist, tagged with the journal run_key of the playlist.
+
+        Pages after the first are fetched as the queue asks for more videos. A
+        playlist that cannot be listed (any further) is reported and ends early.
+        """
+        self.log_message(f"Fetching playlist: {playlist_url}")
+
+        def first_page():
+            entries = iter_playlist_entries(playlist_url, YoutubeDL)
+            return entries, next(entries, None)
+
+        found = 0
+        try:
+            with self.metrics.stage(None, "metadata"):
+                entries, entry = self.call_with_retries("Fetching the playlist", first_page)
+            while entry is not None:
+                found += 1
+                listed[0] += 1
+                entry['run_key'] = run_key
+                self.metrics.set_duration(entry['url'], entry['duration'])
+                yield entry
+                with self.metrics.stage(None, "metadata"):
+                    entry = next(entries, None)
+        except Exception as e:
+            self.log_message(f"ERROR listing playlist {playlist_url}: {str(e)}")
+        self.log_message(f"Found {found} videos in {playlist_url}")
+
+    def log_playlist_skips(self, skipped, duplicates, reused):
+        """Log the playlist videos that were not queued, and why"""
+        if duplicates[0]:
+            self.log_message(f"Skipped {duplicates[0]} repeated video(s)")
+        if skipped[0]:
+            self.log_message(f"Skipped (already done): {skipped[0]}")
+        if reused[0]:
+            self.log_message(f"{reused[0]} video(s) were already transcribed in an earlier run")
+
+    def unique_entries(self, entries, duplicates):
+        """Yield playlist entries with repeats of a video left out (duplicates[0] counts them)"""
+        seen = set()
+        for entry in entries:
+            key = entry['id'] or entry['url']
+            if key in seen:
+                duplicates[0] += 1
+                continue
+            seen.add(key)
+            yield entry
+
+    def skip_known_videos(self, entries, reused):
+        """Yield the entries whose video still needs transcribing.
+
+        Videos the index knows get their earlier outputs (see reuse_videos)
+        and are journaled as done right away, before any download is started;
+        reused[0] counts them.
+        """
+        output_dir = self.youtube_output_dir()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        journal = self.get_journal()
+        for entry in entries:
+            if entry['id'] and self.reuse_video_outputs(entry['id'], output_dir, entry['url']):
+                journal.start(entry['run_key'], entry['id'], entry['title'] or entry['url'], self.settings.model)
+                journal.finish(entry['run_key'], entry['id'], True)
+                self.metrics.finish_job(entry['url'], True, entry['title'] or entry['url'])
+                reused[0] += 1
+                continue
+            yield entry
+
+    def write_env_batch_file(self, bat_path, command_line):
+        """Write a batch file that runs command_line inside the transcribe-anything virtualenv"""
+        cmd_parts = [
+            f'pushd "{self.settings.transcriber_dir}"',
+            r'call virtualEnv\Scripts\activate.bat',
+            command_line
+        ]
+
+        bat_content = f"""
+@echo off
+{chr(10).join(cmd_parts)}
+"""
+        with open(bat_path, "w", encoding="utf-8") as f:
+            f.write(bat_content)
+        return bat_path
+
+    def run_transcriber(self, source, temp_path, worker_id=None, duration=None):
+        """Transcribe source (file or URL) into temp_path as out.* files; returns True on success.
+
+        duration (seconds of media) scales the timeout. Transient failures are
+        retried up to max_retries times with exponential backoff, and a timed
+        out attempt with a TIMEOUT_RETRY_GROWTH times longer timeout; when the GPU
+        runs out of memory and cpu_fallback is set, the job is redone on the CPU.
+        Raises TimeoutExpired when the last attempt timed out, and Cancelled
+        when the job was cancelled (its processes are killed then). With a job
+        coordinator attached as remote, a worker agent does the transcription.
+        """
+        if self.remote is not None:
+            return self.run_remote_transcriber(source, temp_path, worker_id, duration)
+        slot = self.worker_slots.get(worker_id)
+        device = slot.name if slot else self.settings.device
+        env = slot.env() if slot else None
+        attempt = 1
+        timeout_scale = 1
+        while True:
+            started = time.perf_counter()
+            try:
+                ok, output = self.run_transcriber_once(source, temp_path, worker_id, device,
+                                                       self.transcription_timeout(duration, device) * timeout_scale,
+                                                       env)
+                kind = classify_failure(output) if not ok else None
+            except subprocess.TimeoutExpired:
+                if attempt > self.settings.max_retries:
+                    raise
+                ok, kind = False, "timed out"
+                timeout_scale *= TIMEOUT_RETRY_GROWTH
+            if not ok and self.processes.is_cancelled(worker_id):
+                raise Cancelled()
+            if ok:
+                if Path(source).exists():  # For URLs the time includes the download
+                    self.record_speed(device, duration, time.perf_counter() - started)
+                self.worker_devices[worker_id] = device
+                return True
+
+            if kind == OUT_OF_MEMORY and self.settings.cpu_fallback and device != "cpu":
+                self.log_message(f"{device} ran out of memory, redoing the job on the CPU")
+                device = "cpu"
+                env = None
+                continue
+            if (kind == PERMANENT or attempt > self.settings.max_retries
+                    or not self.wait_before_retry(attempt, kind, "Transcription")):
+                return False
+            attempt += 1
+
+    def run_remote_transcriber(self, source, temp_path, worker_id=None, duration=None):
+        """Queue source for the worker agents and wait for its outputs in temp_path; returns True on success"""
+        self.set_worker_status(worker_id, "Waiting for a worker agent...", 0)
+        ok, error = self.remote.transcribe(source, temp_path, duration,
+                                           is_running=lambda: self.is_processing and
+                                           not self.processes.is_cancelled(worker_id),
+                                           on_status=lambda node, status: self.set_worker_status(
+                                               worker_id, f"{node}: {status}"))
+        if not ok and self.processes.is_cancelled(worker_id):
+            raise Cancelled()
+        if not ok:
+            self.log_message(f"Remote transcription failed: {error}")
+        return ok
+
+    def run_transcriber_once(self, source, temp_path, worker_id, device, timeout, env=None):
+        """One transcription attempt on device ("cuda:1" selects the GPU through env); returns (ok, error output)"""
+        slot = self.worker_slots.get(worker_id)
+        if self.settings.warm_worker and device == (slot.name if slot else self.settings.device):
+            warm_worker = self.get_warm_worker(worker_id)
+            self.log_message(f"Sending job to warm worker...")
+            output_tail = collections.deque(maxlen=OUTPUT_TAIL_LINES)
+            on_line = self.make_progress_handler(source, worker_id, output_tail)
+            with self.processes.running(worker_id, warm_worker.process):
+                ok = warm_worker.transcribe(source, temp_path, timeout=timeout, on_output=on_line,
+                                            formats=self.settings.output_formats)
+            return ok, "" if ok else "\n".join([*output_tail, warm_worker.error or ""])
+
+        self.log_message(f"Running transcription command...")
+
+        # Execute the command, following its output as it is produced
+        output_tail = collections.deque(maxlen=OUTPUT_TAIL_LINES)
+        on_line = self.make_progress_handler(source, worker_id, output_tail)
+        cmd = self.transcriber_command(source, temp_path, device.split(":")[0])
+        returncode = run_streaming(cmd, on_line, timeout=timeout, env=env,
+                                   track=lambda process: self.processes.running(worker_id, process))
+
+        if returncode != 0 and self.processes.is_cancelled(worker_id):
+            return False, ""  # Killed on purpose; nothing to report
+        if returncode != 0:
+            self.log_message(f"Command failed with return code: {returncode}")
+            if output_tail:
+                self.log_message("Last output lines:\n" + "\n".join(list(output_tail)[-20:]))
+            return False, "\n".join(output_tail)
+        return True, ""
+
+    def transcriber_command(self, source, temp_path, device=None):
+        """Return the command that transcribes source into temp_path (on device, default the configured one)"""
+        device = device or self.settings.device
+        if self.settings.transcriber_command:
+            fields = {"source": source, "output_dir": temp_path, "device": device,
+                      "model": self.settings.model}
+            return [part.format(**fields) for part in shlex.split(self.settings.transcriber_command)]
+
+        command_line = f'transcribe-anything "{source}" --device {device} --output_dir "{temp_path}"'
+        if self.settings.model != "default":
+            command_line += f' --model {self.settings.model}'
+
+        # Create a temporary batch file that runs it inside the virtualenv
+        temp_bat = self.write_env_batch_file(temp_path / "transcribe_temp.bat", command_line)
+        return ['cmd.exe', '/c', str(temp_bat)]
+
+    def make_progress_handler(self, source, worker_id, output_tail):
+        """Build an on_line callback that keeps the output tail and reports the worker's progress"""
+        duration = self.media_duration(source)
+        last_percent = [-1]
+
+        def on_line(line):
+            output_tail.append(line)
+            progress = parse_progress_line(line, duration)
+            if progress is None:
+                return
+            percent, eta = progress
+            if int(percent) == last_percent[0]:
+                return  # Only report when the whole percentage changes
+            last_percent[0] = int(percent)
+            status = f"Transcribing: {percent:.0f}%"
+            if eta:
+                status += f" (ETA {eta})"
+            self.set_worker_status(worker_id, status, percent)
+
+        return on_line
+
+    def get_warm_worker(self, worker_id=None):
+        """Return the warm worker process of a pool worker (on its slot's device), starting it on first use"""
+        key = worker_id or 0
+        slot = self.worker_slots.get(worker_id)
+        with self.warm_workers_lock:
+            warm_worker, _ = self.warm_workers.get(key, (None, None))
+            if warm_worker is None:
+                worker_dir = Path(tempfile.mkdtemp(prefix="transcribe_worker_", dir=self.get_scratch_dir()))
+                command = self.warm_worker_command(worker_dir, slot.device if slot else self.settings.device)
+                warm_worker = WarmTranscriber(command, log=self.log_message, env=slot.env() if slot else None)
+                self.warm_workers[key] = (warm_worker, worker_dir)
+        if not warm_worker.is_alive():
+            self.log_message(f"Starting warm worker {key + 1} (loading {self.settings.model} model)...")
+            warm_worker.start()
+        return warm_worker
+
+    def warm_worker_command(self, worker_dir, device):
+        """Return the argv starting a warm worker on device (worker_dir holds its batch file on Windows)"""
+        if self.settings.worker_command:
+            fields = {"script": WORKER_SCRIPT, "device": device, "model": self.settings.model}
+            return [part.format(**fields) for part in shlex.split(self.settings.worker_command)]
+        if os.name == "nt":
+            command_line = f'python "{WORKER_SCRIPT}" --model {self.settings.model} --device {device}'
+            return ['cmd.exe', '/c', str(self.write_env_batch_file(worker_dir / "transcribe_worker.bat", command_line))]
+        # The virtualenv's interpreter when there is one, else ours
+        python = Path(self.settings.transcriber_dir) / "virtualEnv" / "bin" / "python"
+        return [str(python) if python.is_file() else sys.executable, str(WORKER_SCRIPT),
+                "--model", self.settings.model, "--device", device]
+
+    def close_warm_workers(self):
+        """Shut down all warm worker processes at the end of a run"""
+        with self.warm_workers_lock:
+            warm_workers = list(self.warm_workers.values())
+            self.warm_workers.clear()
+        for warm_worker, worker_dir in warm_workers:
+            warm_worker.close()
+            shutil.rmtree(worker_dir, ignore_errors=True)
+
+    def extract_batch_audio(self, file_path, ffmpeg, audio_format):
+        """Prefetch step: demux a video file to compact audio in its own scratch folder"""
+        if file_path.suffix.lower() not in VIDEO_EXTENSIONS:
+            return file_path, 0, None  # Audio files are passed through untouched
+        scratch_dir = tempfile.mkdtemp(prefix="transcribe_audio_", dir=self.get_scratch_dir())
+        try:
+            with self.metrics.stage(str(file_path), "extract") as stage:
+                audio_path = extract_audio(file_path, scratch_dir, audio_format, ffmpeg,
+                                           track=lambda process: self.processes.running(PREFETCH_OWNER, process))
+                stage.bytes = audio_path.stat().st_size
+            return audio_path, stage.bytes, scratch_dir
+        except Exception:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+            raise
+
+    def transcribe_long_file(self, source, temp_path, worker_id=None):
+        """Transcribe a long recording as silence-aligned chunks and stitch the results.
+
+        Returns None when source is too short (or ffmpeg is missing) so the caller
+        transcribes it normally, otherwise True/False; raises Cancelled when the
+        run was stopped before every chunk was done. In single-file mode the
+        chunks run on a pool of all configured workers. Inside a pool worker
+        they are shared with the pool: workers without items of their own take
+        chunks while this one goes through the rest.
+        """
+        ffmpeg, ffprobe = find_ffmpeg(), find_ffprobe()
+        if not ffmpeg or not ffprobe:
+            self.log_message("ffmpeg/ffprobe not found on PATH, transcribing without splitting")
+            return None
+
+        chunk_length = max(1, self.settings.chunk_minutes) * 60
+        duration = self.media_duration(source)
+        if not duration or duration < chunk_length * 2:
+            return None
+
+        self.log_message(f"Long recording ({duration / 60:.0f} min), detecting silences...")
+        track = lambda process: self.processes.running(worker_id, process)
+        chunks = plan_chunks(duration, detect_silences(source, ffmpeg, track=track), chunk_length)
+        self.log_message(f"Splitting into {len(chunks)} chunks of about {chunk_length // 60} min")
+
+        chunk_jobs = []
+        for index, (start, end) in enumerate(chunks):
+            chunk_dir = temp_path / f"chunk_{index:03d}"
+            chunk_dir.mkdir()
+            audio = extract_audio(source, chunk_dir, "opus", ffmpeg, start=start, duration=end - start, track=track)
+            chunk_jobs.append((index, chunk_dir, audio))
+
+        def transcribe_chunk(chunk_worker_id, _, chunk_job):
+            index, chunk_dir, audio = chunk_job
+            output_dir = chunk_dir / "output"
+            output_dir.mkdir()
+            self.set_worker_status(chunk_worker_id, f"Chunk {index + 1}/{len(chunks)}", 0)
+            ok = self.run_transcriber(audio, output_dir, chunk_worker_id, chunks[index][1] - chunks[index][0])
+            self.set_worker_status(chunk_worker_id, f"Chunk {index + 1}/{len(chunks)} done", 100)
+            return ok
+
+        if worker_id is None:
+            slots = self.device_slots()
+            successful, _ = self.run_worker_pool(chunk_jobs, transcribe_chunk, self.pool_workers(slots), slots=slots,
+                                                 duration_of=lambda job: chunks[job[0]][1] - chunks[job[0]][0],
+                                                 take_queue_items=False)
+        else:
+            shared = SharedJobs(chunk_jobs, lambda chunk_worker_id, job: transcribe_chunk(chunk_worker_id, None, job),
+                                self.log_message)
+            with self.shared_chunks_lock:
+                self.shared_chunks.append(shared)
+            try:
+                while self.is_processing and not self.processes.is_cancelled(worker_id):
+                    if not shared.run_next(worker_id):
+                        break
+                cancelled = lambda: not self.is_processing or self.processes.is_cancelled(worker_id)
+                successful = shared.wait(cancelled, self.cancel_worker)
+            finally:
+                with self.shared_chunks_lock:
+                    self.shared_chunks.remove(shared)
+        if successful < len(chunk_jobs):
+            # Chunks skipped after a stop or cancel count as neither; a partial transcript is never merged
+            if not self.is_processing or self.processes.is_cancelled(worker_id):
+                raise Cancelled()
+            self.log_message(f"{len(chunk_jobs) - successful} of {len(chunks)} chunks were not transcribed")
+            return False
+
+        merge_chunk_outputs([(chunk_dir / "output", start)
+                             for (_, chunk_dir, _), (start, _) in zip(chunk_jobs, chunks)], temp_path)
+        self.log_message(f"Merged {len(chunks)} chunk transcripts")
+        return True
+
+    def transcribe_single_file(self, file_path, worker_id=None, media_path=None, output_subdir=""):
+        """Transcribe a single file with custom naming.
+
+        media_path is a pre-extracted audio version of file_path to transcribe
+        instead; outputs are still named and cached after file_path.
+        output_subdir is the file's folder relative to the batch root, recreated
+        under a custom output folder. Raises Cancelled when the job was
+        cancelled; its scratch folder is removed all the same.
+        """
+        job_key = str(file_path)
+        try:
+            # Create temporary directory for this transcription (one per worker job)
+            prefix = f"transcribe_w{worker_id + 1}_" if worker_id is not None else "transcribe_"
+            temp_path = Path(tempfile.mkdtemp(prefix=prefix, dir=self.get_scratch_dir()))
+            try:
+                # Determine output directory
+                if self.settings.same_folder:
+                    final_output_dir = file_path.parent
+                else:
+                    final_output_dir = Path(self.settings.output_folder) / output_subdir
+
+                final_output_dir.mkdir(parents=True, exist_ok=True)
+
+                # Cached by the kind of device this worker runs on ("cuda", not "cuda:1")
+                slot = self.worker_slots.get(worker_id)
+                device = slot.device if slot else self.settings.device
+                cache = self.get_transcript_cache()
+                cache_key = None
+                if cache is not None:
+                    cache_key = cache.make_key(file_path, device, self.settings.model)
+                    if cache.restore(cache_key, temp_path):
+                        self.log_message(f"Cache hit, restoring previous transcript of {file_path.name}")
+                        return self.finalize_outputs(temp_path, file_path, final_output_dir, job_key)
+
+                source = media_path or file_path
+                duration = self.media_duration(source)
+                self.worker_devices.pop(worker_id, None)
+                self.metrics.set_duration(job_key, duration)
+                with self.metrics.stage(job_key, "transcription") as stage:
+                    stage.bytes = Path(source).stat().st_size
+                    chunked = None
+                    if self.settings.long_file:
+                        chunked = self.transcribe_long_file(source, temp_path, worker_id)
+                    if chunked is False:
+                        return False
+                    if chunked is None and not self.run_transcriber(source, temp_path, worker_id, duration):
+                        return False
+
+                if cache_key is not None:
+                    ran_on = self.worker_devices.get(worker_id, device).split(":")[0]
+                    if ran_on != device:  # E.g. redone on the CPU after the GPU ran out of memory
+                        cache_key = cache.make_key(file_path, ran_on, self.settings.model)
+                    cache.store(cache_key, temp_path)
+
+                # Move and rename output files
+                return self.finalize_outputs(temp_path, file_path, final_output_dir, job_key)
+            finally:
+                self.remove_scratch(job_key, temp_path)
+
+        except Cancelled:
+            raise
+        except subprocess.TimeoutExpired as e:
+            self.log_message(f"Transcription timed out after {format_eta(e.timeout)}")
+            return False
+        except Exception as e:
+            if self.processes.is_cancelled(worker_id):
+                raise Cancelled() from e  # E.g. ffmpeg of a long file killed mid-chunk
+            self.log_message(f"Error in transcribe_single_file: {str(e)}")
+            return False
+
+    def download_playlist_audio(self, entry):
+        """Prefetch step: download a video's audio into its own scratch folder"""
+        scratch_dir = tempfile.mkdtemp(prefix="transcribe_dl_", dir=self.get_scratch_dir())
+        try:
+            with self.metrics.stage(entry['url'], "download") as stage:
+                path = self.call_with_retries(f"Download of {entry['url']}",
+                                              lambda: download_audio(entry['url'], scratch_dir, self.get_youtube_dl(),
+                                                                     is_cancelled=lambda: not self.is_processing))
+                stage.bytes = Path(path).stat().st_size
+            return path, stage.bytes, scratch_dir
+        except Exception:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+            raise
+
+    def transcribe_youtube_url(self, url, worker_id=None, title=None, media_path=None, duration=None):
+        """Transcribe a YouTube URL using video title for naming.
+
+        title can be passed in when already known (e.g. from the playlist listing)
+        to skip the metadata lookup, and media_path when the audio was already
+        downloaded by the prefetch stage. duration (from the listing) sets the
+        timeout and is used when the downloaded audio cannot be probed. Raises
+        Cancelled when the job was cancelled.
+        """
+        try:
+            # Create temporary directory for this transcription
+            temp_path = Path(tempfile.mkdtemp(prefix="transcribe_yt_", dir=self.get_scratch_dir()))
+            try:
+                # Determine output directory
+                final_output_dir = self.youtube_output_dir()
+                final_output_dir.mkdir(parents=True, exist_ok=True)
+
+                video_id = extract_youtube_id(url)
+                if self.reuse_video_outputs(video_id, final_output_dir, url):
+                    return True
+
+                # Try to get the YouTube video title first
+                if not title:
+                    self.log_message("Attempting to fetch YouTube video title...")
+                    with self.metrics.stage(url, "metadata"):
+                        title, info_duration = self.get_youtube_info(url)
+                    duration = duration or info_duration
+
+                if title:
+                    base_name = title
+                    self.log_message(f"Using video title: {title}")
+                else:
+                    # Fallback to video ID
+                    base_name = video_id if video_id else "youtube_video"
+                    self.log_message(f"Title not available, using video ID: {base_name}")
+
+                # Create a file path object for naming purpose
+                dummy_file_path = Path(f"{base_name}.mp4")
+
+                if media_path:
+                    duration = self.media_duration(media_path) or duration
+                    self.metrics.set_duration(url, duration)
+                with self.metrics.stage(url, "transcription") as stage:
+                    if media_path:
+                        stage.bytes = Path(media_path).stat().st_size
+                    if not self.run_transcriber(media_path or url, temp_path, worker_id, duration):
+                        return False
+
+                # Move and rename output files
+                return self.finalize_outputs(temp_path, dummy_file_path, final_output_dir, url, video_id)
+            finally:
+                self.remove_scratch(url, temp_path)
+
+        except Cancelled:
+            raise
+        except subprocess.TimeoutExpired as e:
+            self.log_message(f"Transcription timed out after {format_eta(e.timeout)}")
+            return False
+        except Exception as e:
+            if self.processes.is_cancelled(worker_id):
+                raise Cancelled() from e  # Whatever broke, it broke because the job's processes were killed
+            self.log_message(f"Error in transcribe_youtube_url: {str(e)}")
+            return False
+
+    def finalize_outputs(self, temp_dir, original_file, output_dir, job_key=None, video_id=None):
+        """Move the selected output formats from temp_dir to output_dir, named after original_file.
+
+        The outputs of a video are recorded in the video index under video_id.
+        """
+        with self.metrics.stage(job_key, "move") as stage:
+            created = finalize_outputs(temp_dir, original_file.stem, output_dir, self.settings.output_formats,
+                                       self.log_message)
+            stage.bytes = sum(path.stat().st_size for path in created)
+        if not created:
+            self.log_message(f" No output files found in temp directory")
+            return False
+        if video_id:
+            self.get_video_index().record(video_id, created)
+        self.index_transcripts(created, video_url(video_id) if video_id else str(original_file))
+        self.log_message(f" Successfully created {len(created)} output files")
+        return True
+
+
+class QueueWork:
+    """The files and videos of a JobQueue's items, handed out one unit at a time to pool workers.
+
+    run_queue drains the queue through one of these; other runs get one from
+    TranscribeEngine.take_queue_items, so their workers take up items queued
+    while they run. Items are claimed by priority, and an item of a higher
+    priority than the one being expanded goes ahead of it. Thread-safe.
+    """
+
+    def __init__(self, engine, job_queue):
+        self.engine = engine
+        self.job_queue = job_queue
+        self.YoutubeDL = None
+        self.stack = []  # (item, its units) being expanded; the top one is drained first
+        self.expand_lock = threading.Lock()
+        self.progress = {}  # Queue item id -> [units queued, successful, failed, all units queued]
+        self.working = {}  # worker_id -> id of the queue item it is transcribing
+        self.lock = threading.Lock()  # Guards progress and working
+        self.units_queued = 0
+        self.closed = threading.Event()
+
+    def item_units(self, item):
+        """Yield the files or videos of a queue item as work units"""
+        engine = self.engine
+        if item.kind == FOLDER:
+            index = MediaIndex(Path(item.target), SUPPORTED_FORMATS, engine.settings.recursive)
+            run_key = f"folder:{index.root.resolve()}"
+            engine.open_journal_run(run_key, "batch")
+            for entry in engine.filter_journal_items(run_key, index, engine.entry_journal_key, [0]):
+                yield entry, run_key
+        elif item.kind == PLAYLIST:
+            self.YoutubeDL = self.YoutubeDL or engine.get_youtube_dl()
+            entries = engine.playlist_entries([canonicalize_playlist_url(item.target)], self.YoutubeDL, [0], [0])
+            yield from engine.skip_known_videos(engine.unique_entries(entries, [0]), [0])
+        else:
+            yield item.target
+
+    def settle(self, item_id):
+        """Finish a queue item once all its units are queued and processed (lock held)"""
+        queued, successful, failed, complete = self.progress[item_id]
+        if complete and successful + failed >= queued:
+            del self.progress[item_id]
+            self.job_queue.finish(item_id, not failed, f"{successful} done, {failed} failed")
+            self.engine.log_message(f"Queue item {item_id} finished: {successful} done, {failed} failed")
+
+    def next_unit(self):
+        """Return the next (item, payload) to transcribe, or None when nothing is queued right now"""
+        job_queue = self.job_queue
+        with self.expand_lock:
+            while self.engine.is_processing:
+                top = self.stack[-1][0] if self.stack else None
+                item = job_queue.claim(top.priority if top else None)
+                if item is not None:
+                    self.engine.log_message(f"\n=== Queue item {item.id}: {item.kind} {item.target} ===")
+                    with self.lock:
+                        self.progress[item.id] = [0, 0, 0, False]
+                    self.stack.append((item, self.item_units(item)))
+                    continue
+                if not self.stack:
+                    return None
+                item, units = self.stack[-1]
+                if job_queue.state(item.id) != RUNNING:
+                    units.close()
+                    self.stack.pop()
+                    self.engine.log_message(f"Queue item {item.id} {job_queue.state(item.id)}")
+                    continue
+                try:
+                    unit = next(units, None)
+                except Exception as e:
+                    self.engine.log_message(f"ERROR in queue item {item.id}: {str(e)}")
+                    job_queue.finish(item.id, False, str(e))
+                    self.stack.pop()
+                    continue
+                with self.lock:
+                    if unit is None:
+                        self.stack.pop()
+                        self.progress[item.id][3] = True
+                        self.settle(item.id)
+                        continue
+                    self.progress[item.id][0] += 1
+                self.units_queued += 1
+                return item, unit
+        return None
+
+    def process(self, worker_id, position, item, payload, media_path=None):
+        """Transcribe a unit on a pool worker; True/False, or None when it was skipped or cancelled"""
+        if self.job_queue.state(item.id) != RUNNING:
+            return None  # Paused or cancelled after this unit was handed out
+        with self.lock:
+            self.working[worker_id] = item.id
+            self.engine.processes.reset(worker_id)
+        ok = False
+        try:
+            ok = self.engine.run_queue_unit(worker_id, item, payload, position, media_path)
+            return ok
+        finally:
+            with self.lock:
+                del self.working[worker_id]
+                if item.id in self.progress and ok is not None:
+                    self.progress[item.id][1 if ok else 2] += 1
+                    self.settle(item.id)
+
+    def start(self):
+        threading.Thread(target=self._kill_cancelled_items, daemon=True).start()
+        return self
+
+    def _kill_cancelled_items(self):
+        """Free the devices of queue items cancelled while they are being transcribed"""
+        while not self.closed.wait(0.5):
+            with self.lock:
+                for worker_id, item_id in self.working.items():
+                    if self.job_queue.state(item_id) == ITEM_CANCELLED:
+                        self.engine.cancel_worker(worker_id)
+
+    def close(self, requeue=True):
+        """Stop watching for cancelled items; with requeue, queue the unfinished claimed items again"""
+        self.closed.set()
+        with self.expand_lock:
+            stack, self.stack = self.stack, []
+        for item, units in stack:
+            units.close()
+        if requeue:
+            with self.lock:
+                unfinished = list(self.progress)
+            for item_id in unfinished:
+                if self.job_queue.requeue(item_id):
+                    self.engine.log_message(f"Queue item {item_id} queued again for a later run")
+
+
+class SharedJobs:
+    """Jobs of one pool worker that the other workers of the pool may take over.
+
+    run(worker_id, job) returns True on success. The owning worker runs jobs
+    with run_next like its helpers, then waits for the helpers' jobs to end.
+    """
+
+    def __init__(self, jobs, run, log):
+        self.pending = collections.deque(jobs)
+        self.run = run
+        self.log = log
+        self.helpers = set()  # worker_ids running a job
+        self.successful = 0
+        self.changed = threading.Condition()
+
+    def run_next(self, worker_id):
+        """Run the next pending job on worker_id; False when none is left"""
+        with self.changed:
+            if not self.pending:
+                return False
+            job = self.pending.popleft()
+            self.helpers.add(worker_id)
+        ok = False
+        try:
+            ok = self.run(worker_id, job)
+        except Cancelled:
+            pass
+        except Exception as e:
+            self.log(f"✗ Worker {worker_id + 1} error: {str(e)}")
+        finally:
+            with self.changed:
+                self.helpers.discard(worker_id)
+                self.successful += bool(ok)
+                self.changed.notify_all()
+        return True
+
+    def wait(self, is_cancelled, cancel_worker):
+        """Wait for the jobs in progress and return the number that succeeded.
+
+        Once is_cancelled(), the pending jobs are dropped and the helpers'
+        jobs are cancelled with cancel_worker(worker_id).
+        """
+        with self.changed:
+            while self.helpers:
+                if is_cancelled():
+                    self.pending.clear()
+                    for worker_id in self.helpers:
+                        cancel_worker(worker_id)
+                self.changed.wait(0.5)
+            return self.successful
@@ -0,0 +1,259 @@
+"""Long-lived transcription worker.
+
+Run inside the transcribe-anything virtualenv, the worker loads the Whisper
+model once and then serves jobs read as JSON lines from stdin, answering each
+with one JSON line on stdout:
+
+    -> {"id": 1, "source": "C:/media/talk.mp4", "output_dir": "C:/Temp/x", "formats": ["txt", "srt"]}
+    <- {"id": 1, "ok": true, "files": ["out.json", "out.srt", "out.txt"]}
+
+Outputs are written as out.<ext>, the same names transcribe-anything uses, so
+the GUI can finalize them the same way. Only the requested formats (all of
+them if "formats" is left out) are written, plus the JSON result the other
+formats can be rendered from later. Use --fake to run without Whisper
+(it writes placeholder transcripts) for testing the GUI side.
+"""
+import argparse
+import collections
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from process_tree import NEW_PROCESS_GROUP, Cancelled, kill_process_tree
+from subtitles import OUTPUT_FORMATS, render_format
+
+# Model used when the GUI leaves the model on "default" (the Whisper CLI default)
+WARM_DEFAULT_MODEL = "small"
+
+READY_MESSAGE = "ready"
+
+
+def is_url(source):
+    return source.startswith("http://") or source.startswith("https://")
+
+
+def download_audio(url, output_dir, YoutubeDL=None, is_cancelled=None):
+    """Download the best audio stream of url into output_dir and return its path.
+
+    The download is aborted with Cancelled as soon as is_cancelled() turns true.
+    """
+    if YoutubeDL is None:
+        from yt_dlp import YoutubeDL
+
+    def check_cancelled(progress):
+        if is_cancelled and is_cancelled():
+            raise Cancelled("download cancelled")
+
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'format': 'bestaudio/best',
+        'outtmpl': str(Path(output_dir) / 'download.%(ext)s'),
+        'progress_hooks': [check_cancelled],
+    }
+    with YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=True)
+        return ydl.prepare_filename(info)
+
+
+class WhisperBackend:
+    """Transcribes with a Whisper model that stays loaded between jobs"""
+
+    def __init__(self, model_name, device):
+        import whisper
+        from whisper.utils import get_writer
+        self.get_writer = get_writer
+        # "insane" is a transcribe-anything mode; plain Whisper runs it on the GPU
+        self.device = "cuda" if device == "insane" else device
+        self.model = whisper.load_model(model_name, device=self.device)
+
+    def transcribe(self, source, output_dir, formats=None):
+        audio = download_audio(source, output_dir) if is_url(source) else source
+        result = self.model.transcribe(str(audio), verbose=False, fp16=self.device == "cuda")
+        options = {"max_line_width": None, "max_line_count": None, "highlight_words": False}
+        for output_format in set(formats or ["all"]) | {"json"}:
+            self.get_writer(output_format, str(output_dir))(result, "out", options)
+
+
+class FakeBackend:
+    """Writes placeholder outputs after an optional delay, without loading a model"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def transcribe(self, source, output_dir, formats=None):
+        if self.delay:
+            time.sleep(self.delay)
+        text = f" Transcript of {Path(source).name}"
+        result = {"text": text, "segments": [{"id": 0, "start": 0.0, "end": 1.0, "text": text}], "language": "en"}
+        for output_format in set(formats or OUTPUT_FORMATS) | {"json"}:
+            Path(output_dir, f"out.{output_format}").write_text(render_format(result, output_format), encoding="utf-8")
+
+
+def serve(backend, stdin, stdout):
+    """Answer jobs from stdin until it is closed"""
+    stdout.write(json.dumps({"status": READY_MESSAGE}) + "\n")
+    stdout.flush()
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        job = json.loads(line)
+        response = {"id": job.get("id")}
+        try:
+            output_dir = Path(job["output_dir"])
+            output_dir.mkdir(parents=True, exist_ok=True)
+            backend.transcribe(job["source"], output_dir, job.get("formats"))
+            response["ok"] = True
+            response["files"] = sorted(p.name for p in output_dir.iterdir() if p.name.startswith("out."))
+        except Exception as e:
+            response["ok"] = False
+            response["error"] = str(e)
+        stdout.write(json.dumps(response) + "\n")
+        stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm Whisper transcription worker")
+    parser.add_argument("--model", default=WARM_DEFAULT_MODEL)
+    parser.add_argument("--device", default="cuda")
+    parser.add_argument("--fake", action="store_true", help="Do not load Whisper, write placeholder outputs")
+    parser.add_argument("--fake-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # Libraries print progress to stdout; keep the real stdout for the protocol only
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+
+    if args.fake:
+        backend = FakeBackend(args.fake_delay)
+    else:
+        model = WARM_DEFAULT_MODEL if args.model == "default" else args.model
+        backend = WhisperBackend(model, args.device)
+    serve(backend, sys.stdin, protocol_out)
+
+
+class WarmTranscriber:
+    """Client side of a worker process, reused for every job of a run.
+
+    command is the argv that starts the worker (for example a batch file that
+    activates the virtualenv and runs this script), env its environment (None
+    inherits ours). log receives error messages.
+    """
+
+    def __init__(self, command, log=None, startup_timeout=600, env=None):
+        self.command = command
+        self.env = env
+        self.log = log or (lambda message: None)
+        self.startup_timeout = startup_timeout
+        self.error = None  # Error message of the last failed job
+        self.process = None
+        self.responses = None
+        self.responses_ready = None
+        self.stderr_tail = collections.deque(maxlen=50)
+        self.on_output = None  # Receives the worker's stderr lines during a job
+        self.next_id = 0
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        """Start the worker and wait until its model is loaded"""
+        self.process = subprocess.Popen(
+            self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="replace", bufsize=1, env=self.env, **NEW_PROCESS_GROUP)
+        self.responses = collections.deque()
+        self.responses_ready = threading.Condition()
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+
+        ready = self._wait_response(self.startup_timeout)
+        if not ready or ready.get("status") != READY_MESSAGE:
+            self.close()
+            raise RuntimeError(f"Warm worker failed to start: {self.last_error()}")
+
+    def _read_stdout(self):
+        for line in self.process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue  # Stray output that is not part of the protocol
+            with self.responses_ready:
+                self.responses.append(message)
+                self.responses_ready.notify_all()
+        with self.responses_ready:
+            self.responses.append(None)  # Worker exited
+            self.responses_ready.notify_all()
+
+    def _read_stderr(self):
+        # Whisper's progress bar goes to stderr; universal newlines split its updates into lines
+        for line in self.process.stderr:
+            line = line.rstrip()
+            if not line:
+                continue
+            self.stderr_tail.append(line)
+            on_output = self.on_output
+            if on_output:
+                on_output(line)
+
+    def _wait_response(self, timeout):
+        with self.responses_ready:
+            if not self.responses_ready.wait_for(lambda: self.responses, timeout):
+                raise subprocess.TimeoutExpired(self.command, timeout)
+            return self.responses.popleft()
+
+    def last_error(self):
+        return "\n".join(self.stderr_tail) or "no output"
+
+    def transcribe(self, source, output_dir, timeout=None, on_output=None, formats=None):
+        """Run one job; returns True on success. Raises TimeoutExpired on timeout.
+
+        on_output receives the worker's output lines (progress) while the job runs;
+        formats limits the outputs written (the JSON result is always written).
+        """
+        if not self.is_alive():
+            self.start()
+        self.next_id += 1
+        job = {"id": self.next_id, "source": str(source), "output_dir": str(output_dir)}
+        if formats:
+            job["formats"] = list(formats)
+        self.on_output = on_output
+        self.process.stdin.write(json.dumps(job) + "\n")
+        self.process.stdin.flush()
+        try:
+            response = self._wait_response(timeout)
+        except subprocess.TimeoutExpired:
+            self.close()  # A stuck worker cannot be reused
+            raise
+        finally:
+            self.on_output = None
+        if response is None:
+            self.error = self.last_error()
+            self.log(f"Warm worker exited unexpectedly: {self.error}")
+            self.process = None
+            return False
+        if not response.get("ok"):
+            self.error = str(response.get("error"))
+            self.log(f"Warm worker error: {self.error}")
+            return False
+        self.error = None
+        return True
+
+    def close(self):
+        """Stop the worker process"""
+        if self.process is None:
+            return
+        try:
+            if self.process.poll() is None:
+                self.process.stdin.close()
+                self.process.wait(timeout=10)
+        except Exception:
+            kill_process_tree(self.process)
+        self.process = None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Content-addressed cache of transcription outputs.
+
+Entries are keyed by a SHA-256 of the media content combined with the
+transcription settings (device, model), so a renamed or moved file still hits
+while a changed file or different settings miss. The cache is capped in size
+and evicts the least recently used entries first.
+"""
+import hashlib
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# Output files worth caching (everything transcribe-anything produces)
+CACHED_EXTENSIONS = {'.txt', '.srt', '.vtt', '.json', '.tsv'}
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """Return the SHA-256 hex digest of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """Persistent LRU cache of output folders, stored under cache_dir"""
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024 ** 3):
+        self.cache_dir = Path(cache_dir)
+        self.entries_dir = self.cache_dir / "entries"
+        self.entries_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.cache_dir / "index.db"), check_same_thread=False)
+        with self.db:
+            self.db.execute("""CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, size INTEGER NOT NULL, last_used REAL NOT NULL)""")
+            # Remembers content digests so unchanged files are not re-hashed on every run
+            self.db.execute("""CREATE TABLE IF NOT EXISTS digests (
+                path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL)""")
+
+    def content_digest(self, path):
+        """Return the content digest of path, re-hashing only if size or mtime changed"""
+        path = Path(path).resolve()
+        stat = path.stat()
+        with self.lock:
+            row = self.db.execute("SELECT size, mtime_ns, digest FROM digests WHERE path = ?",
+                                  (str(path),)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        digest = hash_file(path)
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?)",
+                            (str(path), stat.st_size, stat.st_mtime_ns, digest))
+        return digest
+
+    def make_key(self, media_path, device, model):
+        """Build the cache key for transcribing media_path with the given settings"""
+        settings = f"{self.content_digest(media_path)}|{device}|{model}"
+        return hashlib.sha256(settings.encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key):
+        return self.entries_dir / key[:2] / key
+
+    def restore(self, key, dest_dir):
+        """Copy a cached entry's files into dest_dir; returns False on a miss"""
+        entry_dir = self._entry_dir(key)
+        with self.lock:
+            row = self.db.execute("SELECT key FROM entries WHERE key = ?", (key,)).fetchone()
+            if not row or not entry_dir.is_dir():
+                return False
+            with self.db:
+                self.db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            for cached_file in entry_dir.iterdir():
+                shutil.copy2(cached_file, Path(dest_dir) / cached_file.name)
+        return True
+
+    def store(self, key, src_dir):
+        """Copy the output files found in src_dir into the cache under key"""
+        files = [f for f in Path(src_dir).iterdir()
+                 if f.is_file() and f.suffix in CACHED_EXTENSIONS]
+        if not files:
+            return
+
+        size = sum(f.stat().st_size for f in files)
+        if size > self.max_bytes:
+            return  # Would evict everything else and still not fit
+
+        entry_dir = self._entry_dir(key)
+        with self.lock:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            entry_dir.mkdir(parents=True)
+            for f in files:
+                shutil.copy2(f, entry_dir / f.name)
+            with self.db:
+                self.db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, size, time.time()))
+            self._evict()
+
+    def total_size(self):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits max_bytes (lock held)"""
+        total = self.total_size()
+        if total <= self.max_bytes:
+            return
+        rows = self.db.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall()
+        with self.db:
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+                self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
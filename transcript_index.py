@@ -0,0 +1,228 @@
+"""Full-text search over the transcripts written by past runs.
+
+Each finished job adds its transcript to an SQLite FTS5 index with one row
+per cue and the cue's start and end time. A phrase is found in milliseconds
+without reading any file, and each hit knows where in the recording it is.
+A hit only spans a single cue, so a phrase split over two cues is not found.
+
+Where SQLite is built without FTS5 the cues go into a plain table instead,
+searched with LIKE: slower on big indexes, hits in no particular order, and
+case-insensitive for ASCII letters only, but the same query syntax works.
+"""
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from subtitles import format_timestamp, read_cues
+
+# Format indexed for a transcript, best first: the first one with cue timing wins
+INDEX_PREFERENCE = ["srt", "vtt", "json", "tsv", "txt"]
+SNIPPET_WORDS = 16
+
+
+class SearchHit:
+    """One matching cue: the transcript file, the media it belongs to, the cue time and a snippet.
+
+    The snippet marks matched words with [brackets]; start is None for plain text.
+    """
+
+    def __init__(self, path, media, start, end, snippet):
+        self.path = Path(path)
+        self.media = media
+        self.start = start
+        self.end = end
+        self.snippet = snippet
+
+    @property
+    def timestamp(self):
+        return format_timestamp(self.start)[:8] if self.start is not None else ""
+
+    def link(self):
+        """Return a URL or path that opens the hit: YouTube videos at the cue, local transcripts as files"""
+        if self.media and self.media.startswith("http"):
+            if self.start is None:
+                return self.media
+            parts = urlsplit(self.media)
+            query = [(k, v) for k, v in parse_qsl(parts.query) if k != "t"] + [("t", f"{int(self.start)}s")]
+            return urlunsplit(parts._replace(query=urlencode(query)))
+        return str(self.path)
+
+
+def pick_transcript(paths):
+    """Return the transcript among paths (outputs of one job) the index should read, or None"""
+    by_format = {Path(path).suffix.lstrip(".").lower(): Path(path) for path in paths}
+    return next((by_format[f] for f in INDEX_PREFERENCE if f in by_format), None)
+
+
+def fts_phrase_query(text):
+    """Quote every word of text, so punctuation is not read as FTS query syntax"""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def fts5_available(db):
+    """True when the SQLite library behind db has the FTS5 extension"""
+    try:
+        db.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(text)")
+    except sqlite3.OperationalError:
+        return False
+    db.execute("DROP TABLE temp.fts5_probe")
+    return True
+
+
+def like_terms(query):
+    """Split an FTS-style query into the phrases and words a cue must contain.
+
+    Like FTS5, punctuation around words (and prefix stars) is left out.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+        term = " ".join(phrase.split()) if phrase else re.sub(r"^\W+|\W+$", "", word)
+        if term and term.upper() not in ("AND", "OR", "NOT"):
+            terms.append(term)
+    return terms
+
+
+def like_pattern(term):
+    """LIKE pattern (with ESCAPE '\\') matching text that contains term"""
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def like_snippet(text, terms):
+    """Mark the words of text that are (part of) a term with [brackets], trimmed around the first one"""
+    words = text.split()
+    needles = [part.casefold() for term in terms for part in term.split()]
+    hits = [i for i, word in enumerate(words) if any(needle in word.casefold() for needle in needles)]
+    marked = [f"[{word}]" if i in hits else word for i, word in enumerate(words)]
+    start = max(0, min(hits[0] if hits else 0, len(words) - SNIPPET_WORDS))
+    snippet = " ".join(marked[start:start + SNIPPET_WORDS])
+    return ("…" if start else "") + snippet + ("…" if start + SNIPPET_WORDS < len(words) else "")
+
+
+class TranscriptIndex:
+    """SQLite FTS5 index of transcript cues; safe to share between worker threads.
+
+    full_text=False (or an SQLite without FTS5) keeps the cues in a plain
+    table searched with LIKE; see the module docstring.
+    """
+
+    def __init__(self, db_path, full_text=True):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.full_text = full_text and fts5_available(self.db)
+        self.cues_table = "cues" if self.full_text else "plain_cues"
+        with self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS transcripts (
+                id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, media TEXT, mtime REAL NOT NULL)""")
+            if self.full_text:
+                self.db.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS cues USING fts5(
+                    text, transcript_id UNINDEXED, start UNINDEXED, end UNINDEXED,
+                    tokenize='unicode61 remove_diacritics 2')""")
+            else:
+                self.db.execute("""CREATE TABLE IF NOT EXISTS plain_cues (
+                    text TEXT NOT NULL, transcript_id INTEGER NOT NULL, start REAL, end REAL)""")
+                self.db.execute("CREATE INDEX IF NOT EXISTS plain_cues_transcript ON plain_cues (transcript_id)")
+
+    def add(self, paths, media=None):
+        """Index the transcript among paths (the outputs of one job) and return its number of cues.
+
+        media is the recording the transcript belongs to (file path or video URL).
+        An already indexed transcript at the same path is replaced.
+        """
+        path = pick_transcript(paths)
+        if path is None:
+            return 0
+        path = path.resolve()
+        cues = [cue for cue in read_cues(path) if cue[2]]
+        mtime = path.stat().st_mtime
+        with self.lock, self.db:
+            self.remove_locked(path, [p for p in paths if Path(p).resolve() != path])
+            transcript_id = self.db.execute("INSERT INTO transcripts (path, media, mtime) VALUES (?, ?, ?)",
+                                            (str(path), media, mtime)).lastrowid
+            self.db.executemany(f"INSERT INTO {self.cues_table} (text, transcript_id, start, end) VALUES (?, ?, ?, ?)",
+                                [(text, transcript_id, start, end) for start, end, text in cues])
+        return len(cues)
+
+    def remove_locked(self, path, others=()):
+        """Drop the index entries of path and of the other outputs of its job (lock held)"""
+        for stale in [path, *others]:
+            row = self.db.execute("SELECT id FROM transcripts WHERE path = ?", (str(Path(stale).resolve()),)).fetchone()
+            if row:
+                self.db.execute(f"DELETE FROM {self.cues_table} WHERE transcript_id = ?", row)
+                self.db.execute("DELETE FROM transcripts WHERE id = ?", row)
+
+    def add_folder(self, folder, recursive=True, log=None):
+        """Index the transcripts already in folder; unchanged ones are skipped.
+
+        Returns (indexed, unchanged) counts of transcripts.
+        """
+        log = log or (lambda message: None)
+        folder = Path(folder)
+        groups = {}
+        for output_format in INDEX_PREFERENCE:
+            pattern = f"**/*.{output_format}" if recursive else f"*.{output_format}"
+            for path in folder.glob(pattern):
+                if path.is_file() and not path.name.startswith("."):
+                    groups.setdefault(path.with_suffix(""), []).append(path)
+        with self.lock:
+            known = dict(self.db.execute("SELECT path, mtime FROM transcripts").fetchall())
+        indexed = unchanged = 0
+        for paths in groups.values():
+            path = pick_transcript(paths)
+            if known.get(str(path.resolve())) == path.stat().st_mtime:
+                unchanged += 1
+                continue
+            try:
+                self.add(paths)
+                indexed += 1
+            except (OSError, ValueError) as e:
+                log(f"Could not index {path}: {e}")
+        return indexed, unchanged
+
+    def search(self, query, limit=50):
+        """Return up to limit SearchHits for an FTS5 query, best matches first.
+
+        Plain words match cues containing all of them, "quoted words" a phrase
+        and word* a prefix; text that is no valid query is searched word by word.
+        Transcripts whose file is gone are dropped from the index on the way.
+        """
+        if not query.strip():
+            return []
+        if self.full_text:
+            sql = f"""SELECT t.path, t.media, c.start, c.end, snippet(cues, 0, '[', ']', '…', {SNIPPET_WORDS})
+                      FROM cues c JOIN transcripts t ON t.id = c.transcript_id
+                      WHERE cues MATCH ? ORDER BY rank LIMIT ?"""
+            with self.lock:
+                try:
+                    rows = self.db.execute(sql, (query, limit)).fetchall()
+                except sqlite3.OperationalError:
+                    rows = self.db.execute(sql, (fts_phrase_query(query), limit)).fetchall()
+            hits = [SearchHit(*row) for row in rows]
+        else:
+            hits = self.search_like(query, limit)
+        missing = {hit.path for hit in hits if not hit.path.exists()}
+        if missing:
+            with self.lock, self.db:
+                for path in missing:
+                    self.remove_locked(path)
+        return [hit for hit in hits if hit.path not in missing]
+
+    def search_like(self, query, limit):
+        """search() without FTS5: cues containing every phrase and word of query"""
+        terms = like_terms(query)
+        if not terms:
+            return []
+        where = " AND ".join(["c.text LIKE ? ESCAPE '\\'"] * len(terms))
+        with self.lock:
+            rows = self.db.execute(f"""SELECT t.path, t.media, c.start, c.end, c.text
+                                       FROM plain_cues c JOIN transcripts t ON t.id = c.transcript_id
+                                       WHERE {where} ORDER BY t.path, c.start LIMIT ?""",
+                                   (*map(like_pattern, terms), limit)).fetchall()
+        return [SearchHit(path, media, start, end, like_snippet(text, terms)) for path, media, start, end, text in rows]
+
+    def count(self):
+        """Return the number of indexed transcripts"""
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
@@ -0,0 +1,42 @@
+"""Persistent index from YouTube video ID to the transcript files written for it.
+
+Playlists often share videos. With the index, a video transcribed once (in
+any playlist or run) is not transcribed again; its earlier outputs are copied
+or linked to the new destination instead.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class VideoIndex:
+    """SQLite-backed map of video IDs to output files; safe to share between worker threads"""
+
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(db_path), check_same_thread=False)
+        with self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS outputs (
+                video_id TEXT NOT NULL, format TEXT NOT NULL, path TEXT NOT NULL, recorded REAL NOT NULL,
+                PRIMARY KEY (video_id, path))""")
+
+    def record(self, video_id, paths):
+        """Remember the output files written for a video"""
+        now = time.time()
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?)",
+                                [(video_id, Path(path).suffix.lstrip(".").lower(), str(Path(path).resolve()), now)
+                                 for path in paths])
+
+    def outputs(self, video_id):
+        """Return {format: path} of the video's recorded outputs that still exist, newest first per format"""
+        with self.lock:
+            rows = self.db.execute("SELECT format, path FROM outputs WHERE video_id = ? ORDER BY recorded DESC",
+                                   (video_id,)).fetchall()
+        found = {}
+        for output_format, path in rows:
+            if output_format not in found and Path(path).is_file():
+                found[output_format] = Path(path)
+        return found
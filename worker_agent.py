@@ -0,0 +1,196 @@
+"""Worker agent: transcribe jobs leased from a JobCoordinator on another machine.
+
+Each of the agent's workers leases a job, fetches its media from the
+coordinator (URLs are downloaded by the transcriber itself), transcribes it
+with TranscribeEngine.run_transcriber under the agent's own settings (device,
+model, warm worker, retries) and posts the output files back. A heartbeat
+thread renews the lease and reports progress while the job runs. When the
+coordinator refuses a heartbeat, the job was handed to another agent, so its
+processes here are killed.
+"""
+import json
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from failures import backoff_delay
+from job_coordinator import MAX_LEASE_WAIT, TOKEN_HEADER
+from process_tree import Cancelled
+from subtitles import OUTPUT_FORMATS
+from transcribe_engine import TranscribeEngine
+
+# Heartbeats per lease period, so one lost request does not cost the lease
+HEARTBEATS_PER_LEASE = 3
+# Longest wait between attempts to reach an unreachable coordinator
+MAX_RECONNECT_DELAY = 60
+
+
+class WorkerAgent:
+    """Lease and transcribe jobs from the coordinator at server_url until stop().
+
+    With idle_exit, run() returns after that many seconds without a job.
+    """
+
+    def __init__(self, server_url, settings, node=None, token="", idle_exit=0, on_log=None):
+        self.server_url = server_url.rstrip("/")
+        self.node = node or socket.gethostname()
+        self.token = token
+        self.idle_exit = idle_exit
+        self.statuses = {}  # worker_id -> latest progress text, sent with the heartbeats
+        self.engine = TranscribeEngine(settings, on_log=on_log, on_worker_status=self.set_status)
+        self.last_job = time.monotonic()
+
+    def log_message(self, message):
+        self.engine.log_message(message)
+
+    def set_status(self, worker_id, status, progress):
+        self.statuses[worker_id] = status
+
+    def stop(self):
+        self.engine.stop()
+
+    def request(self, path, data=None, timeout=MAX_LEASE_WAIT + 10):
+        """POST data as JSON (GET without data) and return the open response"""
+        headers = {TOKEN_HEADER: self.token} if self.token else {}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        request = urllib.request.Request(self.server_url + path, data=body, headers=headers)
+        return urllib.request.urlopen(request, timeout=timeout)
+
+    def post(self, path, data):
+        try:
+            with self.request(path, data) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                return {"ok": False}  # The job is no longer ours
+            raise
+
+    def run(self):
+        """Run one worker per configured worker (or device pool slot) until stopped or idle"""
+        engine = self.engine
+        engine.begin_run("agent")
+        try:
+            slots = engine.device_slots()
+            engine.log_device_pool(slots)
+            worker_count = engine.pool_workers(slots)
+            if slots:
+                engine.worker_slots = dict(enumerate(slots))
+            self.log_message(f"Worker agent {self.node} with {worker_count} worker(s) taking jobs from "
+                             f"{self.server_url}")
+            threads = [threading.Thread(target=self.worker, args=(worker_id,), daemon=True)
+                       for worker_id in range(worker_count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            engine.worker_slots = {}
+            engine.finish_run()
+
+    def worker(self, worker_id):
+        failures = 0
+        while self.engine.is_processing:
+            if self.idle_exit and time.monotonic() - self.last_job > self.idle_exit:
+                self.log_message(f"No jobs for {self.idle_exit} s, worker {worker_id + 1} exits")
+                break
+            try:
+                wait = min(MAX_LEASE_WAIT, self.idle_exit or MAX_LEASE_WAIT)
+                job = self.post("/lease", {"node": f"{self.node}/{worker_id + 1}", "wait": wait})["job"]
+                failures = 0
+            except (OSError, ValueError) as e:
+                failures += 1
+                delay = backoff_delay(failures, 1, MAX_RECONNECT_DELAY)
+                self.log_message(f"Coordinator not reachable ({e}), trying again in {delay:.0f} s")
+                time.sleep(delay)
+                continue
+            if job is None:
+                continue
+            self.last_job = time.monotonic()
+            self.run_job(worker_id, job)
+            self.last_job = time.monotonic()
+            self.engine.set_worker_status(worker_id, "Idle")
+
+    def run_job(self, worker_id, job):
+        """Transcribe a leased job and post the result"""
+        engine = self.engine
+        job_path = f"/jobs/{job['id']}"
+        label = job.get("url") or job["media"]
+        self.log_message(f"\n=== Job {job['id']}: {label} ===")
+        self.statuses[worker_id] = "Starting"
+        engine.processes.reset(worker_id)  # A lost lease of the previous job does not carry over
+        scratch = Path(tempfile.mkdtemp(prefix=f"transcribe_agent_w{worker_id + 1}_", dir=engine.get_scratch_dir()))
+        heartbeat_stop = threading.Event()
+        interval = job.get("lease_seconds", 60) / HEARTBEATS_PER_LEASE
+        threading.Thread(target=self.send_heartbeats,
+                         args=(worker_id, job_path, job["lease"], interval, heartbeat_stop), daemon=True).start()
+        ok = False
+        error = None
+        outputs = {}
+        cancelled = False
+        try:
+            source = job.get("url")
+            if source is None:
+                source = scratch / Path(job["media"]).name
+                with engine.metrics.stage(job["id"], "download") as stage:
+                    with self.request(f"{job_path}/media?lease={job['lease']}") as response, \
+                            open(source, "wb") as f:
+                        shutil.copyfileobj(response, f, 1024 * 1024)
+                    stage.bytes = source.stat().st_size
+            output_dir = scratch / "output"
+            output_dir.mkdir()
+            with engine.metrics.stage(job["id"], "transcription"):
+                ok = engine.run_transcriber(str(source), output_dir, worker_id, job.get("duration"))
+            if ok:
+                outputs = {path.name: path.read_text(encoding="utf-8", errors="replace")
+                           for path in output_dir.iterdir()
+                           if path.is_file() and path.suffix.lstrip(".").lower() in OUTPUT_FORMATS}
+                ok = bool(outputs)
+                if not ok:
+                    error = "the transcriber wrote no outputs"
+            else:
+                error = "transcription failed (see the agent's log)"
+        except Cancelled:
+            cancelled = True
+        except Exception as e:
+            error = str(e)
+            self.log_message(f"✗ Job {job['id']} error: {error}")
+        finally:
+            heartbeat_stop.set()
+            shutil.rmtree(scratch, ignore_errors=True)
+            engine.metrics.finish_job(job["id"], ok, label)
+        if cancelled or (not ok and engine.processes.is_cancelled(worker_id)):
+            self.log_message(f"■ Job {job['id']} given up: its lease was lost")
+            return
+
+        try:
+            accepted = self.post(f"{job_path}/result", {"lease": job["lease"], "ok": ok, "error": error,
+                                                        "outputs": outputs})["ok"]
+        except (OSError, ValueError) as e:
+            self.log_message(f"✗ Could not deliver job {job['id']}: {e}")
+            return
+        if not accepted:
+            self.log_message(f"Job {job['id']} was meanwhile handed to another agent, result dropped")
+        elif ok:
+            self.log_message(f"✓ Job {job['id']} done: {label}")
+        else:
+            self.log_message(f"✗ Job {job['id']} failed: {label}")
+
+    def send_heartbeats(self, worker_id, job_path, lease, interval, stop):
+        """Renew the job's lease every interval seconds and report progress until stop is set"""
+        while not stop.wait(interval):
+            try:
+                status = self.statuses.get(worker_id)
+                if not self.post(f"{job_path}/heartbeat", {"lease": lease, "status": status})["ok"]:
+                    self.log_message(f"Lease of {job_path} lost; the coordinator queued the job again")
+                    self.engine.cancel_worker(worker_id)  # Kill the job here so it is not done twice
+                    return
+            except (OSError, ValueError) as e:
+                self.log_message(f"Heartbeat for {job_path} failed: {e}")